@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import azure.functions as func
+import json
+
+from shared_code import get_config, get_vision_service, get_recipe_service, get_azure_blob_service
+from shared_code.models import TokenUsage
+from shared_code.services.rate_limiter import RateLimitExceeded
+from shared_code.services.resilience import CircuitOpenError
+from shared_code.utils.background import run_in_background
+from shared_code.utils.image_utils import UnsupportedImageError
+
+async def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function to analyze a fridge/food image and generate recipes from it in a single call
+    
+    The analysis result is handed to recipe generation in memory, so the
+    ingredients are never read back from storage. The image, analysis,
+    dietary restrictions and recipes are saved under a new request_id in
+    the background, where GetIngredients/GetRecipes find them as usual.
+    
+    Args:
+        req: HTTP request object
+    
+    Returns:
+        HTTP response with the analysis and recipes, or error message
+    """
+    logging.info('Python HTTP trigger function processed an analyze-and-cook request.')
+    
+    try:
+        # Services are constructed on first use and reused on this instance
+        config = get_config()
+        vision_service = get_vision_service()
+        recipe_service = get_recipe_service()
+        azure_blob_service = get_azure_blob_service()
+        
+        # Check if file was uploaded
+        file = req.files.get('file')
+        if not file:
+            return func.HttpResponse(
+                json.dumps({"error": "No file part in the request"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+        
+        try:
+            options = get_recipe_options(req)
+        except ValueError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+        
+        # Get file paths for Azure Blob Storage
+        paths = config.get_file_paths(file.filename)
+        
+        # Read the file into memory
+        file_bytes = file.read()
+        
+        # Upload the image to Azure Blob Storage while the model analyzes it
+        upload_task = asyncio.create_task(
+            azure_blob_service.upload_file(file_bytes, paths["request_image"])
+        )
+        
+        usage = TokenUsage()
+        try:
+            result = await vision_service.analyze_image_bytes(file_bytes, usage=usage)
+        finally:
+            # The upload finishes on its own; recipe generation does not wait for it
+            run_in_background(upload_task, f"upload image {paths['request_image']}", key=paths["request_image"])
+        
+        # Save the analysis (and dietary restrictions) without holding up recipe generation
+        run_in_background(
+            vision_service.save_analysis(result, paths["vision_output"]),
+            f"save analysis {paths['vision_output']}",
+            key=paths["vision_output"]
+        )
+        if options["dietary_restrictions"]:
+            run_in_background(
+                azure_blob_service.upload_json(
+                    {"dietary_restrictions": options["dietary_restrictions"]}, paths["dietary_output"]
+                ),
+                f"save dietary restrictions {paths['dietary_output']}"
+            )
+        
+        analysis = {
+            "result": result,
+            "summary": vision_service.get_ingredients_summary(result),
+            "image_filename": paths["request_image"].split('/')[-1],
+            "request_id": paths["request_id"],
+            "usage": usage.to_dict()
+        }
+        ingredients = recipe_service.extract_ingredients(result)
+        
+        try:
+            recipes_data = await recipe_service.generate_recipes(
+                ingredients,
+                num_recipes=options["num_recipes"],
+                dietary_restrictions=options["dietary_restrictions"]
+            )
+        except Exception as e:
+            # The analysis is saved, so the client can retry with POST /generate-recipes and the request_id
+            return get_recipes_error_response(analysis, e)
+        
+        full_response = recipe_service.build_recipes_response(
+            recipes_data, len(ingredients), options["dietary_restrictions"]
+        )
+        
+        # Save the recipes without holding up the response
+        run_in_background(
+            recipe_service.save_recipes(full_response, paths["recipes_output"]),
+            f"save recipes {paths['recipes_output']}",
+            key=paths["recipes_output"]
+        )
+        
+        return func.HttpResponse(
+            json.dumps(dict(analysis, status="complete", recipes=full_response)),
+            mimetype="application/json"
+        )
+    except UnsupportedImageError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=e.status_code,
+            mimetype="application/json"
+        )
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        logging.warning(f"Model unavailable analyzing image and generating recipes: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+            mimetype="application/json"
+        )
+    except Exception as e:
+        logging.error(f"Error analyzing image and generating recipes: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=500,
+            mimetype="application/json"
+        )
+
+def get_recipes_error_response(analysis, error):
+    """
+    Build the response for a recipe generation that failed after the image was analyzed
+    
+    The status code is that of the error (429/503 with Retry-After when the
+    model is unavailable, 500 otherwise), and the body still carries the
+    analysis and its request_id.
+    
+    Args:
+        analysis: Analysis part of the response
+        error: Exception raised by recipe generation
+    
+    Returns:
+        HTTP response with the analysis and error message
+    """
+    body = dict(analysis, status="recipes_failed", error=str(error))
+    if isinstance(error, (RateLimitExceeded, CircuitOpenError)):
+        logging.warning(f"Model unavailable generating recipes for {analysis['request_id']}: {str(error)}")
+        return func.HttpResponse(
+            json.dumps(body),
+            status_code=error.status_code,
+            headers={"Retry-After": str(error.retry_after)},
+            mimetype="application/json"
+        )
+    
+    logging.error(f"Error generating recipes for {analysis['request_id']}: {str(error)}")
+    return func.HttpResponse(
+        json.dumps(body),
+        status_code=500,
+        mimetype="application/json"
+    )
+
+def get_recipe_options(req):
+    """
+    Read the recipe options sent along with the image (form fields or query parameters)
+    
+    Args:
+        req: HTTP request object
+    
+    Returns:
+        Dictionary with num_recipes and dietary_restrictions
+    
+    Raises:
+        ValueError: If num_recipes is not a number or dietary_restrictions is not a JSON list
+    """
+    fields = {
+        name: req.form.get(name, req.params.get(name))
+        for name in ('num_recipes', 'dietary_restrictions')
+    }
+    
+    try:
+        num_recipes = int(fields['num_recipes'] or 5)
+    except ValueError:
+        raise ValueError("num_recipes must be a number")
+    
+    try:
+        dietary_restrictions = json.loads(fields['dietary_restrictions'] or '[]')
+    except ValueError:
+        dietary_restrictions = None
+    if not isinstance(dietary_restrictions, list):
+        raise ValueError("dietary_restrictions must be a JSON list")
+    
+    return {
+        "num_recipes": num_recipes,
+        "dietary_restrictions": dietary_restrictions
+    }
\ No newline at end of file
@@ -1,13 +1,30 @@
+import asyncio
 import logging
 import azure.functions as func
 import json
 
-from shared_code import config, vision_service, azure_blob_service
+from shared_code import (
+    get_config,
+    get_vision_service,
+    get_azure_blob_service,
+    get_job_service,
+    get_recipe_service,
+    get_recipe_speculator
+)
+from shared_code.models import TokenUsage
+from shared_code.services.rate_limiter import RateLimitExceeded
+from shared_code.services.resilience import CircuitOpenError
+from shared_code.utils.background import run_in_background
+from shared_code.utils.image_utils import UnsupportedImageError
+from shared_code.utils.job_utils import POLL_INTERVAL_SECONDS, is_job_requested
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+async def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function to analyze a fridge/food image and identify ingredients
     
+    In job mode the image is stored, the analysis is queued and 202 Accepted
+    is returned right away; the result is then polled with GetIngredients.
+    
     Args:
         req: HTTP request object
     
@@ -17,6 +34,11 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed an analyze-image request.')
     
     try:
+        # Services are constructed on first use and reused on this instance
+        config = get_config()
+        vision_service = get_vision_service()
+        azure_blob_service = get_azure_blob_service()
+        
         # Check if file was uploaded
         file = req.files.get('file')
         if not file:
@@ -32,14 +54,49 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         # Read the file into memory
         file_bytes = file.read()
         
-        # Upload the image to Azure Blob Storage
-        azure_blob_service.upload_file(file_bytes, paths["request_image"])
+        if is_job_requested(req, mode=config.get_job_config()["mode"]):
+            # The worker reads the image back from storage, so it must be uploaded first
+            await azure_blob_service.upload_file(file_bytes, paths["request_image"])
+            status = await get_job_service().submit("analyze_image", paths, image_blob=paths["request_image"])
+            return func.HttpResponse(
+                json.dumps({
+                    "status": status["status"],
+                    "image_filename": paths["request_image"].split('/')[-1],
+                    "request_id": paths["request_id"]
+                }),
+                status_code=202,
+                headers={"Retry-After": str(POLL_INTERVAL_SECONDS)},
+                mimetype="application/json"
+            )
         
-        # Process image from the uploaded bytes
-        result = vision_service.analyze_image_bytes(file_bytes)
+        # Upload the image to Azure Blob Storage while the model analyzes it
+        upload_task = asyncio.create_task(
+            azure_blob_service.upload_file(file_bytes, paths["request_image"])
+        )
+        
+        usage = TokenUsage()
+        try:
+            # Process image from the uploaded bytes
+            result = await vision_service.analyze_image_bytes(file_bytes, usage=usage)
+        finally:
+            # The upload finishes on its own; a failed upload is logged without discarding the paid analysis
+            run_in_background(upload_task, f"upload image {paths['request_image']}", key=paths["request_image"])
+        
+        # Save analysis to Azure Blob Storage without holding up the response
+        run_in_background(
+            vision_service.save_analysis(result, paths["vision_output"]),
+            f"save analysis {paths['vision_output']}",
+            key=paths["vision_output"]
+        )
         
-        # Save analysis to Azure Blob Storage
-        vision_service.save_analysis(result, paths["vision_output"])
+        # Start generating the recipes most users ask for next while the response is on its way
+        recipe_speculator = get_recipe_speculator()
+        if recipe_speculator is not None:
+            run_in_background(
+                recipe_speculator.start(paths, get_recipe_service().extract_ingredients(result)),
+                f"speculate recipes {paths['request_id']}",
+                key=paths["speculation_status"]
+            )
         
         # Get a summary
         summary = vision_service.get_ingredients_summary(result)
@@ -54,10 +111,25 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 "result": result,
                 "summary": summary,
                 "image_filename": image_filename,
-                "request_id": request_id
+                "request_id": request_id,
+                "usage": usage.to_dict()
             }),
             mimetype="application/json"
         )
+    except UnsupportedImageError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=e.status_code,
+            mimetype="application/json"
+        )
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        logging.warning(f"Model unavailable analyzing image: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+            mimetype="application/json"
+        )
     except Exception as e:
         logging.error(f"Error analyzing image: {str(e)}")
         return func.HttpResponse(
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+import azure.functions as func
+import json
+
+from shared_code import (
+    get_config,
+    get_vision_service,
+    get_azure_blob_service,
+    get_recipe_service,
+    get_recipe_speculator
+)
+from shared_code.models import IngredientsResult, TokenUsage
+from shared_code.services.rate_limiter import RateLimitExceeded
+from shared_code.services.resilience import CircuitOpenError
+from shared_code.utils.background import run_in_background
+from shared_code.utils.image_utils import UnsupportedImageError
+
+async def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function to analyze several fridge/pantry/freezer images as one request
+    
+    The images (sent as repeated "files" form fields) are analyzed
+    concurrently with a bounded number of model calls at a time, and their
+    ingredients are merged into a single result, de-duplicated across
+    images. The images and the combined analysis are stored under one
+    request_id, so GetIngredients and GenerateRecipes use it like the
+    analysis of a single image.
+    
+    Args:
+        req: HTTP request object
+    
+    Returns:
+        HTTP response with the combined analysis result or error message
+    """
+    logging.info('Python HTTP trigger function processed an analyze-images request.')
+    
+    try:
+        # Services are constructed on first use and reused on this instance
+        config = get_config()
+        vision_service = get_vision_service()
+        azure_blob_service = get_azure_blob_service()
+        batch_config = config.get_vision_batch_config()
+        
+        # Check if files were uploaded
+        files = req.files.getlist('files') + req.files.getlist('file')
+        if not files:
+            return func.HttpResponse(
+                json.dumps({"error": "No files part in the request"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+        if len(files) > batch_config["max_images"]:
+            return func.HttpResponse(
+                json.dumps({"error": f"Too many images: at most {batch_config['max_images']} can be analyzed per request"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+        
+        # Get file paths for Azure Blob Storage; every image gets its own blob in the request folder
+        paths = config.get_file_paths(files[0].filename)
+        image_base = os.path.splitext(paths["request_image"])[0]
+        image_blobs = [
+            f"{image_base}_{index}{os.path.splitext(file.filename)[1]}"
+            for index, file in enumerate(files)
+        ]
+        
+        # Read the files into memory
+        images = [file.read() for file in files]
+        
+        # Upload the images to Azure Blob Storage while the model analyzes them
+        upload_tasks = [
+            asyncio.create_task(azure_blob_service.upload_file(image_bytes, image_blob))
+            for image_bytes, image_blob in zip(images, image_blobs)
+        ]
+        
+        usage = TokenUsage()
+        try:
+            result, image_results = await vision_service.analyze_images_bytes(
+                images, max_concurrency=batch_config["max_concurrency"], usage=usage
+            )
+        finally:
+            # The uploads finish on their own; a failed upload is logged without discarding the paid analysis
+            for upload_task, image_blob in zip(upload_tasks, image_blobs):
+                run_in_background(upload_task, f"upload image {image_blob}", key=image_blob)
+        
+        # Save the combined analysis to Azure Blob Storage without holding up the response
+        run_in_background(
+            vision_service.save_analysis(result, paths["vision_output"]),
+            f"save analysis {paths['vision_output']}",
+            key=paths["vision_output"]
+        )
+        
+        # Start generating the recipes most users ask for next while the response is on its way
+        recipe_speculator = get_recipe_speculator()
+        if recipe_speculator is not None:
+            run_in_background(
+                recipe_speculator.start(paths, get_recipe_service().extract_ingredients(result)),
+                f"speculate recipes {paths['request_id']}",
+                key=paths["speculation_status"]
+            )
+        
+        return func.HttpResponse(
+            json.dumps({
+                "status": "complete",
+                "result": result,
+                "summary": vision_service.get_ingredients_summary(result),
+                "images": [
+                    get_image_summary(image_blob, image_result)
+                    for image_blob, image_result in zip(image_blobs, image_results)
+                ],
+                "request_id": paths["request_id"],
+                "usage": usage.to_dict()
+            }),
+            mimetype="application/json"
+        )
+    except UnsupportedImageError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=e.status_code,
+            mimetype="application/json"
+        )
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        logging.warning(f"Model unavailable analyzing images: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+            mimetype="application/json"
+        )
+    except Exception as e:
+        logging.error(f"Error analyzing images: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=500,
+            mimetype="application/json"
+        )
+
+def get_image_summary(image_blob, image_result):
+    """
+    Describe one image of the request for the response's "images" list
+    
+    Args:
+        image_blob: Blob path the image is stored at
+        image_result: The image's analysis result, or the exception its analysis failed with
+    
+    Returns:
+        Dictionary with the image filename and its ingredient count, or its error
+    """
+    summary = {"image_filename": image_blob.split('/')[-1]}
+    if isinstance(image_result, BaseException):
+        summary["error"] = str(image_result)
+    else:
+        summary["ingredient_count"] = len(IngredientsResult.from_dict(image_result).get_all_ingredients())
+    return summary
\ No newline at end of file
@@ -2,12 +2,28 @@ import logging
 import azure.functions as func
 import json
 
-from shared_code import config, recipe_service, azure_blob_service
+from shared_code import (
+    get_config,
+    get_recipe_service,
+    get_azure_blob_service,
+    get_job_service,
+    get_recipe_lease_flight,
+    get_recipe_speculator
+)
+from shared_code.services.rate_limiter import RateLimitExceeded
+from shared_code.services.resilience import CircuitOpenError
+from shared_code.utils.background import wait_for_pending_write
+from shared_code.utils.job_utils import POLL_INTERVAL_SECONDS, is_job_requested
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+async def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function to generate recipe suggestions based on available ingredients
     
+    In job mode the generation is queued and 202 Accepted is returned right
+    away; the result is then polled with GetRecipes. With recipe leases
+    enabled, identical requests for the same request_id on other instances
+    wait for the first one and return the recipes it saved.
+    
     Args:
         req: HTTP request object
     
@@ -17,6 +33,11 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a generate-recipes request.')
     
     try:
+        # Services are constructed on first use and reused on this instance
+        config = get_config()
+        recipe_service = get_recipe_service()
+        azure_blob_service = get_azure_blob_service()
+        
         # Parse request data
         try:
             req_body = req.get_json()
@@ -51,8 +72,12 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
         
-        # Check if ingredients blob exists
-        if not azure_blob_service.blob_exists(ingredients_blob):
+        # The analysis may still be being saved in the background on this instance
+        await wait_for_pending_write(ingredients_blob)
+        
+        # Load ingredients from Azure Blob Storage (None if there is no ingredients file)
+        ingredients = await recipe_service.load_ingredients(ingredients_blob)
+        if ingredients is None:
             return func.HttpResponse(
                 json.dumps({
                     "error": f"No ingredients file found for request_id: {request_id}"
@@ -61,40 +86,69 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
         
-        # Load ingredients from Azure Blob Storage
-        ingredients = recipe_service.load_ingredients(ingredients_blob)
-        
         # Save dietary restrictions if provided
         if dietary_restrictions:
             dietary_blob = f"{paths['request_dir']}/dietary_{request_id.split('_', 1)[1]}.json"
-            azure_blob_service.upload_json({"dietary_restrictions": dietary_restrictions}, dietary_blob)
+            await azure_blob_service.upload_json({"dietary_restrictions": dietary_restrictions}, dietary_blob)
         
-        # Generate recipes with dietary restrictions if provided
-        recipes_data = recipe_service.generate_recipes(
-            ingredients, 
-            num_recipes=num_recipes,
-            dietary_restrictions=dietary_restrictions
-        )
+        # Recipes generated speculatively after the analysis answer requests with the default parameters
+        recipe_speculator = get_recipe_speculator()
+        speculative_recipes = None
+        if recipe_speculator is not None:
+            speculative_recipes = await recipe_speculator.claim(paths, num_recipes, dietary_restrictions)
         
-        # Get analysis
-        analysis = recipe_service.get_recipes_analysis(recipes_data)
-        analysis_dict = analysis.to_dict('records') if analysis is not None else []
+        if speculative_recipes is None and is_job_requested(req, req_body, mode=config.get_job_config()["mode"]):
+            status = await get_job_service().submit(
+                "generate_recipes",
+                paths,
+                num_recipes=num_recipes,
+                dietary_restrictions=dietary_restrictions
+            )
+            return func.HttpResponse(
+                json.dumps({"status": status["status"], "request_id": request_id}),
+                status_code=202,
+                headers={"Retry-After": str(POLL_INTERVAL_SECONDS)},
+                mimetype="application/json"
+            )
         
-        # Create full response
-        full_response = {
-            "items": recipes_data["recipes"],
-            "analysis": analysis_dict,
-            "ingredient_count": len(ingredients),
-            "dietary_restrictions": dietary_restrictions if dietary_restrictions else []
-        }
+        async def generate_and_save():
+            # Generate recipes with dietary restrictions if provided
+            recipes_data = speculative_recipes or await recipe_service.generate_recipes(
+                ingredients, 
+                num_recipes=num_recipes,
+                dietary_restrictions=dietary_restrictions
+            )
+        
+            # Create full response
+            full_response = recipe_service.build_recipes_response(recipes_data, len(ingredients), dietary_restrictions)
         
-        # Save the full response to Azure Blob Storage
-        recipe_service.save_recipes(full_response, recipes_blob)
+            # Save the full response to Azure Blob Storage
+            await recipe_service.save_recipes(full_response, recipes_blob)
+            return full_response
+        
+        recipe_lease_flight = get_recipe_lease_flight()
+        if recipe_lease_flight is not None and speculative_recipes is None:
+            full_response = await recipe_lease_flight.do(
+                paths["recipes_lock"],
+                recipe_service.get_request_key(ingredients, num_recipes, dietary_restrictions),
+                generate_and_save,
+                lambda: azure_blob_service.download_json_if_exists(recipes_blob, fresh=True)
+            )
+        else:
+            full_response = await generate_and_save()
         
         return func.HttpResponse(
             json.dumps(full_response),
             mimetype="application/json"
         )
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        logging.warning(f"Model unavailable generating recipes: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+            mimetype="application/json"
+        )
     except Exception as e:
         logging.error(f"Error generating recipes: {str(e)}")
         return func.HttpResponse(
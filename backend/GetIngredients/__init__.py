@@ -2,12 +2,25 @@ import logging
 import azure.functions as func
 import json
 
-from shared_code import config, azure_blob_service
+from shared_code import get_config, get_azure_blob_service, get_job_service
+from shared_code.utils.http_utils import (
+    NO_STORE_HEADERS,
+    build_cache_control,
+    get_cache_headers,
+    get_if_none_match,
+    get_stored_representation
+)
+from shared_code.utils.job_utils import get_job_status_response, get_wait_seconds
+from shared_code.utils.background import wait_for_pending_write
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+async def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function to get ingredients for the specified request ID
     
+    While a queued analysis (job mode) has not finished, 202 Accepted is
+    returned with the job status; ?wait=<seconds> holds the request open
+    until the job finishes (long polling).
+    
     Args:
         req: HTTP request object
     
@@ -17,6 +30,10 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a get-ingredients request.')
     
     try:
+        # Services are constructed on first use and reused on this instance
+        config = get_config()
+        azure_blob_service = get_azure_blob_service()
+        
         # Get request ID (folder name) from query parameter
         request_id = req.params.get('request_id')
         
@@ -40,21 +57,58 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
         
-        # Check if blob exists
-        if not azure_blob_service.blob_exists(ingredients_blob):
+        # The analysis may still be being saved in the background on this instance
+        await wait_for_pending_write(ingredients_blob)
+        
+        # Load the stored ingredients unless the client's copy is still current (None if the blob does not exist)
+        stored_ingredients = await azure_blob_service.download_bytes_if_modified(
+            ingredients_blob, etags=get_if_none_match(req), immutable=True
+        )
+        if stored_ingredients is None:
+            # The analysis may be queued or running in job mode; wait for it if the client asked to
+            job_status = await get_job_service().wait_for_job(
+                "analyze_image", paths, get_wait_seconds(req, config.get_job_config()["long_poll_max_seconds"])
+            )
+            if job_status is not None and job_status["status"] == "complete":
+                # The job (maybe on another instance) saved the analysis after this instance noted it as missing
+                azure_blob_service.invalidate(ingredients_blob)
+                stored_ingredients = await azure_blob_service.download_bytes_if_modified(
+                    ingredients_blob, etags=get_if_none_match(req), immutable=True
+                )
+            if stored_ingredients is None and job_status is not None:
+                body, status_code, headers = get_job_status_response(job_status)
+                return func.HttpResponse(
+                    json.dumps(body),
+                    status_code=status_code,
+                    mimetype="application/json",
+                    headers=headers
+                )
+        
+        if stored_ingredients is None:
             return func.HttpResponse(
                 json.dumps({
                     "error": f"No ingredients file found for request_id: {request_id}"
                 }),
                 status_code=404,
-                mimetype="application/json"
+                mimetype="application/json",
+                headers=NO_STORE_HEADERS
             )
         
-        # Load and return the ingredients from Azure Blob Storage
-        ingredients_data = azure_blob_service.download_json(ingredients_blob)
+        # The stored JSON is returned as is (still compressed if the client accepts it), without parsing it
+        body, etag, headers = get_stored_representation(req, stored_ingredients)
+        http_cache_config = config.get_http_cache_config()
+        headers.update(get_cache_headers(
+            etag, build_cache_control(
+                http_cache_config["ingredients_max_age"], immutable=True, public=http_cache_config["public"]
+            )
+        ))
+        if body is None:
+            return func.HttpResponse(status_code=304, headers=headers)
+        
         return func.HttpResponse(
-            json.dumps(ingredients_data),
-            mimetype="application/json"
+            body,
+            mimetype=stored_ingredients["content_type"] or "application/json",
+            headers=headers
         )
     except Exception as e:
         logging.error(f"Error retrieving ingredients: {str(e)}")
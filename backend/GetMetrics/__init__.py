@@ -0,0 +1,55 @@
+import logging
+import azure.functions as func
+import json
+
+from shared_code import get_initialized_services
+from shared_code.utils.background import get_background_stats
+
+async def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function to report in-process service metrics (cache hit rates, etc.)
+    
+    Metrics are per function host instance and reset when the instance recycles.
+    Services that have not been used on this instance yet are reported as null
+    rather than constructed just to be measured.
+    
+    Args:
+        req: HTTP request object
+    
+    Returns:
+        HTTP response with metrics or error message
+    """
+    logging.info('Python HTTP trigger function processed a get-metrics request.')
+    
+    try:
+        services = get_initialized_services()
+        metrics = {
+            "vision": get_service_stats(services, "vision_service"),
+            "vision_cache": get_service_stats(services, "vision_cache"),
+            "recipes": get_service_stats(services, "recipe_service"),
+            "recipe_cache": get_service_stats(services, "recipe_cache"),
+            "request_index": get_service_stats(services, "request_index"),
+            "jobs": get_service_stats(services, "job_service"),
+            "speculation": get_service_stats(services, "recipe_speculator"),
+            "recipe_leases": get_service_stats(services, "recipe_lease_flight"),
+            "openai": get_service_stats(services, "azure_openai_client"),
+            "storage_connections": get_service_stats(services, "azure_blob_service"),
+            "background_tasks": get_background_stats()
+        }
+        
+        return func.HttpResponse(
+            json.dumps(metrics),
+            mimetype="application/json"
+        )
+    except Exception as e:
+        logging.error(f"Error retrieving metrics: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=500,
+            mimetype="application/json"
+        )
+
+def get_service_stats(services, name):
+    """Return a service's stats, or None if it has not been initialized on this instance"""
+    service = services.get(name)
+    return service.get_stats() if service is not None else None
\ No newline at end of file
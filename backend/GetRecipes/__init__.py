@@ -2,12 +2,25 @@ import logging
 import azure.functions as func
 import json
 
-from shared_code import config, azure_blob_service
+from shared_code import get_config, get_azure_blob_service, get_job_service
+from shared_code.utils.http_utils import (
+    NO_STORE_HEADERS,
+    build_cache_control,
+    get_cache_headers,
+    get_if_none_match,
+    get_stored_representation
+)
+from shared_code.utils.job_utils import get_job_status_response, get_wait_seconds
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+async def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function to get recipes for the specified request ID
     
+    While a queued generation (job mode) has not produced recipes, 202
+    Accepted is returned with the job status. With ?wait=<seconds> the
+    request is held open until a queued or running job finishes (long
+    polling), so regenerated recipes are returned instead of earlier ones.
+    
     Args:
         req: HTTP request object
     
@@ -17,6 +30,10 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a get-recipes request.')
     
     try:
+        # Services are constructed on first use and reused on this instance
+        config = get_config()
+        azure_blob_service = get_azure_blob_service()
+        
         # Get request ID (folder name) from query parameter
         request_id = req.params.get('request_id')
         
@@ -40,21 +57,58 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
         
-        # Check if blob exists
-        if not azure_blob_service.blob_exists(recipes_blob):
+        job_service = get_job_service()
+        wait = get_wait_seconds(req, config.get_job_config()["long_poll_max_seconds"])
+        job_status = None
+        if wait:
+            # Long poll: let a queued or running generation (job mode) finish before answering
+            job_status = await job_service.wait_for_job("generate_recipes", paths, wait)
+        
+        # Load the stored recipes unless the client's copy is still current (None if the blob does not exist)
+        stored_recipes = await azure_blob_service.download_bytes_if_modified(
+            recipes_blob, etags=get_if_none_match(req), immutable=False
+        )
+        if stored_recipes is None and not wait:
+            job_status = await job_service.get_status("generate_recipes", paths)
+        if stored_recipes is None and job_status is not None and job_status["status"] == "complete":
+            # The job (maybe on another instance) saved the recipes after this instance noted them as missing
+            azure_blob_service.invalidate(recipes_blob)
+            stored_recipes = await azure_blob_service.download_bytes_if_modified(
+                recipes_blob, etags=get_if_none_match(req), immutable=False
+            )
+        
+        if job_status is not None and (stored_recipes is None or job_status["status"] in ("queued", "running")):
+            body, status_code, headers = get_job_status_response(job_status)
+            return func.HttpResponse(
+                json.dumps(body),
+                status_code=status_code,
+                mimetype="application/json",
+                headers=headers
+            )
+        
+        if stored_recipes is None:
             return func.HttpResponse(
                 json.dumps({
                     "error": f"No recipes file found for request_id: {request_id}"
                 }),
                 status_code=404,
-                mimetype="application/json"
+                mimetype="application/json",
+                headers=NO_STORE_HEADERS
             )
         
-        # Load and return the recipes from Azure Blob Storage
-        recipes_data = azure_blob_service.download_json(recipes_blob)
+        # The stored JSON is returned as is (still compressed if the client accepts it), without parsing it
+        body, etag, headers = get_stored_representation(req, stored_recipes)
+        http_cache_config = config.get_http_cache_config()
+        headers.update(get_cache_headers(
+            etag, build_cache_control(http_cache_config["recipes_max_age"], public=http_cache_config["public"])
+        ))
+        if body is None:
+            return func.HttpResponse(status_code=304, headers=headers)
+        
         return func.HttpResponse(
-            json.dumps(recipes_data),
-            mimetype="application/json"
+            body,
+            mimetype=stored_recipes["content_type"] or "application/json",
+            headers=headers
         )
     except Exception as e:
         logging.error(f"Error retrieving recipes: {str(e)}")
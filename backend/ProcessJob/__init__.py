@@ -0,0 +1,32 @@
+import logging
+import azure.functions as func
+
+from shared_code import get_config, get_job_processor
+
+async def main(msg: func.QueueMessage) -> None:
+    """
+    Azure Function to process a queued analysis or recipe job (job mode with JOB_QUEUE_BACKEND=azure)
+    
+    The job's status is written to the request folder. A job whose model
+    calls are rate limited or blocked by an open circuit breaker raises, so
+    the queue trigger retries it until maxDequeueCount (host.json) is
+    reached; any other failure is recorded as the job's status.
+    
+    Args:
+        msg: Queue message containing the job as JSON
+    """
+    job = msg.get_json()
+    logging.info(f"Python queue trigger function processing a {job.get('type')} job for request {job.get('request_id')}.")
+    
+    # The last delivery before the host moves the message to the poison queue records the failure
+    final_attempt = msg.dequeue_count >= get_config().get_job_config()["max_dequeue_count"]
+    try:
+        await get_job_processor().process(job, final_attempt=final_attempt)
+    except Exception as e:
+        if final_attempt:
+            # The message goes to the poison queue; don't leave the status queued or running
+            try:
+                await get_job_processor().record_failure(job, e)
+            except Exception as status_error:
+                logging.error(f"Could not record the failure of {job.get('type')} job {job.get('request_id')}: {str(status_error)}")
+        raise
\ No newline at end of file
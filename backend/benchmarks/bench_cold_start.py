@@ -0,0 +1,124 @@
+"""
+Benchmark - Cold-start time of each function entry point
+
+Imports every function package (AnalyzeImage, GenerateRecipes, ...) in a fresh
+Python process, the way a cold Functions worker does, then calls the lazy
+shared_code accessors the function uses, as its first request would. It
+reports the median import and first-use initialization times, whether the
+OpenAI SDK was loaded, and the heaviest top-level modules pulled in (from
+python -X importtime, cumulative and possibly nested in one another). No network calls are needed: placeholder settings are
+used for any Azure configuration that is not already set in the environment.
+The read endpoints (OPENAI_FREE_FUNCTIONS) only use storage and must start
+without importing the OpenAI SDK; the benchmark exits with status 1 if one
+of them loads it.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs 5] [--top 5] [FunctionName ...]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLACEHOLDER_SETTINGS = {
+    "AZURE_OPENAI_API_KEY": "placeholder",
+    "AZURE_OPENAI_ENDPOINT": "https://placeholder.openai.azure.com",
+    "API_VERSION": "2024-10-21",
+    "MODEL_NAME": "placeholder",
+    "AZURE_STORAGE_CONNECTION_STRING": "UseDevelopmentStorage=true",
+    "AZURE_STORAGE_CONTAINER": "container01"
+}
+
+# Entry points that never call a model, so loading the OpenAI SDK there is pure cold-start cost
+OPENAI_FREE_FUNCTIONS = ("GetIngredients", "GetRecipes")
+
+STARTUP_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import {module} as entry
+imported = time.perf_counter()
+for name, value in vars(entry).items():
+    if name.startswith("get_") and getattr(value, "__module__", None) == "shared_code":
+        value()
+initialized = time.perf_counter()
+print(f"IMPORT_MS={{(imported - start) * 1000:.1f}}")
+print(f"INIT_MS={{(initialized - imported) * 1000:.1f}}")
+print(f"OPENAI_LOADED={{'openai' in sys.modules}}")
+"""
+
+def find_entry_points():
+    """Find function folders (those containing a function.json)"""
+    return sorted(
+        name for name in os.listdir(BACKEND_DIR)
+        if os.path.isfile(os.path.join(BACKEND_DIR, name, "function.json"))
+    )
+
+def measure(module, env):
+    """Start a function in a fresh interpreter; return (measurements, importtime report lines)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SNIPPET.format(module=module)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+    
+    measurements = dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+    return measurements, [line for line in result.stderr.splitlines() if line.startswith("import time:")]
+
+def heaviest_modules(report, top, exclude=()):
+    """Return the third-party/project packages with the largest cumulative import time"""
+    totals = {}
+    for line in report:
+        try:
+            _, cumulative, name = line.split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue
+        package = name.strip().split(".")[0]
+        if package in sys.stdlib_module_names or package.startswith("_") or package in exclude:
+            continue
+        totals[package] = max(totals.get(package, 0), cumulative)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("functions", nargs="*", help="Function folders to measure (default: all)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Number of heaviest modules to list")
+    args = parser.parse_args()
+    
+    env = dict(os.environ)
+    for name, value in PLACEHOLDER_SETTINGS.items():
+        env.setdefault(name, value)
+    
+    failures = []
+    for function in args.functions or find_entry_points():
+        try:
+            runs = [measure(function, env) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{function:<18} failed: {e}")
+            failures.append(function)
+            continue
+        
+        import_times = [float(measurements["IMPORT_MS"]) for measurements, _ in runs]
+        init_times = [float(measurements["INIT_MS"]) for measurements, _ in runs]
+        print(
+            f"{function:<18} import median {statistics.median(import_times):8.1f} ms   "
+            f"init median {statistics.median(init_times):8.1f} ms   "
+            f"openai loaded: {runs[-1][0]['OPENAI_LOADED']}"
+        )
+        for package, cumulative in heaviest_modules(runs[-1][1], args.top, exclude=(function,)):
+            print(f"{'':<18}   {package:<28} {cumulative / 1000:8.1f} ms")
+        if function in OPENAI_FREE_FUNCTIONS and any(measurements["OPENAI_LOADED"] == "True" for measurements, _ in runs):
+            print(f"{'':<18}   FAIL: {function} must start without importing the OpenAI SDK")
+            failures.append(function)
+    
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
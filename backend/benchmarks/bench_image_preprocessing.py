@@ -0,0 +1,94 @@
+"""
+Benchmark - Image preprocessing before base64 encoding
+
+Compares the payload sent to Azure OpenAI with and without preprocessing for
+every image in sample-images/ (plus a simulated 12 MP phone photo of each):
+bytes sent, CPU time spent preparing the payload, and the estimated upload
+time at a given bandwidth.
+
+Usage:
+    python benchmarks/bench_image_preprocessing.py [--max-edge 2048] [--quality 85] [--format JPEG]
+"""
+
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# shared_code initializes its services lazily, so this does not need any Azure settings
+from shared_code.utils import image_utils
+
+def simulate_phone_photo(image_bytes, size=(4032, 3024)):
+    """Upscale an image to a typical 12 MP phone photo at high JPEG quality"""
+    from PIL import Image
+    with Image.open(BytesIO(image_bytes)) as image:
+        output = BytesIO()
+        image.convert("RGB").resize(size, Image.Resampling.BICUBIC).save(output, format="JPEG", quality=95)
+        return output.getvalue()
+
+def time_call(func, repeat):
+    """Run func repeat times and return (last result, median milliseconds)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=os.path.join(BACKEND_DIR, "sample-images"))
+    parser.add_argument("--max-edge", type=int, default=2048)
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--format", default="JPEG")
+    parser.add_argument("--bandwidth-mbps", type=float, default=20.0, help="Uplink bandwidth used to estimate upload time")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-simulated", action="store_true", help="Skip the simulated 12 MP phone photos")
+    args = parser.parse_args()
+    
+    samples = []
+    for name in sorted(os.listdir(args.images)):
+        with open(os.path.join(args.images, name), "rb") as f:
+            data = f.read()
+        samples.append((name, data))
+        if not args.no_simulated:
+            samples.append((f"{name} (12 MP)", simulate_phone_photo(data)))
+    
+    bytes_per_ms = args.bandwidth_mbps * 1_000_000 / 8 / 1000
+    
+    header = f"{'image':<24} {'mode':<7} {'payload':>11} {'prepare':>10} {'upload*':>10} {'mime':<11}"
+    print(header)
+    print("-" * len(header))
+    
+    for name, data in samples:
+        before, before_ms = time_call(lambda: base64.b64encode(data), args.repeat)
+        
+        def preprocess_and_encode():
+            processed, mime_type = image_utils.preprocess_image(
+                data, max_edge=args.max_edge, quality=args.quality, output_format=args.format
+            )
+            return base64.b64encode(processed), mime_type
+        
+        (after, mime_type), after_ms = time_call(preprocess_and_encode, args.repeat)
+        
+        for mode, payload, prepare_ms, mime in (
+            ("before", before, before_ms, image_utils.detect_image_mime_type(data)),
+            ("after", after, after_ms, mime_type)
+        ):
+            upload_ms = len(payload) / bytes_per_ms
+            print(f"{name:<24} {mode:<7} {len(payload) / 1024:>8.0f} KB {prepare_ms:>7.1f} ms {upload_ms:>7.0f} ms {mime:<11}")
+        
+        saved = 1 - len(after) / len(before)
+        print(f"{'':<24} {'saved':<7} {saved:>10.0%}   net latency change {after_ms - before_ms + (len(after) - len(before)) / bytes_per_ms:+.0f} ms")
+    
+    print(f"\n* estimated transfer time of the base64 payload at {args.bandwidth_mbps:g} Mbit/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark - CPU cost of serving stored JSON results
+
+Compares the two ways GetIngredients/GetRecipes can turn a downloaded blob
+into an HTTP response: parsing the JSON and serializing it again (the old
+path), or passing the stored bytes through unchanged. Only in-process CPU time
+is measured; the storage download itself is identical for both.
+
+Usage:
+    python benchmarks/bench_json_passthrough.py [--repeat 200] [--recipes 5 20 50]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from io import BytesIO
+
+import azure.functions as func
+
+from payloads import build_ingredients_payload, build_recipes_payload
+
+def parse_and_reserialize(stored):
+    """The previous read path: BytesIO -> str -> json.loads -> json.dumps -> response"""
+    stream = BytesIO()
+    stream.write(stored)
+    stream.seek(0)
+    data = json.loads(stream.read().decode('utf-8'))
+    return func.HttpResponse(json.dumps(data), mimetype="application/json")
+
+def passthrough(stored):
+    """The passthrough read path: stored bytes -> response"""
+    return func.HttpResponse(stored, mimetype="application/json")
+
+def cpu_time_us(handler, stored, repeat):
+    """Median CPU time of one call in microseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time_ns()
+        handler(stored)
+        timings.append((time.process_time_ns() - start) / 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--recipes", type=int, nargs="+", default=[5, 20, 50], help="Recipe counts to benchmark")
+    args = parser.parse_args()
+    
+    payloads = [("ingredients", build_ingredients_payload())]
+    payloads += [(f"recipes x{count}", build_recipes_payload(count)) for count in args.recipes]
+    
+    header = f"{'payload':<16} {'stored':>9} {'parse+dump':>12} {'passthrough':>12} {'saved':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, payload in payloads:
+        # Stored the way upload_json writes it
+        stored = json.dumps(payload, indent=2).encode('utf-8')
+        before = cpu_time_us(parse_and_reserialize, stored, args.repeat)
+        after = cpu_time_us(passthrough, stored, args.repeat)
+        print(f"{name:<16} {len(stored) / 1024:>6.1f} KB {before:>9.1f} us {after:>9.1f} us {before - after:>7.1f} us")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
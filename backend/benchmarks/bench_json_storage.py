@@ -0,0 +1,102 @@
+"""
+Benchmark - Storage format of persisted JSON
+
+Compares the formats upload_json can write (indented as before, compact,
+each optionally gzip/zstd compressed) over realistic analysis and recipe
+payloads: bytes stored, encode time and decode time. The stdlib encoder and
+orjson (when installed) are both measured, since the service uses orjson
+automatically if it is available. Before timing, every format is checked
+to be readable by decode_json as the service reads blobs, including the
+indented, uncompressed blobs stored before compression was introduced.
+
+Usage:
+    python benchmarks/bench_json_storage.py [--repeat 200] [--recipes 5 20 50]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payloads import build_ingredients_payload, build_recipes_payload
+from shared_code.utils import json_utils
+
+def stdlib_dumps(data, indent):
+    """Standard library encoder, as used when orjson is not installed"""
+    if indent:
+        return json.dumps(data, indent=2).encode('utf-8')
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode('utf-8')
+
+def get_formats():
+    """Return (name, encoder, decoder) for each storage format to compare"""
+    encoders = [("stdlib", stdlib_dumps, json.loads)]
+    if json_utils.orjson is not None:
+        encoders.append(("orjson", lambda data, indent: json_utils.orjson.dumps(data), json_utils.orjson.loads))
+    
+    compressions = [None, "gzip"] + (["zstd"] if json_utils.zstandard is not None else [])
+    
+    formats = [("indented (stdlib)", lambda data: stdlib_dumps(data, True), json.loads)]
+    for encoder_name, dumps, loads in encoders:
+        for compression in compressions:
+            name = f"compact ({encoder_name}{'+' + compression if compression else ''})"
+            formats.append((
+                name,
+                lambda data, dumps=dumps, compression=compression: json_utils.compress(dumps(data, False), compression),
+                lambda stored, loads=loads, compression=compression: loads(json_utils.decompress(stored, compression))
+            ))
+    return formats
+
+def check_compatibility(payload):
+    """Check that decode_json reads every format, whatever Content-Encoding the blob carries"""
+    stored_blobs = [(stdlib_dumps(payload, True), None), (json_utils.dumps_bytes(payload), None)]
+    for compression in ["gzip"] + (["zstd"] if json_utils.zstandard is not None else []):
+        stored_blobs.append(json_utils.encode_json(payload, compression=compression))
+    
+    for stored, content_encoding in stored_blobs:
+        # Old uncompressed blobs have no Content-Encoding; compressed ones are checked with it and without it
+        for header in {content_encoding, None}:
+            assert json_utils.decode_json(stored, header) == payload, (content_encoding, header)
+    # An uncompressed blob with a stale compression header is read as plain JSON
+    assert json_utils.decode_json(json_utils.dumps_bytes(payload), "gzip") == payload
+
+def median_us(func, argument, repeat):
+    """Median wall-clock time of one call in microseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func(argument)
+        timings.append((time.perf_counter_ns() - start) / 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--recipes", type=int, nargs="+", default=[5, 20, 50], help="Recipe counts to benchmark")
+    args = parser.parse_args()
+    
+    payloads = [("ingredients", build_ingredients_payload())]
+    payloads += [(f"recipes x{count}", build_recipes_payload(count)) for count in args.recipes]
+    formats = get_formats()
+    
+    for payload_name, payload in payloads:
+        check_compatibility(payload)
+        print(f"\n{payload_name}")
+        header = f"  {'format':<26} {'stored':>10} {'ratio':>7} {'encode':>11} {'decode':>11}"
+        print(header)
+        print("  " + "-" * (len(header) - 2))
+        baseline = None
+        for name, encode, decode in formats:
+            stored = encode(payload)
+            assert decode(stored) == payload
+            baseline = baseline or len(stored)
+            print(
+                f"  {name:<26} {len(stored):>7,d} B {len(stored) / baseline:>6.0%} "
+                f"{median_us(encode, payload, args.repeat):>8.1f} us {median_us(decode, stored, args.repeat):>8.1f} us"
+            )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Benchmark payloads - Realistic stored results for the storage/serialization benchmarks
+
+The shapes mirror what the functions persist: the vision analysis saved by
+AnalyzeImage and the full response built by RecipeService.build_recipes_response.
+"""
+
+import random
+
+PANTRY = [
+    "eggs", "whole milk", "cheddar cheese", "greek yogurt", "butter", "chicken breast", "ground beef",
+    "salmon fillet", "spinach", "kale", "cherry tomatoes", "red bell pepper", "zucchini", "carrots",
+    "broccoli", "mushrooms", "yellow onion", "garlic", "lemons", "limes", "fresh basil", "cilantro",
+    "parmesan", "mozzarella", "tofu", "bacon", "ham", "cucumber", "apples", "strawberries", "blueberries",
+    "orange juice", "hummus", "pesto", "dijon mustard", "mayonnaise", "ketchup", "soy sauce", "sriracha"
+]
+
+STEPS = [
+    "Preheat the oven to 200C and line a baking tray with parchment paper.",
+    "Finely chop the onion and garlic and saute them in olive oil over medium heat until softened.",
+    "Season generously with salt and freshly ground black pepper, then stir well to combine.",
+    "Add the vegetables and cook for 5-7 minutes, stirring occasionally, until just tender.",
+    "Whisk the eggs with the milk and a pinch of salt until smooth and slightly frothy.",
+    "Transfer to the oven and bake for 20 minutes, or until golden and cooked through.",
+    "Let it rest for a few minutes before slicing, then garnish with fresh herbs and serve."
+]
+
+def build_ingredients_payload(seed=0, count=30):
+    """Build a vision analysis result as saved by AnalyzeImage"""
+    rng = random.Random(seed)
+    items = rng.sample(PANTRY, min(count, len(PANTRY)))
+    categories = ["Dairy", "Meat", "Vegetables", "Fruits", "Condiments", "Other"]
+    ingredients = {category: [] for category in categories}
+    for index, item in enumerate(items):
+        ingredients[categories[index % len(categories)]].append(item)
+    return {
+        "request_id": "fridge_1700000000_deadbeef",
+        "result": {"ingredients": ingredients},
+        "summary": {
+            "total_count": len(items),
+            "categories": len(categories),
+            "by_category": {category: len(values) for category, values in ingredients.items()}
+        }
+    }
+
+def build_recipes_payload(num_recipes=5, seed=0):
+    """Build a full recipes response (items + per-recipe analysis) as saved by GenerateRecipes"""
+    rng = random.Random(seed)
+    recipes = []
+    for index in range(num_recipes):
+        total = rng.sample(PANTRY, rng.randint(6, 12))
+        available = total[:rng.randint(3, len(total))]
+        recipes.append({
+            "name": f"{rng.choice(['Roasted', 'Creamy', 'Spicy', 'Quick'])} {total[0].title()} Bake #{index + 1}",
+            "total_ingredients": total,
+            "available_ingredients": available,
+            "missing_ingredients": total[len(available):],
+            "completeness_score": round(len(available) / len(total), 2),
+            "instructions": rng.sample(STEPS, rng.randint(4, len(STEPS))),
+            "cooking_time": f"{rng.choice([15, 20, 30, 45, 60])} minutes",
+            "difficulty": rng.choice(["Easy", "Medium", "Hard"])
+        })
+    return {
+        "items": recipes,
+        "analysis": [{
+            "recipe_name": r["name"],
+            "completeness": r["completeness_score"],
+            "available_count": len(r["available_ingredients"]),
+            "missing_count": len(r["missing_ingredients"]),
+            "total_ingredients": len(r["total_ingredients"]),
+            "cooking_time": r["cooking_time"],
+            "difficulty": r["difficulty"]
+        } for r in recipes],
+        "ingredient_count": 30,
+        "dietary_restrictions": ["vegetarian"]
+    }
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Deploy-time setup - Create the blob container used by the functions
+
+The functions no longer check for the container on every cold start; uploads
+only create it if storage reports it missing. Run this once per environment
+(e.g. from the deployment pipeline) so that first uploads never pay for it.
+
+Usage:
+    python scripts/ensure_container.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_code import get_azure_blob_service
+
+async def main():
+    azure_blob_service = get_azure_blob_service()
+    try:
+        await azure_blob_service.ensure_container(force=True)
+        print(f"Container '{azure_blob_service.container_name}' is ready")
+    finally:
+        await azure_blob_service.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -1,26 +1,231 @@
 """
-Shared module initialization - Initializes services used across functions
+Shared module initialization - Lazily initializes services used across functions
+
+Each service is constructed on first use and then reused for the lifetime of
+the instance, so a function only pays for the clients it actually needs
+(GetIngredients/GetRecipes never import the OpenAI SDK, for example).
 """
 
 from .config import Config
-from .services.azure_openai_client import AzureOpenAIClientService
-from .services.azure_blob_service import AzureBlobService
-from .services.vision_service import VisionService
-from .services.recipe_service import RecipeService
-
-# Initialize shared services (done once per instance)
-config = Config()
-
-# Initialize Azure OpenAI client
-azure_openai_client = AzureOpenAIClientService(config)
-
-# Initialize Azure Blob Storage service
-storage_config = config.get_azure_storage_config()
-azure_blob_service = AzureBlobService(
-    connection_string=storage_config["connection_string"],
-    container_name=storage_config["container_name"]
-)
-
-# Initialize vision and recipe services
-vision_service = VisionService(azure_openai_client, azure_blob_service)
-recipe_service = RecipeService(azure_openai_client, azure_blob_service)
\ No newline at end of file
+
+# Services constructed so far on this instance, by name
+_services = {}
+
+def _get_or_create(name, factory):
+    """Return the named service, constructing it with factory() on first use"""
+    service = _services.get(name)
+    if service is None:
+        service = _services[name] = factory()
+    return service
+
+def get_config():
+    """Get the shared Config instance"""
+    return _get_or_create("config", Config)
+
+def get_azure_openai_client():
+    """Get the shared Azure OpenAI client service"""
+    def create():
+        from .services.azure_openai_client import AzureOpenAIClientService
+        return AzureOpenAIClientService(get_config())
+    return _get_or_create("azure_openai_client", create)
+
+def get_request_index():
+    """Get the index of known request artifacts (None if disabled)"""
+    request_index_config = get_config().get_request_index_config()
+    if not request_index_config["enabled"]:
+        return None
+    
+    def create():
+        from .services.request_index import RequestIndex
+        return RequestIndex(
+            max_requests=request_index_config["max_requests"],
+            negative_ttl_seconds=request_index_config["negative_ttl_seconds"],
+            positive_ttl_seconds=request_index_config["positive_ttl_seconds"]
+        )
+    return _get_or_create("request_index", create)
+
+def get_azure_blob_service():
+    """Get the shared Azure Blob Storage service"""
+    def create():
+        from .services.azure_blob_service import AzureBlobService
+        config = get_config()
+        storage_config = config.get_azure_storage_config()
+        storage_json_config = config.get_storage_json_config()
+        return AzureBlobService(
+            connection_string=storage_config["connection_string"],
+            container_name=storage_config["container_name"],
+            request_index=get_request_index(),
+            json_indent=storage_json_config["indent"],
+            json_compression=storage_json_config["compression"],
+            transport_config=config.get_storage_transport_config()
+        )
+    return _get_or_create("azure_blob_service", create)
+
+def get_vision_cache():
+    """Get the content-addressed vision result cache (None if disabled)"""
+    vision_cache_config = get_config().get_vision_cache_config()
+    if not vision_cache_config["enabled"]:
+        return None
+    
+    def create():
+        from .services.result_cache import ResultCache
+        return ResultCache(
+            "vision",
+            azure_blob_service=get_azure_blob_service(),
+            max_entries=vision_cache_config["max_entries"],
+            ttl_seconds=vision_cache_config["ttl_seconds"]
+        )
+    return _get_or_create("vision_cache", create)
+
+def get_recipe_cache():
+    """Get the semantic recipe cache (None if disabled)"""
+    recipe_cache_config = get_config().get_recipe_cache_config()
+    if not recipe_cache_config["enabled"]:
+        return None
+    
+    def create():
+        from .services.recipe_cache import RecipeCache
+        return RecipeCache(
+            azure_blob_service=get_azure_blob_service(),
+            max_entries=recipe_cache_config["max_entries"],
+            ttl_seconds=recipe_cache_config["ttl_seconds"],
+            similarity_threshold=recipe_cache_config["similarity_threshold"]
+        )
+    return _get_or_create("recipe_cache", create)
+
+def get_vision_service():
+    """Get the shared vision service"""
+    def create():
+        from .services.vision_service import VisionService
+        config = get_config()
+        return VisionService(
+            get_azure_openai_client(),
+            get_azure_blob_service(),
+            result_cache=get_vision_cache(),
+            use_perceptual_hash=config.get_vision_cache_config()["perceptual_hash"],
+            image_preprocessing=config.get_image_preprocessing_config(),
+            detail_policy=config.get_vision_detail_config(),
+            model_name=config.get_task_models_config()["vision"],
+            structured_outputs=config.get_structured_outputs_config()["enabled"]
+        )
+    return _get_or_create("vision_service", create)
+
+def get_recipe_service():
+    """Get the shared recipe service"""
+    def create():
+        from .services.recipe_service import RecipeService
+        config = get_config()
+        task_models = config.get_task_models_config()
+        return RecipeService(
+            get_azure_openai_client(),
+            get_azure_blob_service(),
+            recipe_cache=get_recipe_cache(),
+            model_name=task_models["recipes"],
+            fast_model_name=task_models["recipes_fast"],
+            structured_outputs=config.get_structured_outputs_config()["enabled"],
+            fanout=config.get_recipe_fanout_config()
+        )
+    return _get_or_create("recipe_service", create)
+
+def get_job_queue():
+    """Get the job queue used in job mode (in-memory or Azure Storage queue)"""
+    def create():
+        from .services.job_queue import AzureJobQueue, InMemoryJobQueue
+        config = get_config()
+        job_config = config.get_job_config()
+        if job_config["backend"] == "azure":
+            return AzureJobQueue(
+                config.get_azure_storage_config()["connection_string"],
+                job_config["queue_name"]
+            )
+        # Jobs are processed on this instance; the processor is only constructed once a job runs
+        return InMemoryJobQueue(
+            lambda job, final_attempt: get_job_processor().process(job, final_attempt=final_attempt),
+            max_concurrency=job_config["max_concurrency"],
+            max_attempts=job_config["max_attempts"],
+            on_failure=lambda job, error: get_job_processor().record_failure(job, error)
+        )
+    return _get_or_create("job_queue", create)
+
+def get_job_service():
+    """Get the shared job service (job submission and status)"""
+    def create():
+        from .services.job_service import JobService
+        return JobService(get_azure_blob_service(), get_job_queue())
+    return _get_or_create("job_service", create)
+
+def get_recipe_speculator():
+    """Get the speculative recipe generator (None if disabled)"""
+    speculation_config = get_config().get_speculation_config()
+    if not speculation_config["enabled"]:
+        return None
+    
+    def create():
+        from .services.recipe_speculation import RecipeSpeculator
+        return RecipeSpeculator(
+            get_job_service(),
+            get_azure_blob_service(),
+            num_recipes=speculation_config["num_recipes"],
+            wait_seconds=speculation_config["wait_seconds"],
+            ttl_seconds=speculation_config["ttl_seconds"]
+        )
+    return _get_or_create("recipe_speculator", create)
+
+def get_recipe_lease_flight():
+    """Get the cross-instance coalescing of recipe requests (None if disabled)"""
+    lease_config = get_config().get_recipe_lease_config()
+    if not lease_config["enabled"]:
+        return None
+    
+    def create():
+        from .services.single_flight import LeasedSingleFlight
+        return LeasedSingleFlight(
+            get_azure_blob_service(),
+            lease_seconds=lease_config["lease_seconds"],
+            wait_seconds=lease_config["wait_seconds"]
+        )
+    return _get_or_create("recipe_lease_flight", create)
+
+def get_job_processor():
+    """Get the shared job processor"""
+    def create():
+        from .services.job_processor import JobProcessor
+        return JobProcessor(
+            get_config(),
+            get_job_service(),
+            get_vision_service(),
+            get_recipe_service(),
+            recipe_speculator=get_recipe_speculator()
+        )
+    return _get_or_create("job_processor", create)
+
+def get_initialized_services():
+    """
+    Get the services that have been constructed on this instance so far
+    
+    Returns:
+        Dictionary of service name to instance (without constructing anything)
+    """
+    return dict(_services)
+
+_ACCESSORS = {
+    "config": get_config,
+    "azure_openai_client": get_azure_openai_client,
+    "request_index": get_request_index,
+    "azure_blob_service": get_azure_blob_service,
+    "vision_cache": get_vision_cache,
+    "recipe_cache": get_recipe_cache,
+    "vision_service": get_vision_service,
+    "recipe_service": get_recipe_service,
+    "job_queue": get_job_queue,
+    "job_service": get_job_service,
+    "recipe_speculator": get_recipe_speculator,
+    "recipe_lease_flight": get_recipe_lease_flight,
+    "job_processor": get_job_processor
+}
+
+def __getattr__(name):
+    """Keep `from shared_code import vision_service` working (constructs the service on access)"""
+    if name in _ACCESSORS:
+        return _ACCESSORS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
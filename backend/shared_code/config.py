@@ -2,9 +2,73 @@
 Configuration module - Handles environment variables and configuration for Azure Functions
 """
 
+import json
+import logging
 import os
 import time
 
+# First Azure OpenAI API version accepting response_format json_schema (structured outputs)
+STRUCTURED_OUTPUTS_MIN_API_VERSION = "2024-08-01"
+
+# Whether the fallback from structured outputs has been logged (it is only logged once per instance)
+_structured_outputs_warned = False
+
+def _get_bool_env(name, default=False):
+    """Read a boolean flag from the environment (accepts 1/true/yes/on)"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _get_float_env(name, default):
+    """Read a float setting from the environment, falling back to the default"""
+    value = os.environ.get(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+def _get_int_env(name, default):
+    """Read an integer setting from the environment, falling back to the default"""
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+def _get_queue_max_dequeue_count(default=5):
+    """
+    Read how often the Functions host delivers a queue message before moving it to the poison queue
+    
+    The app setting overriding host.json takes precedence over host.json
+    itself; the host's own default applies if neither sets it.
+    """
+    value = os.environ.get("AzureFunctionsJobHost__extensions__queues__maxDequeueCount")
+    if value not in (None, ""):
+        try:
+            return int(value)
+        except ValueError:
+            return default
+    
+    host_json = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "host.json")
+    try:
+        with open(host_json) as f:
+            return int(json.load(f)["extensions"]["queues"]["maxDequeueCount"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return default
+
+def supports_structured_outputs(api_version):
+    """
+    Check whether an Azure OpenAI API version accepts json_schema response formats
+
+    Args:
+        api_version: API version such as "2024-10-21" or "2024-08-01-preview" (None if unknown)
+
+    Returns:
+        True if the version is 2024-08-01(-preview) or later
+    """
+    return bool(api_version) and api_version[:10] >= STRUCTURED_OUTPUTS_MIN_API_VERSION
+
 class Config:
     """Configuration class that loads and provides access to environment variables"""
     
@@ -18,10 +82,121 @@ class Config:
         self.api_version = os.environ.get("API_VERSION")
         self.model_name = os.environ.get("MODEL_NAME")
         
+        # Optional pool of deployments (JSON list) and how calls are routed across them
+        self.azure_openai_deployments = os.environ.get("AZURE_OPENAI_DEPLOYMENTS")
+        self.azure_openai_routing = os.environ.get("AZURE_OPENAI_ROUTING", "least_outstanding").lower()
+        
+        # Per-task model deployments (unset = the deployment's MODEL_NAME / model_name)
+        self.vision_model_name = os.environ.get("VISION_MODEL_NAME") or None
+        self.recipe_model_name = os.environ.get("RECIPE_MODEL_NAME") or None
+        self.recipe_fast_model_name = os.environ.get("RECIPE_FAST_MODEL_NAME") or None
+        
+        # Fan-out recipe generation: several concurrent small calls instead of one large one
+        self.recipe_fanout_enabled = _get_bool_env("RECIPE_FANOUT_ENABLED", False)
+        self.recipe_fanout_recipes_per_call = max(1, _get_int_env("RECIPE_FANOUT_RECIPES_PER_CALL", 1))
+        
+        # Strict structured outputs (JSON Schema response format, API version 2024-08-01-preview or later)
+        self.structured_outputs_enabled = _get_bool_env("STRUCTURED_OUTPUTS_ENABLED", True)
+        
         # Azure Blob Storage settings
         self.azure_storage_connection_string = os.environ.get("AZURE_STORAGE_CONNECTION_STRING")
         self.azure_storage_container = os.environ.get("AZURE_STORAGE_CONTAINER")
     
+        # HTTP transport settings of the Azure OpenAI client (one shared httpx connection pool)
+        self.openai_max_connections = _get_int_env("OPENAI_MAX_CONNECTIONS", 100)
+        self.openai_max_keepalive_connections = _get_int_env("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)
+        self.openai_keepalive_expiry = _get_float_env("OPENAI_KEEPALIVE_EXPIRY_SECONDS", 60.0)
+        self.openai_http2 = _get_bool_env("OPENAI_HTTP2", False)
+        self.openai_connect_timeout = _get_float_env("OPENAI_CONNECT_TIMEOUT_SECONDS", 5.0)
+        self.openai_timeout = _get_float_env("OPENAI_TIMEOUT_SECONDS", 120.0)
+        
+        # Rate limits of the Azure OpenAI deployment (0 = not enforced locally)
+        self.openai_requests_per_minute = _get_int_env("AZURE_OPENAI_REQUESTS_PER_MINUTE", 0)
+        self.openai_tokens_per_minute = _get_int_env("AZURE_OPENAI_TOKENS_PER_MINUTE", 0)
+        self.openai_rate_limit_max_wait = _get_float_env("AZURE_OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS", 10.0)
+        
+        # Retries, hedging and circuit breaker around Azure OpenAI calls
+        self.openai_max_retries = _get_int_env("AZURE_OPENAI_MAX_RETRIES", 3)
+        self.openai_retry_base_delay = _get_float_env("AZURE_OPENAI_RETRY_BASE_DELAY_SECONDS", 0.5)
+        self.openai_retry_max_delay = _get_float_env("AZURE_OPENAI_RETRY_MAX_DELAY_SECONDS", 8.0)
+        self.openai_hedging_enabled = _get_bool_env("AZURE_OPENAI_HEDGING_ENABLED", False)
+        self.openai_hedging_min_samples = _get_int_env("AZURE_OPENAI_HEDGING_MIN_SAMPLES", 20)
+        self.openai_breaker_failure_threshold = _get_int_env("AZURE_OPENAI_BREAKER_FAILURE_THRESHOLD", 5)
+        self.openai_breaker_recovery_seconds = _get_float_env("AZURE_OPENAI_BREAKER_RECOVERY_SECONDS", 30.0)
+        
+        # HTTP transport settings of the Blob Storage client (aiohttp connection pool)
+        self.storage_max_connections = _get_int_env("STORAGE_MAX_CONNECTIONS", 100)
+        self.storage_keepalive_expiry = _get_float_env("STORAGE_KEEPALIVE_EXPIRY_SECONDS", 60.0)
+        self.storage_connect_timeout = _get_float_env("STORAGE_CONNECT_TIMEOUT_SECONDS", 5.0)
+        self.storage_timeout = _get_float_env("STORAGE_TIMEOUT_SECONDS", 30.0)
+    
+        # Vision result cache settings
+        self.vision_cache_enabled = _get_bool_env("VISION_CACHE_ENABLED", True)
+        self.vision_cache_max_entries = _get_int_env("VISION_CACHE_MAX_ENTRIES", 256)
+        self.vision_cache_ttl_seconds = _get_int_env("VISION_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+        self.vision_cache_perceptual_hash = _get_bool_env("VISION_CACHE_PERCEPTUAL_HASH", False)
+    
+        # Image preprocessing settings (applied before images are sent to the vision model)
+        self.image_preprocessing_enabled = _get_bool_env("IMAGE_PREPROCESSING_ENABLED", True)
+        self.image_max_edge = _get_int_env("IMAGE_MAX_EDGE", 2048)
+        self.image_quality = _get_int_env("IMAGE_QUALITY", 85)
+        self.image_format = os.environ.get("IMAGE_FORMAT", "JPEG")
+        
+        # Vision detail policy: "adaptive" picks low detail for small images and high otherwise
+        self.vision_detail = os.environ.get("VISION_DETAIL", "adaptive").lower()
+        self.vision_low_detail_max_edge = _get_int_env("VISION_LOW_DETAIL_MAX_EDGE", 512)
+        self.vision_tiling_enabled = _get_bool_env("VISION_TILING_ENABLED", False)
+        self.vision_tiling_min_edge = _get_int_env("VISION_TILING_MIN_EDGE", 3000)
+        self.vision_tile_rows = _get_int_env("VISION_TILE_ROWS", 3)
+        self.vision_tile_overlap = _get_float_env("VISION_TILE_OVERLAP", 0.1)
+        self.vision_tiling_max_tokens = _get_int_env("VISION_TILING_MAX_TOKENS", 6000)
+        
+        # Batch analysis (several photos of one kitchen in a single request)
+        self.vision_batch_max_images = _get_int_env("VISION_BATCH_MAX_IMAGES", 10)
+        self.vision_batch_max_concurrency = _get_int_env("VISION_BATCH_MAX_CONCURRENCY", 4)
+        
+        # Recipe cache settings
+        self.recipe_cache_enabled = _get_bool_env("RECIPE_CACHE_ENABLED", True)
+        self.recipe_cache_max_entries = _get_int_env("RECIPE_CACHE_MAX_ENTRIES", 256)
+        self.recipe_cache_ttl_seconds = _get_int_env("RECIPE_CACHE_TTL_SECONDS", 24 * 3600)
+        self.recipe_cache_similarity_threshold = _get_float_env("RECIPE_CACHE_SIMILARITY_THRESHOLD", 0.9)
+    
+        # Request index settings (which artifacts exist for each request_id)
+        self.request_index_enabled = _get_bool_env("REQUEST_INDEX_ENABLED", True)
+        self.request_index_max_requests = _get_int_env("REQUEST_INDEX_MAX_REQUESTS", 1024)
+        self.request_index_negative_ttl_seconds = _get_int_env("REQUEST_INDEX_NEGATIVE_TTL_SECONDS", 5)
+        self.request_index_positive_ttl_seconds = _get_int_env("REQUEST_INDEX_POSITIVE_TTL_SECONDS", 300)
+    
+        # Storage format of persisted JSON (analysis, recipes, cache entries)
+        self.storage_json_indent = _get_bool_env("STORAGE_JSON_INDENT", False)
+        self.storage_json_compression = os.environ.get("STORAGE_JSON_COMPRESSION", "none").lower()
+        
+        # HTTP caching of stored results (ingredients never change once written, recipes can be regenerated)
+        self.http_cache_ingredients_max_age = _get_int_env("HTTP_CACHE_INGREDIENTS_MAX_AGE_SECONDS", 24 * 3600)
+        self.http_cache_recipes_max_age = _get_int_env("HTTP_CACHE_RECIPES_MAX_AGE_SECONDS", 0)
+        self.http_cache_public = _get_bool_env("HTTP_CACHE_PUBLIC", False)
+        
+        # Job mode: analysis and recipe requests are queued and processed by a worker
+        self.job_mode = os.environ.get("JOB_MODE", "optional").lower()
+        self.job_queue_backend = os.environ.get("JOB_QUEUE_BACKEND", "memory").lower()
+        self.job_queue_name = os.environ.get("JOB_QUEUE_NAME", "kitchen-copilot-jobs")
+        self.job_max_concurrency = _get_int_env("JOB_MAX_CONCURRENCY", 4)
+        # The azure backend retries through the queue, so its attempts are the host's maxDequeueCount
+        self.job_queue_max_dequeue_count = _get_queue_max_dequeue_count()
+        self.job_max_attempts = _get_int_env("JOB_MAX_ATTEMPTS", self.job_queue_max_dequeue_count)
+        self.job_long_poll_max_seconds = _get_float_env("JOB_LONG_POLL_MAX_SECONDS", 25.0)
+        
+        # Speculative recipe generation right after an image analysis (with the default parameters)
+        self.speculative_recipes_enabled = _get_bool_env("SPECULATIVE_RECIPES_ENABLED", False)
+        self.speculative_recipes_count = _get_int_env("SPECULATIVE_RECIPES_COUNT", 5)
+        self.speculative_recipes_wait_seconds = _get_float_env("SPECULATIVE_RECIPES_WAIT_SECONDS", 15.0)
+        self.speculative_recipes_ttl_seconds = _get_float_env("SPECULATIVE_RECIPES_TTL_SECONDS", 600.0)
+        
+        # Cross-instance coalescing of identical recipe requests with blob leases
+        self.recipe_leases_enabled = _get_bool_env("RECIPE_LEASES_ENABLED", False)
+        self.recipe_lease_seconds = _get_int_env("RECIPE_LEASE_SECONDS", 60)
+        self.recipe_lease_wait_seconds = _get_float_env("RECIPE_LEASE_WAIT_SECONDS", 120.0)
+    
     def get_azure_config(self):
         """Get Azure OpenAI configuration as a dictionary"""
         return {
@@ -31,6 +206,95 @@ class Config:
             "model_name": self.model_name
         }
     
+    def get_deployments_config(self):
+        """
+        Get the Azure OpenAI deployments model calls are routed across
+        
+        AZURE_OPENAI_DEPLOYMENTS holds a JSON list of deployments; settings a
+        deployment leaves out are taken from the single-deployment settings
+        (AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, API_VERSION, MODEL_NAME
+        and the AZURE_OPENAI_*_PER_MINUTE rate limits). Without it, the
+        single deployment is the only one.
+        
+        Returns:
+            List of deployment dictionaries (name, endpoint, api_key, api_version,
+            model_name, weight, requests_per_minute, tokens_per_minute)
+        
+        Raises:
+            ValueError: If AZURE_OPENAI_DEPLOYMENTS is not a JSON list of objects
+        """
+        defaults = dict(self.get_azure_config(), weight=1.0,
+                        requests_per_minute=self.openai_requests_per_minute,
+                        tokens_per_minute=self.openai_tokens_per_minute)
+        if not self.azure_openai_deployments:
+            return [dict(defaults, name="default")]
+        
+        try:
+            deployments = json.loads(self.azure_openai_deployments)
+        except ValueError as e:
+            raise ValueError(f"AZURE_OPENAI_DEPLOYMENTS is not valid JSON: {str(e)}")
+        if not isinstance(deployments, list) or not all(isinstance(d, dict) for d in deployments):
+            raise ValueError("AZURE_OPENAI_DEPLOYMENTS must be a JSON list of deployment objects")
+        
+        return [{**defaults, "name": f"deployment-{index}", **deployment} for index, deployment in enumerate(deployments)]
+    
+    def get_routing_config(self):
+        """Get how model calls are routed across the Azure OpenAI deployments"""
+        return {
+            "routing": self.azure_openai_routing
+        }
+    
+    def get_task_models_config(self):
+        """
+        Get the model deployment used for each task
+        
+        None means the model_name of whichever deployment the call is routed to.
+        A "recipes_fast" model enables tiered recipe generation: the fast model
+        is tried first and the "recipes" model is only used if its output is invalid.
+        
+        Returns:
+            Dictionary with "vision", "recipes" and "recipes_fast" model names
+        """
+        return {
+            "vision": self.vision_model_name,
+            "recipes": self.recipe_model_name,
+            "recipes_fast": self.recipe_fast_model_name
+        }
+    
+    def get_recipe_fanout_config(self):
+        """Get the fan-out recipe generation configuration as a dictionary"""
+        return {
+            "enabled": self.recipe_fanout_enabled,
+            "recipes_per_call": self.recipe_fanout_recipes_per_call
+        }
+    
+    def get_structured_outputs_config(self):
+        """
+        Get the structured outputs configuration as a dictionary
+
+        Structured outputs are only enabled if every deployment's API version
+        accepts json_schema; otherwise the models are asked for a JSON object.
+        """
+        global _structured_outputs_warned
+
+        enabled = self.structured_outputs_enabled
+        if enabled:
+            outdated = sorted({
+                str(deployment["api_version"]) for deployment in self.get_deployments_config()
+                if not supports_structured_outputs(deployment["api_version"])
+            })
+            if outdated:
+                if not _structured_outputs_warned:
+                    _structured_outputs_warned = True
+                    logging.warning(
+                        f"Structured outputs need API_VERSION {STRUCTURED_OUTPUTS_MIN_API_VERSION} or later "
+                        f"(configured: {', '.join(outdated)}), requesting JSON objects instead"
+                    )
+                enabled = False
+        return {
+            "enabled": enabled
+        }
+    
     def get_azure_storage_config(self):
         """Get Azure Blob Storage configuration as a dictionary"""
         return {
@@ -38,6 +302,145 @@ class Config:
             "container_name": self.azure_storage_container
         }
     
+    def get_openai_transport_config(self):
+        """Get the Azure OpenAI HTTP connection pool and timeout settings as a dictionary"""
+        return {
+            "max_connections": self.openai_max_connections,
+            "max_keepalive_connections": self.openai_max_keepalive_connections,
+            "keepalive_expiry": self.openai_keepalive_expiry,
+            "http2": self.openai_http2,
+            "connect_timeout": self.openai_connect_timeout,
+            "timeout": self.openai_timeout
+        }
+    
+    def get_rate_limit_config(self):
+        """Get the Azure OpenAI rate limiter configuration as a dictionary"""
+        return {
+            "requests_per_minute": self.openai_requests_per_minute,
+            "tokens_per_minute": self.openai_tokens_per_minute,
+            "max_wait_seconds": self.openai_rate_limit_max_wait
+        }
+    
+    def get_resilience_config(self):
+        """Get the Azure OpenAI retry, hedging and circuit breaker configuration as a dictionary"""
+        return {
+            "max_retries": self.openai_max_retries,
+            "base_delay": self.openai_retry_base_delay,
+            "max_delay": self.openai_retry_max_delay,
+            "hedging_enabled": self.openai_hedging_enabled,
+            "hedging_min_samples": self.openai_hedging_min_samples,
+            "failure_threshold": self.openai_breaker_failure_threshold,
+            "recovery_seconds": self.openai_breaker_recovery_seconds
+        }
+    
+    def get_storage_transport_config(self):
+        """Get the Blob Storage HTTP connection pool and timeout settings as a dictionary"""
+        return {
+            "max_connections": self.storage_max_connections,
+            "keepalive_expiry": self.storage_keepalive_expiry,
+            "connect_timeout": self.storage_connect_timeout,
+            "timeout": self.storage_timeout
+        }
+    
+    def get_storage_json_config(self):
+        """Get the storage format of persisted JSON as a dictionary"""
+        return {
+            "indent": self.storage_json_indent,
+            "compression": self.storage_json_compression
+        }
+    
+    def get_vision_cache_config(self):
+        """Get vision result cache configuration as a dictionary"""
+        return {
+            "enabled": self.vision_cache_enabled,
+            "max_entries": self.vision_cache_max_entries,
+            "ttl_seconds": self.vision_cache_ttl_seconds,
+            "perceptual_hash": self.vision_cache_perceptual_hash
+        }
+    
+    def get_image_preprocessing_config(self):
+        """Get image preprocessing configuration as a dictionary"""
+        return {
+            "enabled": self.image_preprocessing_enabled,
+            "max_edge": self.image_max_edge,
+            "quality": self.image_quality,
+            "output_format": self.image_format
+        }
+    
+    def get_vision_detail_config(self):
+        """Get vision detail level and tiling configuration as a dictionary"""
+        return {
+            "detail": self.vision_detail,
+            "low_detail_max_edge": self.vision_low_detail_max_edge,
+            "tiling_enabled": self.vision_tiling_enabled,
+            "tiling_min_edge": self.vision_tiling_min_edge,
+            "tile_rows": self.vision_tile_rows,
+            "tile_overlap": self.vision_tile_overlap,
+            "tiling_max_tokens": self.vision_tiling_max_tokens
+        }
+    
+    def get_vision_batch_config(self):
+        """Get batch image analysis configuration as a dictionary"""
+        return {
+            "max_images": self.vision_batch_max_images,
+            "max_concurrency": self.vision_batch_max_concurrency
+        }
+    
+    def get_recipe_cache_config(self):
+        """Get recipe cache configuration as a dictionary"""
+        return {
+            "enabled": self.recipe_cache_enabled,
+            "max_entries": self.recipe_cache_max_entries,
+            "ttl_seconds": self.recipe_cache_ttl_seconds,
+            "similarity_threshold": self.recipe_cache_similarity_threshold
+        }
+    
+    def get_request_index_config(self):
+        """Get request index configuration as a dictionary"""
+        return {
+            "enabled": self.request_index_enabled,
+            "max_requests": self.request_index_max_requests,
+            "negative_ttl_seconds": self.request_index_negative_ttl_seconds,
+            "positive_ttl_seconds": self.request_index_positive_ttl_seconds
+        }
+    
+    def get_http_cache_config(self):
+        """Get HTTP caching configuration (Cache-Control max-age per result type and scope) as a dictionary"""
+        return {
+            "ingredients_max_age": self.http_cache_ingredients_max_age,
+            "recipes_max_age": self.http_cache_recipes_max_age,
+            "public": self.http_cache_public
+        }
+    
+    def get_job_config(self):
+        """Get job mode and job queue configuration as a dictionary"""
+        return {
+            "mode": self.job_mode,
+            "backend": self.job_queue_backend,
+            "queue_name": self.job_queue_name,
+            "max_concurrency": self.job_max_concurrency,
+            "max_attempts": self.job_max_attempts,
+            "max_dequeue_count": self.job_queue_max_dequeue_count,
+            "long_poll_max_seconds": self.job_long_poll_max_seconds
+        }
+    
+    def get_speculation_config(self):
+        """Get speculative recipe generation configuration as a dictionary"""
+        return {
+            "enabled": self.speculative_recipes_enabled,
+            "num_recipes": self.speculative_recipes_count,
+            "wait_seconds": self.speculative_recipes_wait_seconds,
+            "ttl_seconds": self.speculative_recipes_ttl_seconds
+        }
+    
+    def get_recipe_lease_config(self):
+        """Get blob lease coalescing configuration for recipe requests as a dictionary"""
+        return {
+            "enabled": self.recipe_leases_enabled,
+            "lease_seconds": self.recipe_lease_seconds,
+            "wait_seconds": self.recipe_lease_wait_seconds
+        }
+    
     def get_file_paths(self, image_filename=None, request_id=None):
         """
         Get file paths for input and output files in Azure Blob Storage
@@ -66,12 +469,26 @@ class Config:
             ingredients_name = f"ingredients_{timestamp}_{unique_id}.json"
             recipes_name = f"recipes_{timestamp}_{unique_id}.json"
             dietary_name = f"dietary_{timestamp}_{unique_id}.json"
+            analysis_status_name = f"analysis_status_{timestamp}_{unique_id}.json"
+            recipes_status_name = f"recipes_status_{timestamp}_{unique_id}.json"
+            speculation_status_name = f"speculation_status_{timestamp}_{unique_id}.json"
+            speculative_recipes_name = f"speculative_recipes_{timestamp}_{unique_id}.json"
+            speculation_claim_name = f"speculation_claim_{timestamp}_{unique_id}.json"
+            speculation_settled_name = f"speculation_settled_{timestamp}_{unique_id}.json"
+            recipes_lock_name = f"recipes_lock_{timestamp}_{unique_id}.json"
             
             paths = {
                 "request_dir": folder_name,
                 "vision_output": f"{folder_name}/{ingredients_name}",
                 "recipes_output": f"{folder_name}/{recipes_name}",
                 "dietary_output": f"{folder_name}/{dietary_name}",
+                "analysis_status": f"{folder_name}/{analysis_status_name}",
+                "recipes_status": f"{folder_name}/{recipes_status_name}",
+                "speculation_status": f"{folder_name}/{speculation_status_name}",
+                "speculative_recipes": f"{folder_name}/{speculative_recipes_name}",
+                "speculation_claim": f"{folder_name}/{speculation_claim_name}",
+                "speculation_settled": f"{folder_name}/{speculation_settled_name}",
+                "recipes_lock": f"{folder_name}/{recipes_lock_name}",
                 "request_image": f"{folder_name}/{image_name}",
                 "request_id": folder_name
             }
@@ -84,6 +501,13 @@ class Config:
                 "vision_output": f"{request_id}/ingredients_{id_part}.json",
                 "recipes_output": f"{request_id}/recipes_{id_part}.json",
                 "dietary_output": f"{request_id}/dietary_{id_part}.json",
+                "analysis_status": f"{request_id}/analysis_status_{id_part}.json",
+                "recipes_status": f"{request_id}/recipes_status_{id_part}.json",
+                "speculation_status": f"{request_id}/speculation_status_{id_part}.json",
+                "speculative_recipes": f"{request_id}/speculative_recipes_{id_part}.json",
+                "speculation_claim": f"{request_id}/speculation_claim_{id_part}.json",
+                "speculation_settled": f"{request_id}/speculation_settled_{id_part}.json",
+                "recipes_lock": f"{request_id}/recipes_lock_{id_part}.json",
                 "request_image": f"{request_id}/image_{id_part}.jpg",  # Default to .jpg
                 "request_id": request_id
             }
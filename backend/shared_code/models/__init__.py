@@ -3,7 +3,8 @@ Models package initialization
 This makes the models importable directly from the models package
 """
 
-from .ingredients import IngredientsResult
-from .recipes import Recipe, RecipeCollection
+from .ingredients import INGREDIENT_CATEGORIES, IngredientsResult
+from .recipes import DIFFICULTY_LEVELS, Recipe, RecipeCollection
+from .usage import TokenUsage
 
-__all__ = ['IngredientsResult', 'Recipe', 'RecipeCollection']
\ No newline at end of file
+__all__ = ['DIFFICULTY_LEVELS', 'INGREDIENT_CATEGORIES', 'IngredientsResult', 'Recipe', 'RecipeCollection', 'TokenUsage']
\ No newline at end of file
@@ -2,13 +2,58 @@
 Ingredients Models - Data models for ingredients
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List
+from ..utils.schema_utils import build_json_schema
+
+# The categories the vision prompt allows, in prompt order ("Other" takes everything else)
+INGREDIENT_CATEGORIES = (
+    "Dairy", "Produce", "Proteins", "Grains", "Condiments",
+    "Beverages", "Snacks", "Frozen", "Canned", "Other"
+)
 
 @dataclass
 class IngredientsResult:
     """Data class representing ingredients analysis result"""
-    ingredients: Dict[str, List[str]]
+    ingredients: Dict[str, List[str]] = field(metadata={"keys": INGREDIENT_CATEGORIES})
+    
+    @classmethod
+    def json_schema(cls):
+        """
+        Get the JSON Schema of an ingredients result (the vision model's response format)
+        
+        Returns:
+            JSON Schema dictionary
+        """
+        return build_json_schema(cls)
+    
+    @classmethod
+    def normalize(cls, data):
+        """
+        Repair the small deviations models make in ingredients data
+        
+        Category names are matched case-insensitively, items of categories
+        beyond the allowed ones are moved to "Other", missing categories are
+        added empty and items are reduced to non-empty strings.
+        
+        Args:
+            data: Ingredients dictionary as returned by the model
+        
+        Returns:
+            Repaired ingredients dictionary (data itself if it cannot be repaired)
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("ingredients"), dict):
+            return data
+        
+        categories = {category.lower(): category for category in INGREDIENT_CATEGORIES}
+        ingredients = {category: [] for category in INGREDIENT_CATEGORIES}
+        for name, items in data["ingredients"].items():
+            category = categories.get(str(name).strip().lower(), "Other")
+            if isinstance(items, str):
+                items = [items]
+            if isinstance(items, list):
+                ingredients[category].extend(str(item).strip() for item in items if str(item).strip())
+        return {"ingredients": ingredients}
     
     @classmethod
     def from_dict(cls, data):
@@ -25,6 +70,35 @@ class IngredientsResult:
             raise ValueError("Invalid ingredients data: 'ingredients' key not found")
         return cls(ingredients=data["ingredients"])
     
+    @classmethod
+    def merge(cls, results):
+        """
+        Merge several ingredients results (e.g. from image tiles) into one
+        
+        Categories are combined in order of first appearance. Ingredients are
+        de-duplicated on their normalized name (case and whitespace ignored)
+        across all categories, so an item that different images or tiles put
+        in different categories is listed once, in the first category and
+        with the first spelling seen.
+        
+        Args:
+            results: Iterable of IngredientsResult instances
+            
+        Returns:
+            IngredientsResult instance with the combined ingredients
+        """
+        merged = {}
+        seen = set()
+        for result in results:
+            for category, items in result.ingredients.items():
+                category_items = merged.setdefault(category, [])
+                for item in items:
+                    key = " ".join(str(item).lower().split())
+                    if key and key not in seen:
+                        seen.add(key)
+                        category_items.append(item)
+        return cls(ingredients=merged)
+    
     def to_dict(self):
         """
         Convert to dictionary representation
@@ -2,8 +2,15 @@
 Recipe Models - Data models for recipes
 """
 
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 from typing import List
+from ..utils.schema_utils import build_json_schema
+
+# Difficulty levels the recipe prompt asks for
+DIFFICULTY_LEVELS = ("Easy", "Medium", "Hard")
+
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
 
 @dataclass
 class Recipe:
@@ -12,10 +19,58 @@ class Recipe:
     total_ingredients: List[str]
     available_ingredients: List[str]
     missing_ingredients: List[str]
-    completeness_score: float
+    completeness_score: float = field(metadata={"minimum": 0, "maximum": 100})
     instructions: List[str]
     cooking_time: str
-    difficulty: str
+    difficulty: str = field(metadata={"enum": DIFFICULTY_LEVELS})
+    
+    @classmethod
+    def json_schema(cls):
+        """
+        Get the JSON Schema of a recipe
+        
+        Returns:
+            JSON Schema dictionary
+        """
+        return build_json_schema(cls)
+    
+    @classmethod
+    def normalize(cls, data):
+        """
+        Repair the small deviations models make in recipe data
+        
+        Unknown properties are dropped, a completeness score given as text
+        ("85%") is parsed and clamped to 0-100, a difficulty is matched to the
+        allowed levels case-insensitively and single strings are wrapped in
+        lists. Anything that cannot be repaired is left for validation to report.
+        
+        Args:
+            data: Recipe dictionary as returned by the model
+        
+        Returns:
+            Repaired recipe dictionary (data itself if it is not a dictionary)
+        """
+        if not isinstance(data, dict):
+            return data
+        
+        recipe = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        for name in ("total_ingredients", "available_ingredients", "missing_ingredients", "instructions"):
+            if isinstance(recipe.get(name), str):
+                recipe[name] = [recipe[name]]
+        
+        score = recipe.get("completeness_score")
+        if isinstance(score, str):
+            match = _NUMBER_PATTERN.search(score)
+            score = float(match.group()) if match else score
+        if isinstance(score, (int, float)) and not isinstance(score, bool):
+            recipe["completeness_score"] = min(max(score, 0), 100)
+        
+        difficulty = recipe.get("difficulty")
+        if isinstance(difficulty, str):
+            for level in DIFFICULTY_LEVELS:
+                if difficulty.strip().lower() == level.lower():
+                    recipe["difficulty"] = level
+        return recipe
     
     @classmethod
     def from_dict(cls, data):
@@ -62,6 +117,16 @@ class RecipeCollection:
     """Data class representing a collection of recipes"""
     recipes: List[Recipe]
     
+    @classmethod
+    def json_schema(cls):
+        """
+        Get the JSON Schema of a recipe collection (the recipe model's response format)
+        
+        Returns:
+            JSON Schema dictionary
+        """
+        return build_json_schema(cls)
+    
     @classmethod
     def from_dict(cls, data):
         """
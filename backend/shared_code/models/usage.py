@@ -0,0 +1,53 @@
+"""
+Usage Models - Data models for model token accounting
+"""
+
+from dataclasses import dataclass
+
+@dataclass
+class TokenUsage:
+    """Data class accumulating token usage across one or more model calls"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    calls: int = 0
+    
+    def add(self, usage):
+        """
+        Add the usage reported by a chat completion response
+        
+        Args:
+            usage: The response's usage object (or None if it was not reported)
+        """
+        self.calls += 1
+        if usage is None:
+            return
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        self.total_tokens += getattr(usage, "total_tokens", 0) or 0
+    
+    def merge(self, other):
+        """
+        Add the totals of another TokenUsage
+        
+        Args:
+            other: TokenUsage instance to add
+        """
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+        self.calls += other.calls
+    
+    def to_dict(self):
+        """
+        Convert to dictionary representation
+        
+        Returns:
+            Dictionary with token counts
+        """
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "calls": self.calls
+        }
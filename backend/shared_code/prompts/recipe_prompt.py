@@ -33,4 +33,23 @@ Return your suggestions as a JSON object with the following structure:
     ...
   ]
 }
-"""
\ No newline at end of file
+"""
+
+def get_recipe_diversity_hints():
+    """
+    Return the hints that steer concurrent recipe requests towards different recipes
+    
+    Each hint is added to one of the smaller requests that recipe generation
+    is fanned out into, so that they do not all suggest the same dish.
+    
+    Returns:
+        List of hint strings
+    """
+    return [
+        "uses as many of the available ingredients as possible",
+        "is a creative option that may require a few additional ingredients",
+        "is quick to make, ready in 30 minutes or less",
+        "comes from a different cuisine (for example Asian, Mediterranean or Latin American)",
+        "is a light, fresh dish",
+        "is a hearty, comforting dish"
+    ]
\ No newline at end of file
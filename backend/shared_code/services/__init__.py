@@ -1,11 +1,42 @@
 """
 Services package initialization
 This makes the service classes importable directly from the services package
+
+The classes are imported on first access, so importing one service module
+does not pull in the SDKs every other service depends on.
 """
 
-from .azure_blob_service import AzureBlobService
-from .azure_openai_client import AzureOpenAIClientService
-from .recipe_service import RecipeService
-from .vision_service import VisionService
+import importlib
+
+_SERVICE_MODULES = {
+    'AzureBlobService': 'azure_blob_service',
+    'AzureJobQueue': 'job_queue',
+    'AzureOpenAIClientService': 'azure_openai_client',
+    'CircuitBreaker': 'resilience',
+    'CircuitOpenError': 'resilience',
+    'ConnectionStats': 'http_transport',
+    'Deployment': 'deployment_pool',
+    'DeploymentPool': 'deployment_pool',
+    'InMemoryJobQueue': 'job_queue',
+    'LeasedSingleFlight': 'single_flight',
+    'JobProcessor': 'job_processor',
+    'JobService': 'job_service',
+    'RateLimiter': 'rate_limiter',
+    'RateLimitExceeded': 'rate_limiter',
+    'RecipeCache': 'recipe_cache',
+    'RecipeService': 'recipe_service',
+    'RecipeSpeculator': 'recipe_speculation',
+    'RequestIndex': 'request_index',
+    'ResiliencePolicy': 'resilience',
+    'ResultCache': 'result_cache',
+    'SingleFlight': 'single_flight',
+    'VisionService': 'vision_service'
+}
+
+def __getattr__(name):
+    if name in _SERVICE_MODULES:
+        module = importlib.import_module(f".{_SERVICE_MODULES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ['AzureBlobService', 'AzureOpenAIClientService', 'RecipeService', 'VisionService']
\ No newline at end of file
+__all__ = ['AzureBlobService', 'AzureJobQueue', 'AzureOpenAIClientService', 'CircuitBreaker', 'CircuitOpenError', 'ConnectionStats', 'Deployment', 'DeploymentPool', 'InMemoryJobQueue', 'JobProcessor', 'JobService', 'LeasedSingleFlight', 'RateLimiter', 'RateLimitExceeded', 'RecipeCache', 'RecipeService', 'RecipeSpeculator', 'RequestIndex', 'ResiliencePolicy', 'ResultCache', 'SingleFlight', 'VisionService']
\ No newline at end of file
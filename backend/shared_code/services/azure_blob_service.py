@@ -2,37 +2,97 @@
 Azure Blob Storage Service - Handles operations with Azure Blob Storage
 """
 
-import json
-from azure.storage.blob import BlobServiceClient, ContentSettings
+import asyncio
+import logging
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from azure.storage.blob import ContentSettings, StorageErrorCode
+from azure.storage.blob.aio import BlobServiceClient
 from io import BytesIO
+from ..utils.http_utils import etag_matches
+from .http_transport import ConnectionStats, create_blob_transport
+from ..utils.json_utils import decode_json, encode_json, get_compression
 
 class AzureBlobService:
-    """Service for interacting with Azure Blob Storage"""
+    """Service for interacting with Azure Blob Storage (async)"""
     
-    def __init__(self, connection_string, container_name="container01"):
+    def __init__(self, connection_string, container_name="container01", request_index=None,
+                 json_indent=False, json_compression=None, transport_config=None):
         """
         Initialize the Azure Blob Storage service
         
         Args:
             connection_string: Azure Storage account connection string
             container_name: Name of the blob container (default: container01)
+            request_index: Optional RequestIndex kept up to date with the request artifacts seen
+            json_indent: Whether upload_json pretty-prints instead of writing compact JSON
+            json_compression: Compression applied by upload_json ("none", "gzip" or "zstd")
+            transport_config: Optional connection pool/timeout settings (see Config.get_storage_transport_config)
         """
         self.connection_string = connection_string
         self.container_name = container_name
-        self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+        self.request_index = request_index
+        self.json_indent = json_indent
+        try:
+            self.json_compression = get_compression(json_compression)
+        except ValueError as e:
+            # A bad setting must not take down every function using storage; blobs are just written uncompressed
+            logging.warning(f"Ignoring STORAGE_JSON_COMPRESSION, writing uncompressed JSON: {str(e)}")
+            self.json_compression = None
+        self.transport_config = transport_config
+        self.connection_stats = ConnectionStats()
+        self._blob_service_client = None
         
-        # Ensure container exists
-        container_client = self.blob_service_client.get_container_client(container_name)
-        if not container_client.exists():
-            self.blob_service_client.create_container(container_name)
+        # The container is normally provisioned at deploy time (see scripts/ensure_container.py),
+        # so uploads only fall back to creating it when storage reports it missing
+        self._container_ready = False
+        self._container_lock = asyncio.Lock()
     
-    def upload_file(self, file_data, blob_path):
+    @property
+    def blob_service_client(self):
+        """The BlobServiceClient, created on first use (its aiohttp session needs a running event loop)"""
+        if self._blob_service_client is None:
+            transport_kwargs = {}
+            if self.transport_config is not None:
+                transport_kwargs["transport"] = create_blob_transport(self.transport_config, self.connection_stats)
+            self._blob_service_client = BlobServiceClient.from_connection_string(
+                self.connection_string, **transport_kwargs
+            )
+        return self._blob_service_client
+    
+    async def ensure_container(self, force=False):
+        """
+        Create the blob container if it does not exist yet (checked once per instance)
+        
+        Args:
+            force: Check again even if the container was already found on this instance
+        """
+        if self._container_ready and not force:
+            return
+        
+        async with self._container_lock:
+            if self._container_ready and not force:
+                return
+            
+            container_client = self.blob_service_client.get_container_client(self.container_name)
+            if not await container_client.exists():
+                try:
+                    await self.blob_service_client.create_container(self.container_name)
+                except ResourceExistsError:
+                    # Another instance created it in the meantime
+                    pass
+            self._container_ready = True
+    
+    async def upload_file(self, file_data, blob_path, content_encoding=None, lease=None, if_missing=False):
         """
         Upload a file to Azure Blob Storage
         
         Args:
             file_data: File data as bytes or BytesIO object
             blob_path: Path within the container where the file should be stored
+            content_encoding: Optional Content-Encoding of the data (e.g. "gzip")
+            lease: Lease (from acquire_lease) held on the blob, required to overwrite a leased blob
+            if_missing: Only create the blob, failing (If-None-Match: *) if it already exists
             
         Returns:
             URL to the uploaded blob
@@ -52,7 +112,7 @@ class AzureBlobService:
             content_type = 'application/json'
             
         # Upload the file with appropriate content settings
-        content_settings = ContentSettings(content_type=content_type)
+        content_settings = ContentSettings(content_type=content_type, content_encoding=content_encoding)
         
         # Ensure we have bytes for uploading
         if isinstance(file_data, BytesIO):
@@ -61,25 +121,88 @@ class AzureBlobService:
         else:
             data = file_data
             
-        blob_client.upload_blob(data, content_settings=content_settings, overwrite=True)
+        condition = {"etag": "*", "match_condition": MatchConditions.IfMissing} if if_missing else {}
+        try:
+            try:
+                result = await blob_client.upload_blob(
+                    data, content_settings=content_settings, overwrite=not if_missing, lease=lease, **condition
+                )
+            except ResourceNotFoundError as e:
+                # Skipping the existence check keeps it off the hot path; create the container only if it is really missing
+                if e.error_code != StorageErrorCode.CONTAINER_NOT_FOUND:
+                    raise
+                await self.ensure_container(force=True)
+                result = await blob_client.upload_blob(
+                    data, content_settings=content_settings, overwrite=not if_missing, lease=lease, **condition
+                )
+        except Exception:
+            # A failed write may still have reached storage; whatever the index knew about the blob is unreliable now
+            self.invalidate(blob_path)
+            raise
+        
+        if self.request_index is not None:
+            self.request_index.record(
+                blob_path,
+                size=len(data),
+                etag=result.get("etag"),
+                content_type=content_type,
+                content_encoding=content_encoding
+            )
         return blob_client.url
     
-    def upload_json(self, json_data, blob_path):
+    async def upload_json(self, json_data, blob_path, lease=None):
         """
         Upload JSON data to Azure Blob Storage
         
+        The JSON is written compact (or indented) and optionally compressed,
+        as configured for this service; download_json reverses both.
+        
         Args:
             json_data: Dictionary to be serialized as JSON
             blob_path: Path within the container where the JSON should be stored
+            lease: Lease (from acquire_lease) held on the blob, required to overwrite a leased blob
             
         Returns:
             URL to the uploaded blob
         """
-        json_str = json.dumps(json_data, indent=2)
-        json_bytes = json_str.encode('utf-8')
-        return self.upload_file(json_bytes, blob_path)
+        json_bytes, content_encoding = encode_json(json_data, indent=self.json_indent, compression=self.json_compression)
+        return await self.upload_file(json_bytes, blob_path, content_encoding=content_encoding, lease=lease)
     
-    def download_file(self, blob_path):
+    async def create_json(self, json_data, blob_path):
+        """
+        Upload JSON data only if the blob does not exist yet
+        
+        The write is conditional (If-None-Match: *), so of several clients
+        creating the same blob concurrently exactly one succeeds.
+        
+        Args:
+            json_data: Dictionary to be serialized as JSON
+            blob_path: Path within the container where the JSON should be stored
+        
+        Returns:
+            True if this call created the blob, False if it already existed
+        """
+        json_bytes, content_encoding = encode_json(json_data, indent=self.json_indent, compression=self.json_compression)
+        try:
+            await self.upload_file(json_bytes, blob_path, content_encoding=content_encoding, if_missing=True)
+        except (ResourceExistsError, ResourceModifiedError):
+            return False
+        return True
+    
+    async def download_bytes(self, blob_path):
+        """
+        Download a blob's raw content from Azure Blob Storage
+        
+        Args:
+            blob_path: Path to the blob within the container
+            
+        Returns:
+            Blob content as bytes, exactly as stored (still compressed if it was uploaded compressed)
+        """
+        content, _ = await self._download(blob_path)
+        return content
+    
+    async def download_file(self, blob_path):
         """
         Download a file from Azure Blob Storage
         
@@ -89,18 +212,9 @@ class AzureBlobService:
         Returns:
             BytesIO object containing the file data
         """
-        blob_client = self.blob_service_client.get_blob_client(
-            container=self.container_name, 
-            blob=blob_path
-        )
-        
-        download_stream = BytesIO()
-        download_stream.write(blob_client.download_blob().readall())
-        download_stream.seek(0)
-        
-        return download_stream
+        return BytesIO(await self.download_bytes(blob_path))
     
-    def download_json(self, blob_path):
+    async def download_json(self, blob_path):
         """
         Download and parse JSON data from Azure Blob Storage
         
@@ -110,11 +224,115 @@ class AzureBlobService:
         Returns:
             Parsed JSON object (dictionary)
         """
-        download_stream = self.download_file(blob_path)
-        json_str = download_stream.read().decode('utf-8')
-        return json.loads(json_str)
+        content, properties = await self._download(blob_path)
+        return decode_json(content, properties.content_settings.content_encoding)
+    
+    def invalidate(self, blob_path):
+        """
+        Drop what the request index knows about a blob, so the next read asks storage
+        
+        Used when the blob is known to have been written elsewhere (e.g. by
+        another instance or a queued job) since the index last saw it.
+        
+        Args:
+            blob_path: Path to the blob within the container
+        """
+        if self.request_index is not None:
+            self.request_index.invalidate(blob_path)
+    
+    async def download_json_if_exists(self, blob_path, fresh=False):
+        """
+        Download and parse JSON data, returning None if the blob does not exist
+        
+        Unlike calling blob_exists followed by download_json, this costs a
+        single storage round trip, and none at all if the request index
+        already knows the blob is missing.
+        
+        Args:
+            blob_path: Path to the JSON blob within the container
+            fresh: Always ask storage, for blobs other instances may have just written
+            
+        Returns:
+            Parsed JSON object (dictionary) or None if the blob is missing
+        """
+        if not fresh and self.request_index is not None and self.request_index.is_missing(blob_path):
+            return None
+        
+        try:
+            return await self.download_json(blob_path)
+        except ResourceNotFoundError:
+            return None
+    
+    async def download_bytes_if_modified(self, blob_path, etags=None, immutable=False):
+        """
+        Download a blob's raw content unless the caller's copy (by ETag) is still current
+        
+        A matching ETag is answered from the request index when the blob is
+        immutable, and otherwise with a conditional GET, so an unchanged blob
+        is never transferred again. The content is returned as stored, so it
+        can be passed through to an HTTP response without being parsed.
+        
+        Args:
+            blob_path: Path to the blob within the container
+            etags: Entity tags the caller already has (e.g. from If-None-Match)
+            immutable: Whether the blob never changes once written, so a known ETag can be trusted without asking storage
+            
+        Returns:
+            None if the blob does not exist, otherwise a dictionary with "etag",
+            "content_type", "content_encoding" and "content" (bytes as stored, or None
+            if the caller's copy is current)
+        """
+        etags = etags or []
+        entry = self.request_index.lookup(blob_path) if self.request_index is not None else None
+        if entry is not None:
+            if entry.get("missing"):
+                return None
+            if immutable and etag_matches(etags, entry.get("etag")):
+                return {
+                    "etag": entry["etag"],
+                    "content_type": entry.get("content_type"),
+                    "content_encoding": entry.get("content_encoding"),
+                    "content": None
+                }
+        
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name, 
+            blob=blob_path
+        )
+        
+        # Storage takes a single tag; "*" is only honored through the index
+        conditional_etag = next((etag for etag in etags if etag != "*"), None)
+        condition = {"etag": conditional_etag, "match_condition": MatchConditions.IfModified} if conditional_etag else {}
+        try:
+            downloader = await blob_client.download_blob(decompress=False, **condition)
+        except ResourceNotFoundError:
+            if self.request_index is not None:
+                self.request_index.record_missing(blob_path)
+            return None
+        except HttpResponseError as e:
+            # 304 Not Modified: storage confirmed the caller's copy without sending the body
+            if e.status_code != 304:
+                raise
+            if self.request_index is not None and entry is None:
+                self.request_index.record(blob_path, etag=conditional_etag)
+            return {
+                "etag": conditional_etag,
+                "content_type": (entry or {}).get("content_type"),
+                "content_encoding": (entry or {}).get("content_encoding"),
+                "content": None
+            }
+        
+        content = await downloader.readall()
+        properties = downloader.properties
+        self._record_download(blob_path, properties)
+        return {
+            "etag": properties.etag,
+            "content_type": properties.content_settings.content_type,
+            "content_encoding": properties.content_settings.content_encoding,
+            "content": content
+        }
     
-    def list_blobs(self, prefix=None):
+    async def list_blobs(self, prefix=None):
         """
         List blobs in the container, optionally filtered by prefix
         
@@ -125,10 +343,9 @@ class AzureBlobService:
             List of blob names
         """
         container_client = self.blob_service_client.get_container_client(self.container_name)
-        blobs = container_client.list_blobs(name_starts_with=prefix)
-        return [blob.name for blob in blobs]
+        return [blob.name async for blob in container_client.list_blobs(name_starts_with=prefix)]
     
-    def blob_exists(self, blob_path):
+    async def blob_exists(self, blob_path):
         """
         Check if a blob exists
         
@@ -138,8 +355,120 @@ class AzureBlobService:
         Returns:
             Boolean indicating if the blob exists
         """
+        if self.request_index is not None:
+            entry = self.request_index.lookup(blob_path)
+            if entry is not None:
+                return not entry.get("missing", False)
+        
         blob_client = self.blob_service_client.get_blob_client(
             container=self.container_name, 
             blob=blob_path
         )
-        return blob_client.exists()
\ No newline at end of file
+        exists = await blob_client.exists()
+        if not exists and self.request_index is not None:
+            self.request_index.record_missing(blob_path)
+        return exists
+    
+    async def get_etag(self, blob_path):
+        """
+        Get a blob's current ETag from storage, bypassing the request index
+        
+        Args:
+            blob_path: Path to the blob within the container
+        
+        Returns:
+            ETag of the blob, or None if it does not exist
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name, 
+            blob=blob_path
+        )
+        try:
+            properties = await blob_client.get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        return properties.etag
+    
+    async def acquire_lease(self, blob_path, lease_seconds=60):
+        """
+        Try to take the lease of a blob, creating the blob (an empty JSON object) if it is missing
+        
+        Args:
+            blob_path: Path to the blob within the container
+            lease_seconds: Lease duration (15-60 seconds)
+        
+        Returns:
+            BlobLeaseClient of the acquired lease, or None if another client holds the lease
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name, 
+            blob=blob_path
+        )
+        
+        try:
+            try:
+                return await blob_client.acquire_lease(lease_duration=lease_seconds)
+            except ResourceNotFoundError:
+                try:
+                    await self.upload_file(b"{}", blob_path)
+                except HttpResponseError as e:
+                    # Another client created and leased it in the meantime
+                    if e.error_code != StorageErrorCode.LEASE_ID_MISSING:
+                        raise
+                return await blob_client.acquire_lease(lease_duration=lease_seconds)
+        except HttpResponseError as e:
+            if e.error_code == StorageErrorCode.LEASE_ALREADY_PRESENT:
+                return None
+            raise
+    
+    async def _download(self, blob_path):
+        """
+        Download a blob as stored (no automatic decompression), keeping the request index up to date
+        
+        Args:
+            blob_path: Path to the blob within the container
+        
+        Returns:
+            Tuple of (content bytes, blob properties)
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name, 
+            blob=blob_path
+        )
+        
+        try:
+            downloader = await blob_client.download_blob(decompress=False)
+        except ResourceNotFoundError:
+            if self.request_index is not None:
+                self.request_index.record_missing(blob_path)
+            raise
+        content = await downloader.readall()
+        
+        self._record_download(blob_path, downloader.properties)
+        return content, downloader.properties
+    
+    def _record_download(self, blob_path, properties):
+        """Record a downloaded blob's properties in the request index"""
+        if self.request_index is not None:
+            self.request_index.record(
+                blob_path,
+                size=properties.size,
+                etag=properties.etag,
+                content_type=properties.content_settings.content_type,
+                content_encoding=properties.content_settings.content_encoding
+            )
+    
+    def get_stats(self):
+        """
+        Get connection reuse counters for the Blob Storage client
+        
+        Returns:
+            Dictionary with request/connection counters and the connection reuse rate
+        """
+        return self.connection_stats.get_stats()
+    
+    async def close(self):
+        """Close the underlying Blob Storage client and its connections"""
+        if self._blob_service_client is not None:
+            await self._blob_service_client.close()
+            self._blob_service_client = None
\ No newline at end of file
@@ -2,30 +2,143 @@
 Azure OpenAI Client Service - Handles Azure OpenAI API client initialization
 """
 
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, RateLimitError
+from .http_transport import ConnectionStats, create_openai_http_client
+from .deployment_pool import Deployment, DeploymentPool
+from .rate_limiter import RateLimiter, RateLimitExceeded, estimate_prompt_tokens, get_retry_after
+from .resilience import CircuitBreaker, ResiliencePolicy
 
 class AzureOpenAIClientService:
-    """Service for interacting with Azure OpenAI API"""
+    """Service for interacting with Azure OpenAI API (async)"""
     
     def __init__(self, config):
         """
         Initialize the Azure OpenAI client
         
+        The client is asynchronous, so a single worker can keep many model
+        calls in flight instead of blocking a thread for each of them. All
+        calls (vision and recipes) share one tuned httpx connection pool.
+        Each configured deployment (see Config.get_deployments_config) gets
+        its own rate limiter and circuit breaker, and calls are routed across
+        them by a DeploymentPool. Retries are handled by the ResiliencePolicy
+        rather than the SDK.
+        
         Args:
             config: Configuration object containing Azure OpenAI credentials
         """
-        azure_config = config.get_azure_config()
-        self.client = AzureOpenAI(
-            api_key=azure_config["api_key"],
-            api_version=azure_config["api_version"],
-            azure_endpoint=azure_config["endpoint"]
+        self.connection_stats = ConnectionStats()
+        self.http_client = create_openai_http_client(config.get_openai_transport_config(), self.connection_stats)
+        
+        rate_limit_config = config.get_rate_limit_config()
+        resilience_config = config.get_resilience_config()
+        deployments = []
+        for deployment_config in config.get_deployments_config():
+            client = AsyncAzureOpenAI(
+                api_key=deployment_config["api_key"],
+                api_version=deployment_config["api_version"],
+                azure_endpoint=deployment_config["endpoint"],
+                http_client=self.http_client,
+                timeout=self.http_client.timeout,
+                max_retries=0
+            )
+            deployments.append(Deployment(
+                deployment_config["name"],
+                client,
+                deployment_config["model_name"],
+                weight=float(deployment_config["weight"]),
+                rate_limiter=RateLimiter(
+                    requests_per_minute=deployment_config["requests_per_minute"],
+                    tokens_per_minute=deployment_config["tokens_per_minute"],
+                    max_wait_seconds=rate_limit_config["max_wait_seconds"]
+                ),
+                breaker=CircuitBreaker(
+                    failure_threshold=resilience_config["failure_threshold"],
+                    recovery_seconds=resilience_config["recovery_seconds"]
+                )
+            ))
+        self.pool = DeploymentPool(deployments, routing=config.get_routing_config()["routing"])
+        
+        self.resilience = ResiliencePolicy(
+            max_retries=resilience_config["max_retries"],
+            base_delay=resilience_config["base_delay"],
+            max_delay=resilience_config["max_delay"],
+            hedging_enabled=resilience_config["hedging_enabled"],
+            hedging_min_samples=resilience_config["hedging_min_samples"]
         )
-        self.model_name = azure_config["model_name"]
         
     def get_client(self):
-        """Get the initialized Azure OpenAI client"""
-        return self.client
+        """Get the Azure OpenAI client of the first configured deployment"""
+        return self.pool.deployments[0].client
         
     def get_model_name(self):
-        """Get the model name to use for API calls"""
-        return self.model_name
\ No newline at end of file
+        """Get the model name of the first configured deployment"""
+        return self.pool.deployments[0].model_name
+    
+    async def create_chat_completion(self, messages, max_tokens, image_tokens=0, model=None, **kwargs):
+        """
+        Create a chat completion on the deployment pool under the resilience policy
+        
+        Every attempt is routed to a deployment whose budget admits it (see
+        DeploymentPool and RateLimiter), failing over to the other deployments
+        on 429 or errors, and the remaining quota reported in the response
+        headers is fed back into that deployment's limiter. Failed attempts are
+        retried, and slow calls hedged, by the ResiliencePolicy.
+        
+        Args:
+            messages: Chat messages
+            max_tokens: Maximum completion tokens
+            image_tokens: Estimated prompt tokens of the images in the messages
+            model: Model deployment to call (defaults to the routed deployment's model_name);
+                it must be deployed on every endpoint of the pool
+            **kwargs: Further chat.completions.create arguments (response_format, ...)
+            
+        Returns:
+            The parsed completion
+            
+        Raises:
+            RateLimitExceeded: If the call is shed locally or Azure OpenAI kept answering 429
+            CircuitOpenError: If the circuit breakers of all deployments are open
+        """
+        tokens = estimate_prompt_tokens(messages, image_tokens) + max_tokens
+        
+        async def request(deployment):
+            try:
+                raw_response = await deployment.client.chat.completions.with_raw_response.create(
+                    model=model or deployment.model_name,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    **kwargs
+                )
+            except RateLimitError as e:
+                deployment.rate_limiter.record_throttled(get_retry_after(e.response.headers))
+                raise
+            
+            deployment.rate_limiter.update_from_headers(raw_response.headers)
+            return raw_response.parse()
+        
+        async def attempt():
+            return await self.pool.call(request, tokens)
+        
+        try:
+            return await self.resilience.execute(attempt, hedge=True, can_hedge=self.pool.can_hedge)
+        except RateLimitError as e:
+            retry_after = get_retry_after(e.response.headers)
+            raise RateLimitExceeded("Azure OpenAI rate limit reached, please retry later", retry_after=retry_after)
+    
+    def get_stats(self):
+        """
+        Get connection reuse, routing and resilience counters for the Azure OpenAI client
+        
+        Returns:
+            Dictionary with "connections", "routing" (per-deployment load, rate limiter
+            and circuit breaker) and "resilience" statistics
+        """
+        return {
+            "connections": self.connection_stats.get_stats(),
+            "routing": self.pool.get_stats(),
+            "resilience": self.resilience.get_stats()
+        }
+    
+    async def close(self):
+        """Close the HTTP client shared by all deployments"""
+        await self.http_client.aclose()
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Deployment Pool - Routing of model calls across several Azure OpenAI deployments
+"""
+
+import random
+import threading
+from .rate_limiter import RateLimiter, RateLimitExceeded
+from .resilience import FAILURE_KINDS, RETRYABLE_KINDS, CircuitBreaker, CircuitOpenError, classify_error
+
+ROUTING_STRATEGIES = ("least_outstanding", "remaining_quota")
+
+class Deployment:
+    """One Azure OpenAI deployment with its own budget, circuit breaker and load"""
+    
+    def __init__(self, name, client, model_name, weight=1.0, rate_limiter=None, breaker=None):
+        """
+        Initialize the deployment
+        
+        Args:
+            name: Name used in metrics and logs
+            client: AsyncAzureOpenAI client of the deployment's endpoint
+            model_name: Deployment (model) name to call
+            weight: Relative share of the traffic the deployment should take
+            rate_limiter: RateLimiter enforcing the deployment's quota
+            breaker: CircuitBreaker tracking the deployment's health
+        """
+        self.name = name
+        self.client = client
+        self.model_name = model_name
+        self.weight = weight if weight > 0 else 1.0
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        
+        self.outstanding = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "errors": 0,
+            "throttled": 0
+        }
+    
+    async def run(self, request):
+        """
+        Run a call on the deployment, updating its load, counters and circuit breaker
+        
+        Args:
+            request: Async callable taking the Deployment and performing the call on it
+        
+        Returns:
+            Result of the call
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            self.outstanding += 1
+        try:
+            result = await request(self)
+        except Exception as e:
+            kind = classify_error(e)
+            if kind in FAILURE_KINDS:
+                self._increment("errors")
+                self.breaker.record_failure()
+            elif kind is not None:
+                if kind == "throttled":
+                    self._increment("throttled")
+                self.breaker.record_success()
+            else:
+                self.breaker.release()
+            raise
+        except BaseException:
+            # Cancelled (e.g. a losing hedge): free a half-open trial so the breaker can admit the next one
+            self.breaker.release()
+            raise
+        finally:
+            with self._lock:
+                self.outstanding -= 1
+        
+        self.breaker.record_success()
+        return result
+    
+    def get_stats(self):
+        """
+        Get the deployment's load, counters, budget and breaker state
+        
+        Returns:
+            Dictionary of deployment metrics
+        """
+        with self._lock:
+            stats = dict(self._stats, outstanding=self.outstanding, weight=self.weight)
+        stats["rate_limiter"] = self.rate_limiter.get_stats()
+        stats["circuit_breaker"] = self.breaker.get_stats()
+        return stats
+    
+    def _increment(self, name, amount=1):
+        """Increment a counter"""
+        with self._lock:
+            self._stats[name] += amount
+
+class DeploymentPool:
+    """
+    Routes each model call to one deployment, failing over to the others
+    
+    Deployments are ranked per call, either by outstanding requests relative
+    to their weight ("least_outstanding") or by the share of their quota that
+    is still available ("remaining_quota", which follows the
+    x-ratelimit-remaining-* headers through each deployment's RateLimiter).
+    The call goes to the best ranked deployment whose circuit breaker is
+    closed and whose budget admits it right away. If that deployment answers
+    429 or fails with a retryable error, the next one is tried immediately.
+    Deployments that were out of budget are then waited for, in rank order,
+    so a failure only reaches the caller's retry policy once every
+    deployment has failed, shed the call or rejected it with an open breaker.
+    """
+    
+    def __init__(self, deployments, routing="least_outstanding"):
+        """
+        Initialize the pool
+        
+        Args:
+            deployments: List of Deployment objects (at least one)
+            routing: "least_outstanding" or "remaining_quota"
+        
+        Raises:
+            ValueError: If there are no deployments or the routing strategy is unknown
+        """
+        if not deployments:
+            raise ValueError("At least one Azure OpenAI deployment must be configured")
+        if routing not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unsupported routing strategy: {routing} (expected one of {', '.join(ROUTING_STRATEGIES)})")
+        
+        self.deployments = deployments
+        self.routing = routing
+        self._lock = threading.Lock()
+        self._failovers = 0
+    
+    async def call(self, request, tokens):
+        """
+        Run a model call on the best available deployment
+        
+        Args:
+            request: Async callable taking a Deployment and performing the call on it
+            tokens: Estimated tokens of the call (prompt plus max_tokens)
+        
+        Returns:
+            Result of the call
+        
+        Raises:
+            CircuitOpenError: If every deployment's circuit breaker is open
+            RateLimitExceeded: If no deployment failed but none can admit the call within its maximum wait
+            Exception: The last deployment's error if every deployment failed or was unavailable
+        """
+        last_error = None
+        shed_error = None
+        rejected = []
+        busy = []
+        for deployment in self._rank():
+            try:
+                deployment.breaker.before_call()
+            except CircuitOpenError as e:
+                rejected.append(e)
+                continue
+            
+            if not deployment.rate_limiter.try_acquire(tokens):
+                deployment.breaker.release()
+                busy.append(deployment)
+                continue
+            
+            if last_error is not None:
+                with self._lock:
+                    self._failovers += 1
+            try:
+                return await deployment.run(request)
+            except Exception as e:
+                if classify_error(e) not in RETRYABLE_KINDS:
+                    raise
+                last_error = e
+        
+        # The deployments left are healthy but out of budget: wait for them in rank order
+        for deployment in busy:
+            try:
+                await deployment.rate_limiter.acquire(tokens)
+            except RateLimitExceeded as e:
+                shed_error = e
+                continue
+            try:
+                deployment.breaker.before_call()
+            except CircuitOpenError as e:
+                rejected.append(e)
+                continue
+            
+            if last_error is not None:
+                with self._lock:
+                    self._failovers += 1
+            try:
+                return await deployment.run(request)
+            except Exception as e:
+                if classify_error(e) not in RETRYABLE_KINDS:
+                    raise
+                last_error = e
+        
+        # Every candidate failed, was shed or is open
+        if last_error is not None:
+            raise last_error
+        if shed_error is not None:
+            raise shed_error
+        raise CircuitOpenError(
+            "Azure OpenAI is currently unavailable, please retry later",
+            retry_after=min(e.retry_after for e in rejected)
+        )
+    
+    def can_hedge(self):
+        """
+        Check whether a hedged (duplicate) call may be sent
+        
+        Returns:
+            False while any deployment's circuit breaker is half-open (or about to be),
+            so a duplicate call cannot reach a deployment whose trial call is in flight
+        """
+        return not any(deployment.breaker.is_recovering() for deployment in self.deployments)
+    
+    def _rank(self):
+        """Order the deployments for a call, best first (ties broken randomly)"""
+        deployments = list(self.deployments)
+        random.shuffle(deployments)
+        if self.routing == "remaining_quota":
+            return sorted(deployments, key=lambda d: -d.rate_limiter.get_headroom() * d.weight)
+        return sorted(deployments, key=lambda d: (d.outstanding + 1) / d.weight)
+    
+    def get_stats(self):
+        """
+        Get routing metrics
+        
+        Returns:
+            Dictionary with the routing strategy, failover count and per-deployment metrics
+        """
+        with self._lock:
+            failovers = self._failovers
+        return {
+            "routing": self.routing,
+            "failovers": failovers,
+            "deployments": {deployment.name: deployment.get_stats() for deployment in self.deployments}
+        }
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+HTTP Transport - Tuned connection pools for the Azure OpenAI and Blob Storage clients
+"""
+
+import logging
+import threading
+import aiohttp
+import httpx
+from azure.core.pipeline.transport import AioHttpTransport
+
+# h2 is optional: httpx only needs it when HTTP/2 is enabled for Azure OpenAI calls
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+class ConnectionStats:
+    """
+    Thread-safe counters showing whether HTTP connections are being reused
+    
+    Every request either reuses a pooled keep-alive connection or opens a new
+    one (with a TCP connect and, for HTTPS, a TLS handshake), so a reuse rate
+    close to 1 means handshakes are amortized across requests.
+    """
+    
+    def __init__(self):
+        """Initialize the counters"""
+        self._lock = threading.Lock()
+        self._counts = {
+            "requests": 0,
+            "connections_opened": 0
+        }
+    
+    def increment(self, name):
+        """
+        Increment a counter
+        
+        Args:
+            name: Counter name
+        """
+        with self._lock:
+            self._counts[name] += 1
+    
+    def get_stats(self):
+        """
+        Get the counters
+        
+        Returns:
+            Dictionary with request/connection counters and the connection reuse rate
+        """
+        with self._lock:
+            stats = dict(self._counts)
+        
+        stats["connections_reused"] = max(stats["requests"] - stats["connections_opened"], 0)
+        stats["reuse_rate"] = stats["connections_reused"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+def create_openai_http_client(transport_config, stats=None):
+    """
+    Create the httpx client shared by every Azure OpenAI call
+    
+    The client is the OpenAI SDK's default httpx client (keeping its
+    redirect handling and other defaults) with the tuned pool and timeouts.
+    HTTP/2 is only used when the h2 package is installed; otherwise the
+    client falls back to HTTP/1.1 with a warning.
+    
+    Args:
+        transport_config: Settings from Config.get_openai_transport_config
+        stats: Optional ConnectionStats updated through httpcore's trace extension
+    
+    Returns:
+        openai.DefaultAsyncHttpxClient
+    """
+    # Imported here: the Blob Storage transport lives in this module too, and the read
+    # endpoints that only use storage must start without loading the OpenAI SDK
+    import openai
+    
+    http2 = transport_config["http2"]
+    if http2 and h2 is None:
+        logging.warning("OPENAI_HTTP2 is enabled but the h2 package is not installed, using HTTP/1.1")
+        http2 = False
+    
+    event_hooks = {}
+    if stats is not None:
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                stats.increment("connections_opened")
+            elif event_name.endswith("send_request_headers.started"):
+                stats.increment("requests")
+        
+        async def add_trace(request):
+            request.extensions["trace"] = trace
+        
+        event_hooks["request"] = [add_trace]
+    
+    return openai.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=transport_config["max_connections"],
+            max_keepalive_connections=transport_config["max_keepalive_connections"],
+            keepalive_expiry=transport_config["keepalive_expiry"]
+        ),
+        timeout=httpx.Timeout(transport_config["timeout"], connect=transport_config["connect_timeout"]),
+        http2=http2,
+        event_hooks=event_hooks
+    )
+
+def create_blob_transport(transport_config, stats=None):
+    """
+    Create the aiohttp transport used by the Blob Storage client
+    
+    The aiohttp session needs a running event loop, so call this from async code.
+    
+    Args:
+        transport_config: Settings from Config.get_storage_transport_config
+        stats: Optional ConnectionStats updated through an aiohttp TraceConfig
+    
+    Returns:
+        AioHttpTransport that owns its session
+    """
+    trace_configs = []
+    if stats is not None:
+        trace_config = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, context, params):
+            stats.increment("requests")
+        
+        async def on_connection_create_end(session, context, params):
+            stats.increment("connections_opened")
+        
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_configs.append(trace_config)
+    
+    # Mirrors the session azure-core creates by default, with a tuned connector
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=transport_config["max_connections"],
+            keepalive_timeout=transport_config["keepalive_expiry"],
+            ttl_dns_cache=300
+        ),
+        cookie_jar=aiohttp.DummyCookieJar(),
+        auto_decompress=False,
+        trust_env=True,
+        trace_configs=trace_configs
+    )
+    return AioHttpTransport(
+        session=session,
+        session_owner=True,
+        connection_timeout=transport_config["connect_timeout"],
+        read_timeout=transport_config["timeout"]
+    )
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Job Processor - Runs queued analysis and recipe jobs
+"""
+
+import logging
+from ..models import TokenUsage
+from ..utils.image_utils import UnsupportedImageError
+from .rate_limiter import RateLimitExceeded
+from .resilience import CircuitOpenError
+
+class JobProcessor:
+    """Processes the jobs submitted through the JobService, recording their status and token usage"""
+    
+    def __init__(self, config, job_service, vision_service, recipe_service, recipe_speculator=None):
+        """
+        Initialize the Job Processor
+        
+        Args:
+            config: Config instance (for the request paths)
+            job_service: An initialized JobService object
+            vision_service: An initialized VisionService object
+            recipe_service: An initialized RecipeService object
+            recipe_speculator: Optional RecipeSpeculator told when a speculation finishes
+        """
+        self.config = config
+        self.job_service = job_service
+        self.vision_service = vision_service
+        self.recipe_service = recipe_service
+        self.recipe_speculator = recipe_speculator
+    
+    async def process(self, job, final_attempt=True):
+        """
+        Process one job
+        
+        Args:
+            job: Job dictionary (with "type" and "request_id")
+            final_attempt: Whether the queue will not retry the job again
+        
+        Returns:
+            True if the job completed, False if it failed
+        
+        Raises:
+            RateLimitExceeded, CircuitOpenError: If the model is unavailable and the job
+                should be retried (only when final_attempt is False)
+        """
+        paths = self.config.get_file_paths(request_id=job["request_id"])
+        await self.job_service.set_status(job, paths, "running")
+        usage = TokenUsage()
+        try:
+            if job["type"] == "analyze_image":
+                await self._analyze_image(job, paths, usage)
+            elif job["type"] == "generate_recipes":
+                await self._generate_recipes(job, paths, usage)
+            elif job["type"] == "speculate_recipes":
+                await self._speculate_recipes(job, paths, usage)
+            else:
+                raise ValueError(f"Unknown job type: {job['type']}")
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            if not final_attempt:
+                await self.job_service.set_status(job, paths, "queued")
+                raise
+            logging.warning(f"Model unavailable processing {job['type']} job {job['request_id']}: {str(e)}")
+            await self.job_service.set_status(job, paths, "failed", error=str(e), status_code=e.status_code)
+            return False
+        except UnsupportedImageError as e:
+            await self.job_service.set_status(job, paths, "failed", error=str(e), status_code=e.status_code)
+            return False
+        except Exception as e:
+            logging.error(f"Error processing {job['type']} job {job['request_id']}: {str(e)}")
+            await self.job_service.set_status(job, paths, "failed", error=str(e))
+            return False
+        
+        await self.job_service.set_status(job, paths, "complete", usage=usage.to_dict())
+        if job["type"] == "speculate_recipes" and self.recipe_speculator is not None:
+            await self.recipe_speculator.on_complete(paths, usage.total_tokens)
+        return True
+    
+    async def record_failure(self, job, error):
+        """
+        Mark a job as failed after an error process() could not handle (e.g. a failed status write)
+        
+        Args:
+            job: Job dictionary (with "type" and "request_id")
+            error: The exception that ended the job
+        """
+        paths = self.config.get_file_paths(request_id=job["request_id"])
+        await self.job_service.set_status(
+            job, paths, "failed", error=str(error), status_code=getattr(error, "status_code", None)
+        )
+    
+    async def _analyze_image(self, job, paths, usage):
+        """Analyze the uploaded image of the request and save the analysis"""
+        image_bytes = await self.vision_service.azure_blob_service.download_bytes(job["image_blob"])
+        result = await self.vision_service.analyze_image_bytes(image_bytes, usage=usage)
+        await self.vision_service.save_analysis(result, paths["vision_output"])
+    
+    async def _generate_recipes(self, job, paths, usage):
+        """Generate recipes from the request's ingredients and save them"""
+        ingredients = await self.recipe_service.load_ingredients(paths["vision_output"])
+        if ingredients is None:
+            raise ValueError(f"No ingredients file found for request_id: {job['request_id']}")
+        
+        dietary_restrictions = job.get("dietary_restrictions") or []
+        recipes_data = await self.recipe_service.generate_recipes(
+            ingredients,
+            num_recipes=job.get("num_recipes", 5),
+            dietary_restrictions=dietary_restrictions,
+            usage=usage
+        )
+        full_response = self.recipe_service.build_recipes_response(recipes_data, len(ingredients), dietary_restrictions)
+        await self.recipe_service.save_recipes(full_response, paths["recipes_output"])
+    
+    async def _speculate_recipes(self, job, paths, usage):
+        """Generate recipes with the default parameters ahead of the request, from the ingredients in the job"""
+        recipes_data = await self.recipe_service.generate_recipes(
+            job["ingredients"],
+            num_recipes=job["num_recipes"],
+            dietary_restrictions=[],
+            usage=usage
+        )
+        await self.recipe_service.save_recipes(recipes_data, paths["speculative_recipes"])
\ No newline at end of file
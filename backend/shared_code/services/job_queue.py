@@ -0,0 +1,173 @@
+"""
+Job Queue - Queues of analysis and recipe jobs processed outside the HTTP request
+"""
+
+import asyncio
+import json
+import logging
+from azure.core.exceptions import ResourceNotFoundError
+from ..utils.background import run_in_background
+from .rate_limiter import RateLimitExceeded
+from .resilience import CircuitOpenError
+
+class InMemoryJobQueue:
+    """
+    Job queue processed on the instance that accepted the job
+    
+    Jobs run as background tasks, at most max_concurrency at a time; a job
+    whose model calls are rate limited or blocked by an open circuit breaker
+    is retried after the advertised delay, up to max_attempts times. A job
+    whose handler fails in any other way (e.g. its status could not be
+    written) is reported to on_failure, so that its status does not stay
+    queued or running. Queued jobs are lost if the instance recycles, so this
+    is meant for local development and single-instance deployments.
+    """
+    
+    def __init__(self, handler, max_concurrency=4, max_attempts=3, on_failure=None):
+        """
+        Initialize the queue
+        
+        Args:
+            handler: Async callable (job, final_attempt) processing one job; it raises
+                RateLimitExceeded or CircuitOpenError when the job should be retried
+            max_concurrency: Maximum number of jobs processed at the same time
+            max_attempts: Maximum number of times a job is attempted
+            on_failure: Optional async callable (job, error) recording a job that failed unexpectedly
+        """
+        self.handler = handler
+        self.on_failure = on_failure
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        
+        # Created on first use, inside the running event loop
+        self._semaphore = None
+        self._stats = {
+            "enqueued": 0,
+            "running": 0,
+            "retried": 0,
+            "completed": 0,
+            "failed": 0
+        }
+    
+    async def enqueue(self, job, key=None):
+        """
+        Queue a job
+        
+        Args:
+            job: Job dictionary (with "type" and "request_id")
+            key: Optional key (the blob the job writes) readers on this instance can wait on
+        """
+        self._stats["enqueued"] += 1
+        run_in_background(self._run(job), f"{job['type']} job {job['request_id']}", key=key)
+    
+    async def _run(self, job):
+        """Process a job, waiting for a free slot and retrying it while the model is unavailable"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        for attempt in range(1, self.max_attempts + 1):
+            final_attempt = attempt == self.max_attempts
+            try:
+                async with self._semaphore:
+                    self._stats["running"] += 1
+                    try:
+                        completed = await self.handler(job, final_attempt=final_attempt)
+                    finally:
+                        self._stats["running"] -= 1
+            except (RateLimitExceeded, CircuitOpenError) as e:
+                if final_attempt:
+                    await self._fail(job, e)
+                    return
+                # The slot is released while waiting, so other jobs can proceed
+                self._stats["retried"] += 1
+                logging.info(f"Retrying {job['type']} job {job['request_id']} in {e.retry_after}s: {str(e)}")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except Exception as e:
+                await self._fail(job, e)
+                return
+            
+            self._stats["completed" if completed else "failed"] += 1
+            return
+    
+    async def _fail(self, job, error):
+        """Count a job that failed unexpectedly and record its failure (best effort)"""
+        self._stats["failed"] += 1
+        logging.error(f"{job['type']} job {job['request_id']} failed: {str(error)}")
+        if self.on_failure is None:
+            return
+        try:
+            await self.on_failure(job, error)
+        except Exception as e:
+            logging.error(f"Could not record the failure of {job['type']} job {job['request_id']}: {str(e)}")
+    
+    def get_stats(self):
+        """
+        Get queue counters
+        
+        Returns:
+            Dictionary with the backend name and enqueued/running/retried/completed/failed counts
+        """
+        return dict(self._stats, backend="memory", max_concurrency=self.max_concurrency)
+
+class AzureJobQueue:
+    """
+    Job queue backed by an Azure Storage queue
+    
+    Jobs are processed by the ProcessJob function on any instance; its queue
+    trigger retries failed messages (up to maxDequeueCount in host.json) and
+    bounds how many jobs each instance processes at once (batchSize).
+    """
+    
+    def __init__(self, connection_string, queue_name):
+        """
+        Initialize the queue client
+        
+        Args:
+            connection_string: Azure Storage connection string
+            queue_name: Name of the queue the ProcessJob function listens on
+        """
+        # Imported here so that the in-memory queue does not need the queue SDK
+        from azure.storage.queue import TextBase64EncodePolicy
+        from azure.storage.queue.aio import QueueClient
+        
+        # The Functions queue trigger expects Base64-encoded messages
+        self.queue_client = QueueClient.from_connection_string(
+            connection_string,
+            queue_name,
+            message_encode_policy=TextBase64EncodePolicy()
+        )
+        self._stats = {
+            "enqueued": 0
+        }
+    
+    async def enqueue(self, job, key=None):
+        """
+        Queue a job
+        
+        Args:
+            job: Job dictionary (with "type" and "request_id")
+            key: Unused; jobs are processed by the ProcessJob function
+        """
+        message = json.dumps(job)
+        try:
+            await self.queue_client.send_message(message)
+        except ResourceNotFoundError:
+            # Like the storage container, the queue is created by the first job if it is missing
+            logging.info("Job queue not found, creating it")
+            await self.queue_client.create_queue()
+            await self.queue_client.send_message(message)
+        self._stats["enqueued"] += 1
+    
+    def get_stats(self):
+        """
+        Get queue counters
+        
+        Returns:
+            Dictionary with the backend name and the number of jobs enqueued on this instance
+        """
+        return dict(self._stats, backend="azure")
+    
+    async def close(self):
+        """Close the queue client"""
+        await self.queue_client.close()
\ No newline at end of file
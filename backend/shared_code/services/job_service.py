@@ -0,0 +1,132 @@
+"""
+Job Service - Submission and status tracking of queued analysis and recipe jobs
+"""
+
+import asyncio
+import time
+from ..utils.background import wait_for_pending_write
+
+# Job types, with the request paths of their status document and of the result they write
+JOB_TYPES = {
+    "analyze_image": {"status": "analysis_status", "output": "vision_output"},
+    "generate_recipes": {"status": "recipes_status", "output": "recipes_output"},
+    "speculate_recipes": {"status": "speculation_status", "output": "speculative_recipes"}
+}
+
+JOB_STATUSES = ("queued", "running", "complete", "failed")
+
+class JobService:
+    """
+    Submits jobs to the job queue and tracks their status in the request folder
+    
+    Every job has a small status document next to the result it produces
+    (analysis_status_*.json / recipes_status_*.json), so any instance can
+    tell clients whether a result is still queued, being processed or has
+    failed. The status is only a companion of the result: once the result
+    blob exists, it is served whatever the status says.
+    """
+    
+    def __init__(self, azure_blob_service, job_queue):
+        """
+        Initialize the Job Service
+        
+        Args:
+            azure_blob_service: An initialized AzureBlobService object
+            job_queue: InMemoryJobQueue or AzureJobQueue jobs are submitted to
+        """
+        self.azure_blob_service = azure_blob_service
+        self.job_queue = job_queue
+    
+    async def submit(self, job_type, paths, **parameters):
+        """
+        Record a job as queued and submit it to the job queue
+        
+        Args:
+            job_type: One of JOB_TYPES
+            paths: Request paths from Config.get_file_paths
+            **parameters: Job parameters (JSON-serializable)
+        
+        Returns:
+            The job's status document
+        """
+        job = dict(parameters, type=job_type, request_id=paths["request_id"])
+        status = await self.set_status(job, paths, "queued")
+        await self.job_queue.enqueue(job, key=paths[JOB_TYPES[job_type]["output"]])
+        return status
+    
+    async def set_status(self, job, paths, status, error=None, status_code=None, **details):
+        """
+        Write a job's status document
+        
+        Args:
+            job: Job dictionary
+            paths: Request paths from Config.get_file_paths
+            status: One of JOB_STATUSES
+            error: Error message of a failed job
+            status_code: HTTP status a failed job is reported with
+            **details: Additional fields of the document (e.g. the job's token usage)
+        
+        Returns:
+            The status document
+        """
+        document = {
+            "request_id": job["request_id"],
+            "job": job["type"],
+            "status": status,
+            "updated_at": time.time(),
+            **details
+        }
+        if error is not None:
+            document["error"] = error
+            document["status_code"] = status_code or 500
+        await self.azure_blob_service.upload_json(document, paths[JOB_TYPES[job["type"]]["status"]])
+        return document
+    
+    async def get_status(self, job_type, paths):
+        """
+        Read a job's status document
+        
+        Args:
+            job_type: One of JOB_TYPES
+            paths: Request paths from Config.get_file_paths
+        
+        Returns:
+            The status document, or None if no job was submitted for the request
+        """
+        return await self.azure_blob_service.download_json_if_exists(paths[JOB_TYPES[job_type]["status"]])
+    
+    async def wait_for_job(self, job_type, paths, timeout):
+        """
+        Wait (long poll) until a job is no longer queued or running
+        
+        A job processed on this instance is awaited directly; otherwise the
+        status document is polled with a growing interval.
+        
+        Args:
+            job_type: One of JOB_TYPES
+            paths: Request paths from Config.get_file_paths
+            timeout: Maximum number of seconds to wait
+        
+        Returns:
+            The last status document read, or None if no job was submitted for the request
+        """
+        deadline = time.monotonic() + timeout
+        interval = 0.5
+        while True:
+            await wait_for_pending_write(paths[JOB_TYPES[job_type]["output"]], timeout=max(0, deadline - time.monotonic()))
+            status = await self.get_status(job_type, paths)
+            remaining = deadline - time.monotonic()
+            if status is None or status["status"] not in ("queued", "running") or remaining <= 0:
+                return status
+            
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, 4)
+    
+    def get_stats(self):
+        """
+        Get job queue metrics
+        
+        Returns:
+            Dictionary of job queue counters
+        """
+        return self.job_queue.get_stats()
\ No newline at end of file
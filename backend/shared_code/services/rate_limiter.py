@@ -0,0 +1,264 @@
+"""
+Rate Limiter - Token-bucket admission control for Azure OpenAI calls
+"""
+
+import asyncio
+import math
+import threading
+import time
+
+class RateLimitExceeded(Exception):
+    """Raised when a model call cannot be admitted within the allowed wait"""
+    
+    status_code = 429
+    
+    def __init__(self, message, retry_after=1):
+        """
+        Initialize the exception
+        
+        Args:
+            message: Error message
+            retry_after: Seconds after which the client should retry
+        """
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+def estimate_prompt_tokens(messages, image_tokens=0):
+    """
+    Estimate the prompt tokens of chat messages without a tokenizer
+    
+    Text is estimated at four characters per token plus a small per-message
+    overhead; images are not part of the text and are passed in separately
+    (see image_utils.estimate_image_tokens).
+    
+    Args:
+        messages: Chat messages
+        image_tokens: Estimated tokens of the images in the messages
+    
+    Returns:
+        Estimated number of prompt tokens
+    """
+    characters = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            characters += len(content)
+        elif isinstance(content, list):
+            characters += sum(len(part.get("text", "")) for part in content if part.get("type") == "text")
+    return math.ceil(characters / 4) + 4 * len(messages) + image_tokens
+
+class _Bucket:
+    """A token bucket refilled continuously at capacity per minute"""
+    
+    def __init__(self, per_minute):
+        """Create a full bucket holding per_minute units"""
+        self.capacity = per_minute
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+    
+    def refill(self, now):
+        """Add what has accrued since the last refill"""
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.capacity / 60)
+        self.updated_at = now
+    
+    def wait_time(self, amount):
+        """Seconds until the bucket holds amount (capped at its capacity)"""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.capacity)
+
+class RateLimiter:
+    """
+    Shared admission control for model calls, budgeting both requests and tokens
+    
+    Every call reserves one request and its estimated tokens (prompt plus
+    max_tokens, which is how Azure OpenAI counts a call against the TPM quota)
+    from two token buckets that refill continuously at the configured per-minute
+    rates. Calls wait in FIFO order while the buckets refill, and are shed
+    with RateLimitExceeded when the wait would exceed max_wait_seconds. The
+    x-ratelimit-remaining-* headers of each response lower the local budget
+    when other instances are spending the shared quota, and an upstream 429
+    pauses admission for its Retry-After.
+    """
+    
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_wait_seconds=10):
+        """
+        Initialize the rate limiter
+        
+        Args:
+            requests_per_minute: Request budget per minute (0 = unlimited)
+            tokens_per_minute: Token budget per minute (0 = unlimited)
+            max_wait_seconds: Longest a call may be queued before it is shed
+        """
+        self.max_wait_seconds = max_wait_seconds
+        self._requests = _Bucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+        
+        # The asyncio lock keeps waiters in FIFO order, the threading lock guards the counters
+        self._queue = asyncio.Lock()
+        self._lock = threading.Lock()
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "shed": 0,
+            "wait_seconds": 0.0,
+            "upstream_throttled": 0
+        }
+    
+    async def acquire(self, tokens):
+        """
+        Reserve budget for one model call, waiting for it if necessary
+        
+        Args:
+            tokens: Estimated tokens of the call (prompt plus max_tokens)
+        
+        Raises:
+            RateLimitExceeded: If the budget will not be available within max_wait_seconds
+        """
+        if self._requests is None and self._tokens is None and self._paused_until == 0.0:
+            self._increment("admitted")
+            return
+        
+        async with self._queue:
+            waited = 0.0
+            while True:
+                wait = self._reserve(tokens)
+                if wait == 0.0:
+                    break
+                if waited + wait > self.max_wait_seconds:
+                    self._increment("shed")
+                    raise RateLimitExceeded("Azure OpenAI rate limit reached, please retry later", retry_after=wait)
+                if waited == 0.0:
+                    self._increment("queued")
+                await asyncio.sleep(wait)
+                waited += wait
+        
+        with self._lock:
+            self._stats["admitted"] += 1
+            self._stats["wait_seconds"] += waited
+    
+    def try_acquire(self, tokens):
+        """
+        Reserve budget for one model call only if it is available right away
+        
+        Args:
+            tokens: Estimated tokens of the call (prompt plus max_tokens)
+        
+        Returns:
+            True if the budget was reserved, False if the call would have to wait
+        """
+        # Calls already queued for budget go first
+        if self._queue.locked() or self._reserve(tokens) > 0.0:
+            return False
+        self._increment("admitted")
+        return True
+    
+    def get_headroom(self):
+        """
+        Get the fraction of the budget that is currently available
+        
+        Returns:
+            Available fraction of the token budget (or the request budget if only
+            that is limited) between 0 and 1; 1.0 if the limiter is unlimited
+        """
+        bucket = self._tokens or self._requests
+        if bucket is None:
+            return 1.0 if time.monotonic() >= self._paused_until else 0.0
+        
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return 0.0
+            bucket.refill(now)
+            return max(0.0, bucket.level / bucket.capacity)
+    
+    def update_from_headers(self, headers):
+        """
+        Adapt the local budget to the remaining quota reported by Azure OpenAI
+        
+        Args:
+            headers: Response headers (x-ratelimit-remaining-requests / -tokens)
+        """
+        with self._lock:
+            now = time.monotonic()
+            for bucket, header in ((self._requests, "x-ratelimit-remaining-requests"),
+                                   (self._tokens, "x-ratelimit-remaining-tokens")):
+                remaining = _parse_number(headers.get(header))
+                if bucket is not None and remaining is not None:
+                    bucket.refill(now)
+                    bucket.level = min(bucket.level, remaining)
+    
+    def record_throttled(self, retry_after):
+        """
+        Pause admission after Azure OpenAI answered 429
+        
+        Args:
+            retry_after: Seconds Azure OpenAI asked us to wait
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._stats["upstream_throttled"] += 1
+    
+    def get_stats(self):
+        """
+        Get admission counters and the current budget
+        
+        Returns:
+            Dictionary with admitted/queued/shed counts, total wait and remaining budget
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            now = time.monotonic()
+            for name, bucket in (("requests_available", self._requests), ("tokens_available", self._tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    stats[name] = int(bucket.level)
+            stats["paused_for_seconds"] = round(max(0.0, self._paused_until - now), 3)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+    
+    def _reserve(self, tokens):
+        """Take the budget for a call if available; otherwise return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_time(amount))
+            if wait > 0.0:
+                return wait
+            
+            for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                if bucket is not None:
+                    bucket.level -= min(amount, bucket.capacity)
+            return 0.0
+    
+    def _increment(self, name):
+        """Increment a counter"""
+        with self._lock:
+            self._stats[name] += 1
+
+def _parse_number(value):
+    """Parse a numeric header value, returning None if it is missing or malformed"""
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+def get_retry_after(headers, default=1):
+    """
+    Read the delay requested by a 429 response
+    
+    Args:
+        headers: Response headers
+        default: Delay to use if the response does not specify one
+    
+    Returns:
+        Seconds to wait
+    """
+    retry_after_ms = _parse_number(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    retry_after = _parse_number(headers.get("retry-after"))
+    return retry_after if retry_after is not None else default
\ No newline at end of file
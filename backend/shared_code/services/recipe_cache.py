@@ -0,0 +1,168 @@
+"""
+Recipe Cache - Semantic cache for generated recipes keyed on normalized ingredients
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from .result_cache import ResultCache
+from ..utils.ingredient_utils import canonicalize_ingredients, jaccard_similarity
+
+class RecipeCache:
+    """Cache that reuses recipes generated for the same (or a very similar) set of ingredients"""
+    
+    def __init__(self, azure_blob_service=None, max_entries=256, ttl_seconds=86400, similarity_threshold=1.0):
+        """
+        Initialize the recipe cache
+        
+        Args:
+            azure_blob_service: Optional AzureBlobService used as the persistent tier
+            max_entries: Maximum number of entries kept in memory
+            ttl_seconds: Time-to-live of a cached response
+            similarity_threshold: Minimum Jaccard similarity between canonical ingredient
+                sets for a cached response to be reused (1.0 only reuses exact matches)
+        """
+        self.result_cache = ResultCache(
+            "recipes",
+            azure_blob_service=azure_blob_service,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds
+        )
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        
+        # Cache key -> (bucket, frozenset of canonical ingredients), used for similarity lookups
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0
+        }
+    
+    @staticmethod
+    def get_bucket(num_recipes, dietary_restrictions=None):
+        """
+        Get the part of the cache key that must match exactly
+        
+        Args:
+            num_recipes: Number of recipes requested
+            dietary_restrictions: List of dietary restriction dictionaries
+        
+        Returns:
+            String identifying the restrictions and recipe count
+        """
+        restrictions = sorted({
+            str(restriction.get('name', 'Unknown')).strip().lower()
+            for restriction in (dietary_restrictions or [])
+        })
+        return json.dumps({"num_recipes": num_recipes, "dietary_restrictions": restrictions})
+    
+    @staticmethod
+    def get_key(canonical_ingredients, bucket):
+        """
+        Get the cache key for a canonical ingredient list and bucket
+        
+        Args:
+            canonical_ingredients: Sorted list of canonical ingredient names
+            bucket: Bucket string from get_bucket
+        
+        Returns:
+            Hex-encoded cache key
+        """
+        payload = json.dumps({"bucket": bucket, "ingredients": canonical_ingredients})
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    async def get(self, ingredients, num_recipes=5, dietary_restrictions=None):
+        """
+        Look up cached recipes for an ingredient list
+        
+        Args:
+            ingredients: List of available ingredients
+            num_recipes: Number of recipes requested
+            dietary_restrictions: List of dietary restriction dictionaries
+        
+        Returns:
+            Cached recipe data or None on a miss
+        """
+        canonical = canonicalize_ingredients(ingredients)
+        bucket = self.get_bucket(num_recipes, dietary_restrictions)
+        key = self.get_key(canonical, bucket)
+        
+        value = await self.result_cache.get(key)
+        if value is not None:
+            self._remember(key, bucket, canonical)
+            self._increment("exact_hits")
+            return value
+        
+        if self.similarity_threshold < 1.0:
+            for candidate_key in self._find_similar(bucket, canonical):
+                value = await self.result_cache.get(candidate_key)
+                if value is not None:
+                    self._increment("similar_hits")
+                    return value
+        
+        self._increment("misses")
+        return None
+    
+    async def set(self, ingredients, recipes_data, num_recipes=5, dietary_restrictions=None):
+        """
+        Store generated recipes for an ingredient list
+        
+        Args:
+            ingredients: List of available ingredients
+            recipes_data: Recipe data returned by the model
+            num_recipes: Number of recipes requested
+            dietary_restrictions: List of dietary restriction dictionaries
+        """
+        canonical = canonicalize_ingredients(ingredients)
+        bucket = self.get_bucket(num_recipes, dietary_restrictions)
+        key = self.get_key(canonical, bucket)
+        
+        await self.result_cache.set(key, recipes_data)
+        self._remember(key, bucket, canonical)
+    
+    def get_stats(self):
+        """
+        Get hit/miss counters for this cache
+        
+        Returns:
+            Dictionary with exact/similar hit counts, hit rate and storage tier counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["indexed"] = len(self._index)
+        
+        lookups = stats["exact_hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+        stats["similarity_threshold"] = self.similarity_threshold
+        stats["storage"] = self.result_cache.get_stats()
+        return stats
+    
+    def _find_similar(self, bucket, canonical):
+        """Return indexed keys in the same bucket, most similar first, above the threshold"""
+        ingredients = frozenset(canonical)
+        with self._lock:
+            candidates = [
+                (jaccard_similarity(ingredients, indexed), key)
+                for key, (indexed_bucket, indexed) in self._index.items()
+                if indexed_bucket == bucket
+            ]
+        
+        candidates = [c for c in candidates if c[0] >= self.similarity_threshold]
+        candidates.sort(reverse=True)
+        return [key for _, key in candidates]
+    
+    def _remember(self, key, bucket, canonical):
+        """Record a key's ingredient set for similarity lookups"""
+        with self._lock:
+            self._index[key] = (bucket, frozenset(canonical))
+            self._index.move_to_end(key)
+            while len(self._index) > self.max_entries:
+                self._index.popitem(last=False)
+    
+    def _increment(self, counter):
+        """Increment one of the cache counters"""
+        with self._lock:
+            self._stats[counter] += 1
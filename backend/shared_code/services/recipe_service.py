@@ -2,26 +2,68 @@
 Recipe Service - Service for generating recipe suggestions based on ingredients
 """
 
+import asyncio
+import hashlib
 import json
-import pandas as pd
-from ..prompts.recipe_prompt import get_recipe_system_prompt
+import logging
+import threading
+import time
+from ..models import Recipe, RecipeCollection, TokenUsage
+from ..prompts.recipe_prompt import get_recipe_diversity_hints, get_recipe_system_prompt
+from ..utils.schema_utils import get_structured_response_format, validate_json
+from .rate_limiter import RateLimitExceeded
+from .resilience import CircuitOpenError
+from .single_flight import SingleFlight
+
+# Completion budget of a single request for all recipes, and per recipe when generation is fanned out
+MAX_TOKENS = 4000
+MAX_TOKENS_PER_RECIPE = 1000
 
 class RecipeService:
     """Service for generating recipes based on available ingredients"""
     
-    def __init__(self, azure_openai_client, azure_blob_service=None):
+    def __init__(self, azure_openai_client, azure_blob_service=None, recipe_cache=None, model_name=None,
+                 fast_model_name=None, structured_outputs=True, fanout=None):
         """
         Initialize the Recipe Service
         
         Args:
             azure_openai_client: An initialized AzureOpenAIClientService object
             azure_blob_service: An initialized AzureBlobService object
+            recipe_cache: Optional RecipeCache used to reuse recipes for similar ingredient sets
+            model_name: Recipe model deployment (None = the deployment's default model)
+            fast_model_name: Optional smaller model tried first by generate_recipes; its output
+                is only replaced by the recipe model's if it fails validation
+            structured_outputs: Whether the model is held to the recipe JSON Schema (strict
+                structured outputs) rather than just asked for a JSON object
+            fanout: Optional fan-out configuration ({"enabled", "recipes_per_call"}); when enabled,
+                recipes are requested in concurrent calls of recipes_per_call recipes each
         """
-        self.client = azure_openai_client.get_client()
-        self.model_name = azure_openai_client.get_model_name()
+        self.azure_openai_client = azure_openai_client
         self.azure_blob_service = azure_blob_service
+        self.recipe_cache = recipe_cache
+        self.model_name = model_name
+        self.fast_model_name = fast_model_name
+        self.fanout = fanout or {"enabled": False, "recipes_per_call": 1}
+        
+        self.recipe_schema = Recipe.json_schema()
+        if structured_outputs:
+            self.response_format = get_structured_response_format("recipes", RecipeCollection.json_schema())
+        else:
+            self.response_format = {"type": "json_object"}
+        
+        self._stats_lock = threading.Lock()
+        self._tier_stats = {}
+        self._validation_stats = {
+            "invalid_recipes": 0,
+            "duplicate_recipes": 0,
+            "repair_calls": 0
+        }
+        
+        # Identical requests arriving at the same time share one generation
+        self.single_flight = SingleFlight()
     
-    def load_ingredients(self, blob_path):
+    async def load_ingredients(self, blob_path):
         """
         Load and flatten ingredients from JSON in Azure Blob Storage
         
@@ -29,46 +71,417 @@ class RecipeService:
             blob_path: Path to the blob containing ingredients JSON
             
         Returns:
-            List of ingredient strings
+            List of ingredient strings, or None if the blob does not exist
         """
         try:
             # Download the JSON from Azure Blob Storage
-            data = self.azure_blob_service.download_json(blob_path)
-            
-            # Extract ingredients from the full response
-            # Check if it's a full API response or just the ingredients
-            if 'result' in data and 'ingredients' in data['result']:
-                ingredients_data = data['result']['ingredients']
-            elif 'ingredients' in data:
-                ingredients_data = data['ingredients']
-            else:
-                raise ValueError("Could not find ingredients in the JSON file")
-            
-            # Flatten the ingredients list
-            all_ingredients = []
-            for category, items in ingredients_data.items():
-                all_ingredients.extend(items)
+            data = await self.azure_blob_service.download_json_if_exists(blob_path)
+            if data is None:
+                return None
             
-            return all_ingredients
+            return self.extract_ingredients(data)
         except Exception as e:
             raise Exception(f"Error loading ingredients: {str(e)}")
     
-    def generate_recipes(self, ingredients, num_recipes=5, dietary_restrictions=None):
+    def extract_ingredients(self, analysis_data):
+        """
+        Flatten the ingredients of an image analysis into a single list
+        
+        Args:
+            analysis_data: Analysis result (or a full API response containing it under "result")
+        
+        Returns:
+            List of ingredient strings
+        
+        Raises:
+            ValueError: If the data contains no ingredients
+        """
+        # Check if it's a full API response or just the ingredients
+        if 'result' in analysis_data and 'ingredients' in analysis_data['result']:
+            ingredients_data = analysis_data['result']['ingredients']
+        elif 'ingredients' in analysis_data:
+            ingredients_data = analysis_data['ingredients']
+        else:
+            raise ValueError("Could not find ingredients in the JSON file")
+        
+        # Flatten the ingredients list
+        all_ingredients = []
+        for category, items in ingredients_data.items():
+            all_ingredients.extend(items)
+        
+        return all_ingredients
+    
+    async def generate_recipes(self, ingredients, num_recipes=5, dietary_restrictions=None, usage=None):
         """
         Generate recipe suggestions using Azure OpenAI API
         
+        Responses are cached on the normalized ingredient set, so fridges with
+        the same (or nearly the same) contents reuse earlier suggestions. If a
+        fast model is configured it is tried first, and the request escalates
+        to the recipe model only when the fast model's output is invalid.
+        Recipes from the recipe model that fail validation are dropped and
+        only those are requested again, in one smaller follow-up call. With
+        fan-out enabled each model is asked for the recipes in several
+        concurrent small calls (see _generate), so the wait is that of the
+        slowest small call rather than of one long completion. A request
+        identical to one still in progress (see get_request_key) waits for
+        that one's recipes instead of generating its own.
+        
         Args:
             ingredients: List of available ingredients
             num_recipes: Number of recipes to generate
             dietary_restrictions: List of dietary restrictions to consider
+            usage: Optional TokenUsage that the tokens spent on these recipes are added to (nothing
+                for a cache hit or a request shared with an identical one already in flight)
             
         Returns:
             Dictionary containing recipe suggestions
         """
+        if self.recipe_cache is not None:
+            cached_recipes = await self.recipe_cache.get(ingredients, num_recipes, dietary_restrictions)
+            if cached_recipes is not None:
+                logging.info("Recipe cache hit")
+                return cached_recipes
+        
+        return await self.single_flight.do(
+            self.get_request_key(ingredients, num_recipes, dietary_restrictions),
+            lambda: self._generate_uncached(ingredients, num_recipes, dietary_restrictions, usage)
+        )
+    
+    def get_request_key(self, ingredients, num_recipes=5, dietary_restrictions=None):
+        """
+        Get a key identifying recipe requests that would be answered the same way
+        
+        Args:
+            ingredients: List of available ingredients
+            num_recipes: Number of recipes to generate
+            dietary_restrictions: List of dietary restrictions to consider
+        
+        Returns:
+            Hex digest of the normalized ingredients and parameters
+        """
+        request = {
+            "ingredients": sorted(str(ingredient).strip().lower() for ingredient in ingredients),
+            "num_recipes": num_recipes,
+            "dietary_restrictions": dietary_restrictions or []
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    
+    async def _generate_uncached(self, ingredients, num_recipes, dietary_restrictions, usage=None):
+        """Generate recipes with the model and cache them (see generate_recipes)"""
+        recipes_data = None
+        if self.fast_model_name:
+            try:
+                recipes, errors = await self._generate(
+                    ingredients, num_recipes, dietary_restrictions, "fast", self.fast_model_name, usage=usage
+                )
+                if errors or not recipes:
+                    raise ValueError("; ".join(errors[:5]) or "no recipes")
+                recipes_data = {"recipes": recipes}
+            except (RateLimitExceeded, CircuitOpenError):
+                raise
+            except Exception as e:
+                logging.info(f"Escalating recipe generation to the recipe model: {str(e)}")
+                self._record_tier("fast", escalated=True)
+            
+        if recipes_data is None:
+            try:
+                recipes, errors = await self._generate(
+                    ingredients, num_recipes, dietary_restrictions, "primary", self.model_name, usage=usage
+                )
+                if errors and len(recipes) < num_recipes:
+                    recipes.extend(await self._request_replacements(
+                        ingredients, num_recipes - len(recipes), dietary_restrictions, recipes, usage=usage
+                    ))
+                if not recipes:
+                    raise ValueError(f"No valid recipes in the model output ({'; '.join(errors[:5])})")
+                recipes_data = {"recipes": recipes}
+            except (RateLimitExceeded, CircuitOpenError):
+                raise
+            except Exception as e:
+                raise Exception(f"Error generating recipes: {str(e)}")
+        
+        if self.recipe_cache is not None:
+            await self.recipe_cache.set(ingredients, recipes_data, num_recipes, dietary_restrictions)
+        
+        return recipes_data
+    
+    async def _generate(self, ingredients, num_recipes, dietary_restrictions, tier, model_name, usage=None):
+        """
+        Request recipes from one model tier, fanned out over concurrent calls if enabled
+        
+        The calls' recipes are merged and deduplicated by name; duplicates are
+        reported as validation errors so the caller can request replacements.
+        A failed call only fails the whole request if no call returned a recipe.
+        
+        Args:
+            ingredients: List of available ingredients
+            num_recipes: Number of recipes to generate
+            dietary_restrictions: List of dietary restrictions to consider
+            tier: Tier name used in the statistics ("fast" or "primary")
+            model_name: Model deployment of the tier
+            usage: Optional TokenUsage that the calls' tokens are added to
+        
+        Returns:
+            Tuple of (list of valid, distinct recipes, list of validation errors)
+        """
+        chunks = self._plan_chunks(num_recipes)
+        results = await asyncio.gather(
+            *[
+                self._request_chunk(ingredients, count, dietary_restrictions, hint, tier, model_name, usage=usage)
+                for count, hint in chunks
+            ],
+            return_exceptions=True
+        )
+        
+        recipes = []
+        errors = []
+        failure = None
+        for result in results:
+            if isinstance(result, Exception):
+                failure = failure or result
+                errors.append(f"$: {str(result)}")
+                continue
+            recipes.extend(result[0])
+            errors.extend(result[1])
+        if failure is not None and not recipes:
+            raise failure
+        
+        distinct = []
+        seen = set()
+        for recipe in recipes:
+            if self._recipe_key(recipe) in seen:
+                errors.extend(self._duplicate_errors(recipe))
+                continue
+            seen.add(self._recipe_key(recipe))
+            distinct.append(recipe)
+        return distinct, errors
+    
+    async def _request_chunk(self, ingredients, count, dietary_restrictions, hint, tier, model_name, usage=None):
+        """Request one call's share of the recipes, with a completion budget sized to it"""
+        messages = self._build_messages(ingredients, count, dietary_restrictions, hint=hint)
+        max_tokens = MAX_TOKENS if hint is None else min(MAX_TOKENS, count * MAX_TOKENS_PER_RECIPE)
+        return await self._request_valid_recipes(messages, tier, model_name, max_tokens=max_tokens, usage=usage)
+    
+    def _plan_chunks(self, num_recipes):
+        """
+        Split a recipe request into the calls it is fanned out into
+        
+        Args:
+            num_recipes: Number of recipes to generate
+        
+        Returns:
+            List of (number of recipes, diversity hint) tuples; a single
+            (num_recipes, None) when fan-out is disabled or not worthwhile
+        """
+        per_call = self.fanout["recipes_per_call"]
+        if not self.fanout["enabled"] or num_recipes <= per_call:
+            return [(num_recipes, None)]
+        
+        hints = get_recipe_diversity_hints()
+        chunks = []
+        remaining = num_recipes
+        while remaining > 0:
+            count = min(per_call, remaining)
+            chunks.append((count, hints[len(chunks) % len(hints)]))
+            remaining -= count
+        return chunks
+    
+    def _recipe_key(self, recipe):
+        """Key under which recipes count as duplicates (case-insensitive name)"""
+        return " ".join(str(recipe.get("name", "")).lower().split())
+    
+    def _duplicate_errors(self, recipe):
+        """Record a duplicate recipe and describe it as a validation error"""
+        with self._stats_lock:
+            self._validation_stats["duplicate_recipes"] += 1
+        return [f"$.recipe.name: duplicate of {recipe.get('name')}"]
+    
+    async def _request_recipes(self, messages, tier, model_name, max_tokens=MAX_TOKENS, usage=None):
+        """
+        Request recipes from one model tier, recording its latency and token usage
+        
+        Args:
+            messages: Chat messages from _build_messages
+            tier: Tier name used in the statistics ("fast" or "primary")
+            model_name: Model deployment of the tier
+            max_tokens: Completion budget of the call
+            usage: Optional TokenUsage that the call's tokens are added to
+        
+        Returns:
+            Parsed recipe data
+        
+        Raises:
+            ValueError: If the model refused, ran out of tokens or its output is not JSON
+        """
+        started = time.monotonic()
+        response = await self.azure_openai_client.create_chat_completion(
+            messages=messages,
+            max_tokens=max_tokens,
+            model=model_name,
+            response_format=self.response_format
+        )
+        call_usage = TokenUsage()
+        call_usage.add(getattr(response, "usage", None))
+        self._record_tier(tier, latency=time.monotonic() - started, usage=call_usage)
+        if usage is not None:
+            usage.merge(call_usage)
+        
+        choice = response.choices[0]
+        if getattr(choice.message, "refusal", None):
+            raise ValueError(f"The model refused: {choice.message.refusal}")
+        if choice.finish_reason == "length":
+            # Never salvage (or cache) recipes from a response cut off at the token limit
+            raise ValueError(f"The model output was cut off at {max_tokens} tokens")
+        return json.loads(choice.message.content)
+    
+    async def _request_valid_recipes(self, messages, tier, model_name, max_tokens=MAX_TOKENS, usage=None):
+        """
+        Request recipes and keep the ones that are valid
+        
+        Args:
+            messages: Chat messages from _build_messages
+            tier: Tier name used in the statistics
+            model_name: Model deployment of the tier
+            max_tokens: Completion budget of the call
+            usage: Optional TokenUsage that the call's tokens are added to
+        
+        Returns:
+            Tuple of (list of valid recipes, list of validation errors)
+        """
+        try:
+            recipes_data = await self._request_recipes(messages, tier, model_name, max_tokens=max_tokens, usage=usage)
+        except ValueError as e:
+            return [], [f"$: {str(e)}"]
+        return self.split_valid_recipes(recipes_data)
+    
+    async def _request_replacements(self, ingredients, count, dietary_restrictions, recipes, usage=None):
+        """
+        Request new recipes in place of the ones that failed validation
+        
+        Args:
+            ingredients: List of available ingredients
+            count: Number of recipes to replace
+            dietary_restrictions: List of dietary restrictions to consider
+            recipes: Valid recipes so far (not to be repeated)
+            usage: Optional TokenUsage that the call's tokens are added to
+        
+        Returns:
+            List of at most count valid recipes that do not repeat the given ones
+        """
+        with self._stats_lock:
+            self._validation_stats["repair_calls"] += 1
+        
+        messages = self._build_messages(
+            ingredients, count, dietary_restrictions, exclude=[recipe["name"] for recipe in recipes]
+        )
+        replacements, _ = await self._request_valid_recipes(messages, "primary", self.model_name, usage=usage)
+        seen = {self._recipe_key(recipe) for recipe in recipes}
+        return [recipe for recipe in replacements if self._recipe_key(recipe) not in seen][:count]
+    
+    def check_recipe(self, recipe):
+        """
+        Repair and validate a single recipe against the Recipe schema
+        
+        Args:
+            recipe: Recipe dictionary as returned by the model
+        
+        Returns:
+            Tuple of (repaired recipe, list of validation errors)
+        """
+        recipe = Recipe.normalize(recipe)
+        errors = validate_json(recipe, self.recipe_schema, "$.recipe")
+        if errors:
+            with self._stats_lock:
+                self._validation_stats["invalid_recipes"] += 1
+        return recipe, errors
+    
+    def split_valid_recipes(self, recipes_data):
+        """
+        Repair and validate recipe data recipe by recipe
+        
+        Args:
+            recipes_data: Parsed recipe data ({"recipes": [...]})
+        
+        Returns:
+            Tuple of (list of valid recipes, list of validation errors)
+        """
+        if not isinstance(recipes_data, dict) or not isinstance(recipes_data.get("recipes"), list):
+            return [], ["$.recipes: missing or not an array"]
+        
+        valid = []
+        errors = []
+        for recipe in recipes_data["recipes"]:
+            recipe, recipe_errors = self.check_recipe(recipe)
+            if recipe_errors:
+                errors.extend(recipe_errors)
+            else:
+                valid.append(recipe)
+        return valid, errors
+    
+    def get_stats(self):
+        """
+        Get model call counters for each recipe model tier and validation counters
+        
+        Returns:
+            Dictionary with "tiers" (tier name to calls, escalations, average latency and
+            token usage), "validation" (invalid and duplicate recipes, repair calls) and
+            "single_flight" (requests coalesced with an identical one in flight)
+        """
+        with self._stats_lock:
+            tiers = {}
+            for tier, stats in self._tier_stats.items():
+                calls = stats["calls"]
+                tiers[tier] = {
+                    "calls": calls,
+                    "escalations": stats["escalations"],
+                    "avg_latency_seconds": round(stats["latency_seconds"] / calls, 3) if calls else 0.0,
+                    "usage": stats["usage"].to_dict()
+                }
+            validation = dict(self._validation_stats)
+        return {"tiers": tiers, "validation": validation, "single_flight": self.single_flight.get_stats()}
+    
+    def _record_tier(self, tier, latency=None, usage=None, escalated=False):
+        """Add a model call (or an escalation away from the tier) to the tier's statistics"""
+        with self._stats_lock:
+            stats = self._tier_stats.setdefault(tier, {
+                "calls": 0,
+                "escalations": 0,
+                "latency_seconds": 0.0,
+                "usage": TokenUsage()
+            })
+            if escalated:
+                stats["escalations"] += 1
+            if latency is not None:
+                stats["calls"] += 1
+                stats["latency_seconds"] += latency
+            if usage is not None:
+                stats["usage"].merge(usage)
+    
+    def _build_messages(self, ingredients, num_recipes, dietary_restrictions=None, exclude=None, hint=None):
+        """
+        Build the chat messages for a recipe generation request
+        
+        Args:
+            ingredients: List of available ingredients
+            num_recipes: Number of recipes to generate
+            dietary_restrictions: List of dietary restrictions to consider
+            exclude: Names of recipes that should not be suggested again
+            hint: Optional diversity hint restricting the request to one kind of recipe
+            
+        Returns:
+            List of chat messages (system and user prompt)
+        """
         ingredients_str = ", ".join(ingredients)
         
         # Build user prompt with dietary restrictions if provided
-        user_prompt = f"""Here are the ingredients I have available: {ingredients_str}. 
+        if hint:
+            # Fanned-out requests each ask for one kind of recipe so that they do not overlap
+            user_prompt = f"""Here are the ingredients I have available: {ingredients_str}. 
+Please suggest {num_recipes} {'recipe' if num_recipes == 1 else 'diverse recipes'} that I could make with these ingredients. 
+Suggest only recipes that {hint}. Focus on wholesome, flavorful dishes."""
+        else:
+            user_prompt = f"""Here are the ingredients I have available: {ingredients_str}. 
 Please suggest {num_recipes} diverse recipes that I could make with these ingredients. 
 Include some recipes that use most of what I have, and some creative options that might 
 require a few additional ingredients. Focus on wholesome, flavorful dishes."""
@@ -84,23 +497,19 @@ require a few additional ingredients. Focus on wholesome, flavorful dishes."""
 IMPORTANT: I have the following dietary restrictions that must be strictly followed: {restrictions_str}.
 Make sure ALL recipe suggestions comply with these restrictions.
 """
+        
+        # Replacement requests must not repeat the recipes that are already valid
+        if exclude:
+            user_prompt += f"""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": get_recipe_system_prompt()},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=4000,
-                response_format={"type": "json_object"}
-            )
-            
-            return json.loads(response.choices[0].message.content)
-        except Exception as e:
-            raise Exception(f"Error generating recipes: {str(e)}")
+Do not suggest any of these recipes again: {', '.join(exclude)}."""
+
+        return [
+            {"role": "system", "content": get_recipe_system_prompt()},
+            {"role": "user", "content": user_prompt}
+        ]
     
-    def save_recipes(self, recipes_data, blob_path):
+    async def save_recipes(self, recipes_data, blob_path):
         """
         Save recipes to Azure Blob Storage
         
@@ -111,17 +520,36 @@ Make sure ALL recipe suggestions comply with these restrictions.
         Returns:
             URL to the saved JSON file
         """
-        return self.azure_blob_service.upload_json(recipes_data, blob_path)
+        return await self.azure_blob_service.upload_json(recipes_data, blob_path)
+    
+    def build_recipes_response(self, recipes_data, ingredient_count, dietary_restrictions=None):
+        """
+        Build the full recipes response that is returned to clients and saved to storage
+        
+        Args:
+            recipes_data: Recipe data from generate_recipes
+            ingredient_count: Number of ingredients the recipes were generated from
+            dietary_restrictions: List of dietary restrictions that were applied
+            
+        Returns:
+            Dictionary with recipes, per-recipe analysis and request details
+        """
+        return {
+            "items": recipes_data["recipes"],
+            "analysis": self.get_recipes_analysis(recipes_data),
+            "ingredient_count": ingredient_count,
+            "dietary_restrictions": dietary_restrictions if dietary_restrictions else []
+        }
     
     def get_recipes_analysis(self, recipes_data):
         """
-        Create a DataFrame with recipe analysis
+        Create a per-recipe analysis (one record per recipe)
         
         Args:
             recipes_data: Recipe data from generate_recipes
             
         Returns:
-            DataFrame with recipe analysis or None if no recipes
+            List of dictionaries with recipe analysis (empty if no recipes)
         """
         # Check if recipes_data is already the full response or just the recipes
         if isinstance(recipes_data, dict) and "recipes" in recipes_data:
@@ -131,15 +559,13 @@ Make sure ALL recipe suggestions comply with these restrictions.
         else:
             recipes_list = []
         
-        if not recipes_list:
-            return None
-        
-        return pd.DataFrame([{
-            "recipe_name": r["name"],
-            "completeness": r["completeness_score"],
-            "available_count": len(r["available_ingredients"]),
-            "missing_count": len(r["missing_ingredients"]),
-            "total_ingredients": len(r["total_ingredients"]),
-            "cooking_time": r["cooking_time"],
-            "difficulty": r["difficulty"]
-        } for r in recipes_list])
\ No newline at end of file
+        # Recipes are validated when generated, but stored responses may predate validation
+        return [{
+            "recipe_name": r.get("name"),
+            "completeness": r.get("completeness_score"),
+            "available_count": len(r.get("available_ingredients") or []),
+            "missing_count": len(r.get("missing_ingredients") or []),
+            "total_ingredients": len(r.get("total_ingredients") or []),
+            "cooking_time": r.get("cooking_time"),
+            "difficulty": r.get("difficulty")
+        } for r in recipes_list if isinstance(r, dict)]
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""
+Recipe Speculation - Recipe generation started ahead of the request, right after an image analysis
+"""
+
+import asyncio
+import threading
+import time
+from ..utils.background import run_in_background, wait_for_pending_write
+
+class RecipeSpeculator:
+    """
+    Generates recipes with the default parameters as soon as an image has been analyzed
+    
+    Most users ask for recipes, without dietary restrictions, right after the
+    analysis comes back. start() queues a "speculate_recipes" job for that
+    request; claim() hands its result to GenerateRecipes when the request's
+    parameters match (waiting for the job if it is still running) and
+    records a miss otherwise. The speculative recipes are kept in their own
+    blob, so a speculation that finishes late never overwrites the recipes
+    of a request with other parameters.
+    
+    A speculation is claimed by creating its claim blob conditionally, so
+    only one request (on any instance) ever takes it. Its tokens are counted
+    exactly once, as used or wasted, by whoever creates its "settled" blob:
+    the request that used it, or, for speculations that were missed, not
+    waited for or never claimed within ttl_seconds, the instance that ran
+    the job (on completion or when the speculation expires).
+    """
+    
+    def __init__(self, job_service, azure_blob_service, num_recipes=5, wait_seconds=15, ttl_seconds=600):
+        """
+        Initialize the speculator
+        
+        Args:
+            job_service: An initialized JobService object
+            azure_blob_service: An initialized AzureBlobService object
+            num_recipes: Number of recipes generated speculatively (the GenerateRecipes default)
+            wait_seconds: Longest a matching request waits for a speculation still in progress
+            ttl_seconds: How long finished speculative recipes wait to be claimed before they expire
+        """
+        self.job_service = job_service
+        self.azure_blob_service = azure_blob_service
+        self.num_recipes = num_recipes
+        self.wait_seconds = wait_seconds
+        self.ttl_seconds = max(ttl_seconds, wait_seconds)
+        
+        self._lock = threading.Lock()
+        self._stats = {
+            "started": 0,
+            "hits": 0,
+            "misses": 0,
+            "fallbacks": 0,
+            "expired": 0,
+            "used_tokens": 0,
+            "wasted_tokens": 0
+        }
+    
+    async def start(self, paths, ingredients):
+        """
+        Queue the speculative generation for a request
+        
+        Args:
+            paths: Request paths from Config.get_file_paths
+            ingredients: Flattened ingredient list of the analysis
+        """
+        await self.job_service.submit(
+            "speculate_recipes", paths, ingredients=ingredients, num_recipes=self.num_recipes
+        )
+        self._increment("started")
+    
+    async def claim(self, paths, num_recipes, dietary_restrictions):
+        """
+        Take the speculative recipes of a request, if they answer the given parameters
+        
+        A speculation is claimed at most once, so asking for recipes again
+        generates new ones.
+        
+        Args:
+            paths: Request paths from Config.get_file_paths
+            num_recipes: Number of recipes requested
+            dietary_restrictions: Dietary restrictions requested
+        
+        Returns:
+            Recipe data ({"recipes": [...]}), or None if the request must generate its own recipes
+        """
+        # The speculation may still be being queued in the background on this instance
+        await wait_for_pending_write(paths["speculation_status"])
+        status = await self.job_service.get_status("speculate_recipes", paths)
+        if status is None:
+            return None
+        
+        matches = num_recipes == self.num_recipes and not dietary_restrictions
+        claimed = await self.azure_blob_service.create_json(
+            {"outcome": "match" if matches else "miss", "claimed_at": time.time()}, paths["speculation_claim"]
+        )
+        if not claimed:
+            # Claimed by an earlier request, or expired
+            return None
+        
+        if not matches:
+            self._increment("misses")
+            if status["status"] == "complete":
+                await self._settle(paths, "wasted", status)
+            return None
+        
+        status = await self.job_service.wait_for_job("speculate_recipes", paths, self.wait_seconds)
+        recipes_data = None
+        if status is not None and status["status"] == "complete":
+            recipes_data = await self.azure_blob_service.download_json_if_exists(paths["speculative_recipes"], fresh=True)
+        if recipes_data is None:
+            self._increment("fallbacks")
+            if status is not None and status["status"] == "complete":
+                await self._settle(paths, "wasted", status)
+            return None
+        
+        self._increment("hits")
+        await self._settle(paths, "used", status)
+        return recipes_data
+    
+    async def on_complete(self, paths, total_tokens):
+        """
+        Account a speculation that just finished, unless a request is (or may still be) using it
+        
+        A speculation already missed or given up on is wasted right away;
+        otherwise it expires (and is wasted) if still unclaimed after
+        ttl_seconds.
+        
+        Args:
+            paths: Request paths from Config.get_file_paths
+            total_tokens: Tokens the speculation used
+        """
+        status = {"usage": {"total_tokens": total_tokens}}
+        claim = await self.azure_blob_service.download_json_if_exists(paths["speculation_claim"], fresh=True)
+        if claim is not None and claim.get("outcome") == "miss":
+            await self._settle(paths, "wasted", status)
+            return
+        
+        run_in_background(self._expire(paths, status), f"expire speculation {paths['request_id']}")
+    
+    async def _expire(self, paths, status):
+        """Expire an unclaimed speculation after ttl_seconds (a claimed one is settled by its request)"""
+        await asyncio.sleep(self.ttl_seconds)
+        if await self.azure_blob_service.create_json({"outcome": "expired", "claimed_at": time.time()}, paths["speculation_claim"]):
+            self._increment("expired")
+        # A request that used the speculation settled it long before; any other outcome wastes it
+        await self._settle(paths, "wasted", status)
+    
+    async def _settle(self, paths, outcome, status):
+        """Count a speculation's tokens as used or wasted, unless it has been counted already"""
+        total_tokens = (status.get("usage") or {}).get("total_tokens", 0)
+        settled = await self.azure_blob_service.create_json(
+            {"outcome": outcome, "total_tokens": total_tokens, "settled_at": time.time()}, paths["speculation_settled"]
+        )
+        if settled:
+            self._increment(f"{outcome}_tokens", total_tokens)
+    
+    def get_stats(self):
+        """
+        Get speculation counters
+        
+        Returns:
+            Dictionary with started/hits/misses/fallbacks/expired counts, the hit rate among
+            claimed speculations and the tokens of used and wasted speculations
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        claimed = stats["hits"] + stats["misses"] + stats["fallbacks"]
+        stats["hit_rate"] = round(stats["hits"] / claimed, 3) if claimed else 0.0
+        return stats
+    
+    def _increment(self, name, amount=1):
+        """Increment a counter"""
+        with self._lock:
+            self._stats[name] += amount
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Request Index - In-memory index of the artifacts stored for each request
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class RequestIndex:
+    """
+    Per-instance index of which artifacts exist for each request_id
+    
+    Request artifacts (image, ingredients, recipes, ...) live directly in the
+    request folder and never change location, so once an upload or download
+    has seen one, its path, size, ETag and content type can be remembered.
+    Artifacts known to be missing are remembered for a short time as well, so
+    repeated polls for results that do not exist yet are answered without a
+    storage round trip. Blob Storage remains the source of truth: entries are
+    only ever a hint about what is there. Both kinds of entries expire, since
+    blobs can be deleted (e.g. by lifecycle cleanup) or written by other
+    instances; callers that know an entry is outdated drop it with invalidate().
+    """
+    
+    def __init__(self, max_requests=1024, negative_ttl_seconds=5, positive_ttl_seconds=300):
+        """
+        Initialize the request index
+        
+        Args:
+            max_requests: Maximum number of requests tracked (least recently used are dropped)
+            negative_ttl_seconds: How long an artifact known to be missing is trusted (0 disables)
+            positive_ttl_seconds: How long an artifact known to exist (and its ETag) is trusted (0 disables)
+        """
+        self.max_requests = max_requests
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.positive_ttl_seconds = positive_ttl_seconds
+        
+        self._requests = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+    
+    @staticmethod
+    def split_blob_path(blob_path):
+        """
+        Split a blob path into its request_id and artifact name
+        
+        Args:
+            blob_path: Path to the blob within the container
+        
+        Returns:
+            Tuple of (request_id, artifact name), or None if the path is not a request artifact
+        """
+        parts = blob_path.split("/")
+        if len(parts) != 2 or not all(parts):
+            return None
+        return parts[0], parts[1]
+    
+    def record(self, blob_path, size=None, etag=None, content_type=None, content_encoding=None):
+        """
+        Record that an artifact exists
+        
+        Args:
+            blob_path: Path to the blob within the container
+            size: Size of the blob in bytes (as stored)
+            etag: ETag of the blob
+            content_type: Content type of the blob
+            content_encoding: Content encoding the blob is stored with, if compressed
+        """
+        self._store(blob_path, {
+            "path": blob_path,
+            "size": size,
+            "etag": etag,
+            "content_type": content_type,
+            "content_encoding": content_encoding,
+            "recorded_at": time.time()
+        })
+    
+    def invalidate(self, blob_path):
+        """
+        Forget what is known about an artifact, so the next read asks storage
+        
+        Args:
+            blob_path: Path to the blob within the container
+        """
+        split = self.split_blob_path(blob_path)
+        if split is None:
+            return
+        
+        request_id, name = split
+        with self._lock:
+            self._requests.get(request_id, {}).pop(name, None)
+    
+    def record_missing(self, blob_path):
+        """
+        Record that an artifact does not exist (trusted for negative_ttl_seconds)
+        
+        Args:
+            blob_path: Path to the blob within the container
+        """
+        if self.negative_ttl_seconds > 0:
+            self._store(blob_path, {"path": blob_path, "missing": True, "recorded_at": time.time()})
+    
+    def lookup(self, blob_path):
+        """
+        Look up what is known about an artifact
+        
+        Args:
+            blob_path: Path to the blob within the container
+        
+        Returns:
+            Dictionary describing the artifact ("missing": True if it is known not to exist),
+            or None if nothing (fresh) is known about it
+        """
+        split = self.split_blob_path(blob_path)
+        if split is None:
+            return None
+        
+        request_id, name = split
+        with self._lock:
+            entry = self._requests.get(request_id, {}).get(name)
+            if entry is not None:
+                ttl = self.negative_ttl_seconds if entry.get("missing") else self.positive_ttl_seconds
+                if time.time() - entry["recorded_at"] > ttl:
+                    del self._requests[request_id][name]
+                    entry = None
+            
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            
+            self._requests.move_to_end(request_id)
+            self._stats["negative_hits" if entry.get("missing") else "hits"] += 1
+            return dict(entry)
+    
+    def is_missing(self, blob_path):
+        """
+        Check whether an artifact is known not to exist
+        
+        Args:
+            blob_path: Path to the blob within the container
+        
+        Returns:
+            True only if a fresh negative entry exists for the artifact
+        """
+        entry = self.lookup(blob_path)
+        return entry is not None and entry.get("missing", False)
+    
+    def get_request_artifacts(self, request_id):
+        """
+        Get the artifacts known (and still trusted) to exist for a request
+        
+        Args:
+            request_id: ID of the request (its folder name)
+        
+        Returns:
+            Dictionary of artifact name to artifact description
+        """
+        oldest = time.time() - self.positive_ttl_seconds
+        with self._lock:
+            artifacts = self._requests.get(request_id, {})
+            return {
+                name: dict(entry)
+                for name, entry in artifacts.items()
+                if not entry.get("missing") and entry["recorded_at"] >= oldest
+            }
+    
+    def get_stats(self):
+        """
+        Get index counters
+        
+        Returns:
+            Dictionary with hit/miss counters, tracked requests and hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["requests"] = len(self._requests)
+        
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["negative_hits"]) / lookups if lookups else 0.0
+        return stats
+    
+    def _store(self, blob_path, entry):
+        """Store an entry for a request artifact, evicting the least recently used requests"""
+        split = self.split_blob_path(blob_path)
+        if split is None:
+            return
+        
+        request_id, name = split
+        with self._lock:
+            self._requests.setdefault(request_id, {})[name] = entry
+            self._requests.move_to_end(request_id)
+            while len(self._requests) > self.max_requests:
+                self._requests.popitem(last=False)
+                self._stats["evictions"] += 1
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""
+Resilience - Retries, hedging and circuit breaking around Azure OpenAI calls
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import deque
+from .rate_limiter import get_retry_after
+
+# Errors worth retrying, and the subset that counts against the deployment's health
+RETRYABLE_KINDS = ("throttled", "timeout", "connection", "server_error")
+FAILURE_KINDS = ("timeout", "connection", "server_error")
+
+class CircuitOpenError(Exception):
+    """Raised without calling the model while the circuit breaker is open"""
+    
+    status_code = 503
+    
+    def __init__(self, message, retry_after=1):
+        """
+        Initialize the exception
+        
+        Args:
+            message: Error message
+            retry_after: Seconds after which the client should retry
+        """
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+def classify_error(error):
+    """
+    Classify a model call error for the retry policy
+    
+    Args:
+        error: Exception raised by the call
+    
+    Returns:
+        "throttled" (429), "timeout", "connection" or "server_error" (5xx) if the
+        call is worth retrying, "client_error" for other error responses, None
+        for errors that did not come from the deployment
+    """
+    # Imported here so that handlers can import CircuitOpenError without loading the SDK
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+    
+    if isinstance(error, RateLimitError):
+        return "throttled"
+    if isinstance(error, (APITimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, APIConnectionError):
+        return "connection"
+    if isinstance(error, APIStatusError):
+        if error.status_code == 408:
+            return "timeout"
+        if error.status_code >= 500:
+            return "server_error"
+        return "client_error"
+    return None
+
+class CircuitBreaker:
+    """
+    Fails fast while a deployment is unhealthy
+    
+    After failure_threshold consecutive failures (timeouts, connection errors
+    and 5xx; throttling means the deployment is up) the breaker opens and
+    calls are rejected for recovery_seconds. It then lets a single trial call
+    through (half-open): success closes the breaker, failure opens it again.
+    """
+    
+    def __init__(self, failure_threshold=5, recovery_seconds=30):
+        """
+        Initialize the circuit breaker
+        
+        Args:
+            failure_threshold: Consecutive failures that open the breaker (0 disables it)
+            recovery_seconds: How long the breaker stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {
+            "opened": 0,
+            "rejected": 0
+        }
+    
+    def before_call(self):
+        """
+        Check whether a call may proceed
+        
+        Raises:
+            CircuitOpenError: If the breaker is open (or its trial call is in flight)
+        """
+        if self.failure_threshold <= 0:
+            return
+        
+        with self._lock:
+            if self.state == "closed":
+                return
+            
+            remaining = self._opened_at + self.recovery_seconds - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            
+            self._stats["rejected"] += 1
+        raise CircuitOpenError("Azure OpenAI is currently unavailable, please retry later", retry_after=max(remaining, 1))
+    
+    def is_recovering(self):
+        """
+        Check whether the breaker is (or is about to be) testing the deployment with a trial call
+        
+        Returns:
+            True if the breaker is half-open, or open with its recovery time elapsed
+        """
+        with self._lock:
+            if self.state == "half_open":
+                return True
+            return self.state == "open" and time.monotonic() >= self._opened_at + self.recovery_seconds
+    
+    def record_success(self):
+        """Record a call that reached a healthy deployment"""
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self.state = "closed"
+    
+    def release(self):
+        """Record a call that ended without telling anything about the deployment's health"""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Record a call that failed because the deployment is unhealthy"""
+        if self.failure_threshold <= 0:
+            return
+        
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self._stats["opened"] += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+    
+    def get_stats(self):
+        """
+        Get the breaker state and counters
+        
+        Returns:
+            Dictionary with the state, consecutive failures and opened/rejected counts
+        """
+        with self._lock:
+            return dict(self._stats, state=self.state, consecutive_failures=self._failures)
+
+class LatencyTracker:
+    """Sliding window of recent call latencies"""
+    
+    def __init__(self, window=200):
+        """
+        Initialize the tracker
+        
+        Args:
+            window: Number of most recent latencies kept
+        """
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds):
+        """Record the latency of a successful call"""
+        with self._lock:
+            self._latencies.append(seconds)
+    
+    def percentile(self, percentile, min_samples=1):
+        """
+        Get a latency percentile of the window
+        
+        Args:
+            percentile: Percentile between 0 and 100
+            min_samples: Samples required for the percentile to be meaningful
+        
+        Returns:
+            Latency in seconds, or None if there are fewer than min_samples samples
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies or len(latencies) < min_samples:
+            return None
+        index = min(len(latencies) - 1, math.ceil(percentile / 100 * len(latencies)) - 1)
+        return latencies[max(index, 0)]
+
+class ResiliencePolicy:
+    """
+    Retry and hedging policy for model calls
+    
+    Retryable errors (429, 5xx, timeouts and connection errors, see
+    classify_error) are retried with decorrelated jitter, waiting at least as
+    long as a 429's Retry-After. Optionally, a call that has not answered
+    within the p95 latency of recent calls is hedged with a second identical
+    call and the first answer wins; no hedge is started while a circuit
+    breaker is testing a recovering deployment, so the trial call is the only
+    one sent to it. Circuit breakers are kept per deployment (see
+    DeploymentPool); an open breaker's CircuitOpenError is not retried.
+    """
+    
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=8.0, hedging_enabled=False, hedging_min_samples=20):
+        """
+        Initialize the policy
+        
+        Args:
+            max_retries: Retries after the first attempt
+            base_delay: Minimum delay between attempts in seconds
+            max_delay: Maximum delay between attempts in seconds
+            hedging_enabled: Whether slow calls are hedged
+            hedging_min_samples: Latency samples required before calls are hedged
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedging_enabled = hedging_enabled
+        self.hedging_min_samples = hedging_min_samples
+        self.latency = LatencyTracker()
+        
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "retries_exhausted": 0,
+            "hedges": 0,
+            "hedges_won": 0
+        }
+        self._retries_by_kind = {}
+    
+    async def execute(self, operation, hedge=False, can_hedge=None):
+        """
+        Run a model call under the policy
+        
+        Args:
+            operation: Async callable without arguments performing one attempt
+            hedge: Whether the call may be hedged (only for calls returning complete responses)
+            can_hedge: Optional callable checked right before a hedge is started; False skips the hedge
+        
+        Returns:
+            Result of the first successful attempt
+        
+        Raises:
+            Exception: The last error if it is not retryable or retries are exhausted
+        """
+        self._increment("calls")
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            try:
+                if hedge and self.hedging_enabled:
+                    result = await self._hedged(operation, can_hedge)
+                else:
+                    result = await self._timed(operation)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in RETRYABLE_KINDS:
+                    raise
+                if attempt >= self.max_retries:
+                    self._increment("retries_exhausted")
+                    raise
+                
+                # Decorrelated jitter: each delay is drawn between the base and three times the previous one
+                delay = min(self.max_delay, random.uniform(self.base_delay, delay * 3))
+                wait = delay
+                if kind == "throttled":
+                    wait = max(wait, get_retry_after(e.response.headers, default=0))
+                
+                attempt += 1
+                with self._lock:
+                    self._stats["retries"] += 1
+                    self._retries_by_kind[kind] = self._retries_by_kind.get(kind, 0) + 1
+                await asyncio.sleep(wait)
+                continue
+            
+            return result
+    
+    async def _timed(self, operation):
+        """Run one attempt, recording its latency if it succeeds"""
+        started = time.monotonic()
+        result = await operation()
+        self.latency.record(time.monotonic() - started)
+        return result
+    
+    async def _hedged(self, operation, can_hedge=None):
+        """Run one attempt, starting a second one if the first is slower than the recent p95 (and can_hedge allows it)"""
+        threshold = self.latency.percentile(95, min_samples=self.hedging_min_samples)
+        if threshold is None:
+            return await self._timed(operation)
+        
+        primary = asyncio.ensure_future(self._timed(operation))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=threshold)
+            if done:
+                return primary.result()
+            if can_hedge is not None and not can_hedge():
+                return await primary
+            
+            self._increment("hedges")
+            hedge = asyncio.ensure_future(self._timed(operation))
+            pending.add(hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._increment("hedges_won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def get_stats(self):
+        """
+        Get retry and hedging metrics
+        
+        Returns:
+            Dictionary with call/retry/hedge counters, retries by error kind
+            and the current p95 latency
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["retries_by_kind"] = dict(self._retries_by_kind)
+        
+        p95 = self.latency.percentile(95)
+        stats["p95_latency_seconds"] = round(p95, 3) if p95 is not None else None
+        return stats
+    
+    def _increment(self, name):
+        """Increment a counter"""
+        with self._lock:
+            self._stats[name] += 1
\ No newline at end of file
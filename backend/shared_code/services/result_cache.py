@@ -0,0 +1,196 @@
+"""
+Result Cache - Two-tier cache for expensive model results (in-memory LRU + Azure Blob Storage)
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """Content-addressed cache with a bounded in-process LRU tier and a persistent blob tier"""
+    
+    def __init__(self, namespace, azure_blob_service=None, max_entries=256, ttl_seconds=86400):
+        """
+        Initialize the result cache
+        
+        Args:
+            namespace: Name used to separate this cache's entries in Blob Storage (e.g. "vision")
+            azure_blob_service: Optional AzureBlobService used as the persistent tier
+            max_entries: Maximum number of entries kept in the in-memory tier
+            ttl_seconds: Time-to-live of an entry in both tiers (0 disables expiry)
+        """
+        self.namespace = namespace
+        self.azure_blob_service = azure_blob_service
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "blob_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expired": 0,
+            "errors": 0
+        }
+    
+    def get_blob_path(self, key):
+        """
+        Get the blob path used to persist a cache entry
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Blob path within the container
+        """
+        return f"cache/{self.namespace}/{key}.json"
+    
+    async def get(self, key):
+        """
+        Look up a cached value, checking the in-memory tier before Blob Storage
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            A copy of the cached value, or None on a miss
+        """
+        value = self._get_from_memory(key)
+        if value is not None:
+            self._increment("memory_hits")
+            return copy.deepcopy(value)
+        
+        value = await self._get_from_blob(key)
+        if value is not None:
+            self._increment("blob_hits")
+            return copy.deepcopy(value)
+        
+        self._increment("misses")
+        return None
+    
+    async def get_many(self, keys):
+        """
+        Look up several alternative keys for the same value, returning the first hit
+        
+        Args:
+            keys: Iterable of cache keys, in order of preference
+        
+        Returns:
+            A copy of the cached value, or None if none of the keys are cached
+        """
+        keys = [key for key in keys if key]
+        for key in keys:
+            value = self._get_from_memory(key)
+            if value is not None:
+                self._increment("memory_hits")
+                return copy.deepcopy(value)
+        
+        for key in keys:
+            value = await self._get_from_blob(key)
+            if value is not None:
+                self._increment("blob_hits")
+                return copy.deepcopy(value)
+        
+        self._increment("misses")
+        return None
+    
+    async def set(self, key, value, persist=True):
+        """
+        Store a value in the cache
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value to cache
+            persist: Whether to also write the entry to Blob Storage
+        """
+        stored_at = time.time()
+        self._put_in_memory(key, copy.deepcopy(value), stored_at)
+        self._increment("writes")
+        
+        if persist and self.azure_blob_service is not None:
+            try:
+                await self.azure_blob_service.upload_json(
+                    {"key": key, "stored_at": stored_at, "value": value},
+                    self.get_blob_path(key)
+                )
+            except Exception as e:
+                # The cache is an optimization; never fail the request because of it
+                self._increment("errors")
+                logging.warning(f"Failed to persist {self.namespace} cache entry {key}: {str(e)}")
+    
+    def get_stats(self):
+        """
+        Get hit/miss counters for this cache
+        
+        Returns:
+            Dictionary with counters, the current size and the overall hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        
+        lookups = stats["memory_hits"] + stats["blob_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["blob_hits"]) / lookups if lookups else 0.0
+        return stats
+    
+    def _is_expired(self, stored_at):
+        """Check whether an entry stored at the given timestamp has outlived the TTL"""
+        return bool(self.ttl_seconds) and time.time() - stored_at > self.ttl_seconds
+    
+    def _get_from_memory(self, key):
+        """Return the in-memory value for a key (refreshing its LRU position) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            stored_at, value = entry
+            if self._is_expired(stored_at):
+                del self._entries[key]
+                self._stats["expired"] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    async def _get_from_blob(self, key):
+        """Return the persisted value for a key (promoting it to memory) or None"""
+        if self.azure_blob_service is None:
+            return None
+        
+        try:
+            entry = await self.azure_blob_service.download_json_if_exists(self.get_blob_path(key))
+        except Exception as e:
+            self._increment("errors")
+            logging.warning(f"Failed to read {self.namespace} cache entry {key}: {str(e)}")
+            return None
+        
+        if not entry or "value" not in entry:
+            return None
+        
+        stored_at = entry.get("stored_at", 0)
+        if self._is_expired(stored_at):
+            self._increment("expired")
+            return None
+        
+        self._put_in_memory(key, entry["value"], stored_at)
+        return entry["value"]
+    
+    def _put_in_memory(self, key, value, stored_at):
+        """Insert a value into the LRU tier, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+    
+    def _increment(self, counter):
+        """Increment one of the cache counters"""
+        with self._lock:
+            self._stats[counter] += 1
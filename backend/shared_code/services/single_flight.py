@@ -0,0 +1,192 @@
+"""
+Single Flight - Coalescing of identical concurrent operations, within an instance and across instances
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+class SingleFlight:
+    """
+    Runs concurrent calls with the same key once, sharing the result
+    
+    The first caller (the leader) starts the operation; callers arriving
+    while it is in flight (followers) await the same result instead of
+    starting their own. Errors are shared the same way. The operation runs
+    as its own task, so a leader whose request is cancelled does not fail
+    its followers. Followers spend no tokens of their own, so token usage
+    accumulated by the operation is only reported to the leader.
+    """
+    
+    def __init__(self):
+        """Initialize the single-flight group"""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "leaders": 0,
+            "coalesced": 0
+        }
+    
+    async def do(self, key, operation):
+        """
+        Run an operation unless one with the same key is already in flight
+        
+        Args:
+            key: Key identifying identical operations
+            operation: Async callable (without arguments) performing the operation
+        
+        Returns:
+            Result of the operation (the in-flight one's, for followers)
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self._increment("coalesced")
+        else:
+            task = asyncio.ensure_future(operation())
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+            self._increment("leaders")
+        return await asyncio.shield(task)
+    
+    def get_stats(self):
+        """
+        Get coalescing counters
+        
+        Returns:
+            Dictionary with leader and coalesced (follower) call counts and the calls in flight
+        """
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+    
+    def _forget(self, key, task):
+        """Remove a finished operation, so later calls start a new one"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+    
+    def _increment(self, name):
+        """Increment a counter"""
+        with self._lock:
+            self._stats[name] += 1
+
+class LeasedSingleFlight:
+    """
+    Runs identical operations of different instances once, using blob leases
+    
+    The instance that takes the lease on the operation's lock blob runs it
+    and records the key it completed in the blob before releasing the lease.
+    The others note the lock blob's ETag when they find it leased and wait
+    for the lease; once they get it, a matching key written since (the ETag
+    changed) means the leader's result answers them too, and it is loaded
+    instead of computed again. Only storage's ETags are compared, never the
+    clocks of different instances. The lease is renewed while the operation
+    runs, so a crashed instance only blocks the others until it expires.
+    Followers spend no tokens, so they report no token usage for the result.
+    """
+    
+    def __init__(self, azure_blob_service, lease_seconds=60, wait_seconds=120):
+        """
+        Initialize the leased single-flight group
+        
+        Args:
+            azure_blob_service: An initialized AzureBlobService object
+            lease_seconds: Lease duration (15-60 seconds, as Blob Storage requires)
+            wait_seconds: Longest a follower waits for the lease before running the operation itself
+        """
+        self.azure_blob_service = azure_blob_service
+        self.lease_seconds = min(max(lease_seconds, 15), 60)
+        self.wait_seconds = wait_seconds
+        
+        self._lock = threading.Lock()
+        self._stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "timeouts": 0
+        }
+    
+    async def do(self, lock_path, key, operation, load_result):
+        """
+        Run an operation unless another instance is running (or just ran) the same one
+        
+        Args:
+            lock_path: Blob path of the lock blob of the operation
+            key: Key identifying identical operations
+            operation: Async callable (without arguments) performing the operation and persisting its result
+            load_result: Async callable (without arguments) loading the persisted result straight
+                from storage, bypassing the request index (None if missing)
+        
+        Returns:
+            Result of the operation, or the persisted result of another instance's identical operation
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        interval = 0.5
+        leased_etag = None
+        while True:
+            lease = await self.azure_blob_service.acquire_lease(lock_path, self.lease_seconds)
+            if lease is not None:
+                return await self._run_leased(lease, lock_path, key, leased_etag, operation, load_result)
+            
+            if leased_etag is None:
+                # The lock blob as it was while another instance held the lease; its marker is written before release
+                leased_etag = await self.azure_blob_service.get_etag(lock_path) or ""
+            
+            if time.monotonic() >= deadline:
+                logging.warning(f"Timed out waiting for the lease on {lock_path}, running the operation anyway")
+                self._increment("timeouts")
+                return await operation()
+            
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 4)
+    
+    async def _run_leased(self, lease, lock_path, key, leased_etag, operation, load_result):
+        """Run the operation (or reuse a concurrent identical one's result) while holding the lease"""
+        keep_alive = asyncio.ensure_future(self._renew(lease))
+        try:
+            # Only a marker written while this caller waited (the ETag changed) can answer it
+            if leased_etag is not None and await self.azure_blob_service.get_etag(lock_path) != leased_etag:
+                marker = await self.azure_blob_service.download_json_if_exists(lock_path, fresh=True) or {}
+                if marker.get("key") == key:
+                    result = await load_result()
+                    if result is not None:
+                        self._increment("coalesced")
+                        return result
+            
+            self._increment("leaders")
+            result = await operation()
+            await self.azure_blob_service.upload_json({"key": key}, lock_path, lease=lease)
+            return result
+        finally:
+            keep_alive.cancel()
+            try:
+                await keep_alive
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                # The operation went on without the lease; another instance may have run it as well
+                logging.warning(f"Could not renew the lease on {lock_path}: {str(e)}")
+            try:
+                await lease.release()
+            except Exception as e:
+                # The lease expires on its own
+                logging.warning(f"Could not release the lease on {lock_path}: {str(e)}")
+    
+    async def _renew(self, lease):
+        """Renew the lease until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await lease.renew()
+    
+    def get_stats(self):
+        """
+        Get coalescing counters
+        
+        Returns:
+            Dictionary with leader, coalesced (follower) and timed-out call counts
+        """
+        with self._lock:
+            return dict(self._stats)
+    
+    def _increment(self, name):
+        """Increment a counter"""
+        with self._lock:
+            self._stats[name] += 1
\ No newline at end of file
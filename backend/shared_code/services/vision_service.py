@@ -2,62 +2,195 @@
 Vision Service - Service for analyzing fridge/food images
 """
 
+import asyncio
 import json
-from ..utils.image_utils import encode_image_from_blob, encode_image_from_bytes
+import logging
+import threading
+from ..models.ingredients import IngredientsResult
+from ..models.usage import TokenUsage
+from ..utils.image_utils import (
+    MODEL_IMAGE_MIME_TYPES,
+    UnsupportedImageError,
+    compute_image_hash,
+    compute_perceptual_hash,
+    detect_image_mime_type,
+    encode_image_from_bytes,
+    estimate_image_tokens,
+    get_image_size,
+    get_tile_boxes,
+    preprocess_image,
+    split_image_into_tiles
+)
+from ..utils.schema_utils import get_structured_response_format, validate_json
 from ..prompts.vision_prompt import get_vision_system_prompt
+from .rate_limiter import RateLimitExceeded
+from .resilience import CircuitOpenError
+from .single_flight import SingleFlight
 
 class VisionService:
     """Service for analyzing food/fridge images using Azure OpenAI Vision API"""
     
-    def __init__(self, azure_openai_client, azure_blob_service=None):
+    def __init__(self, azure_openai_client, azure_blob_service=None, result_cache=None, use_perceptual_hash=False,
+                 image_preprocessing=None, detail_policy=None, model_name=None, structured_outputs=True):
         """
         Initialize the Vision Service
         
         Args:
             azure_openai_client: An initialized AzureOpenAIClientService object
             azure_blob_service: An initialized AzureBlobService object
+            result_cache: Optional ResultCache used to reuse analyses of identical images
+            use_perceptual_hash: Whether to also key the cache on a perceptual image hash
+            image_preprocessing: Optional preprocessing settings (see Config.get_image_preprocessing_config)
+            detail_policy: Optional detail/tiling settings (see Config.get_vision_detail_config)
+            model_name: Vision model deployment (None = the deployment's default model)
+            structured_outputs: Whether the model is held to the ingredients JSON Schema (strict
+                structured outputs) rather than just asked for a JSON object
         """
-        self.client = azure_openai_client.get_client()
-        self.model_name = azure_openai_client.get_model_name()
+        self.azure_openai_client = azure_openai_client
+        self.model_name = model_name
         self.azure_blob_service = azure_blob_service
+        self.result_cache = result_cache
+        self.use_perceptual_hash = use_perceptual_hash
+        self.image_preprocessing = image_preprocessing or {"enabled": False}
+        self.detail_policy = detail_policy or {"detail": "auto", "tiling_enabled": False}
     
-    def analyze_image_bytes(self, image_bytes):
+        self.ingredients_schema = IngredientsResult.json_schema()
+        if structured_outputs:
+            self.response_format = get_structured_response_format("ingredients", self.ingredients_schema)
+        else:
+            self.response_format = {"type": "json_object"}
+        
+        self._stats_lock = threading.Lock()
+        self._calls_by_detail = {}
+        self._tiled_analyses = 0
+        self._skipped_tiles = 0
+        self._skipped_images = 0
+        self._invalid_results = 0
+        self._total_usage = TokenUsage()
+    
+        # Concurrent uploads of the same photo share one model call
+        self.single_flight = SingleFlight()
+    
+    async def analyze_image_bytes(self, image_bytes, usage=None):
         """
         Analyze the image using Azure OpenAI Vision API
         
+        Results are cached by image content, so resubmitting the same photo
+        is answered from the cache without another model call, and identical
+        images analyzed at the same time share a single call. Depending on the
+        detail policy, very large images are split into shelf tiles that are
+        analyzed in parallel and merged back into one result.
+        
         Args:
             image_bytes: Image data as bytes
+            usage: Optional TokenUsage that the tokens spent on this image are added to (nothing
+                for a cache hit or a call shared with an identical image already in flight)
             
         Returns:
             Dictionary containing the analysis results
             
         Raises:
+            UnsupportedImageError: If the image is in a format the model does not accept and cannot be converted
             Exception: If the API call fails or parsing fails
         """
+        # Hashing (and decoding for the perceptual hash) is CPU-bound, keep it off the event loop
+        cache_keys = await asyncio.to_thread(self.get_cache_keys, image_bytes)
+        if self.result_cache is not None:
+            cached_result = await self.result_cache.get_many(cache_keys)
+            if cached_result is not None:
+                logging.info(f"Vision cache hit for image {cache_keys[0]}")
+                return cached_result
+        
+        return await self.single_flight.do(
+            cache_keys[0], lambda: self._analyze_uncached(image_bytes, cache_keys, usage)
+        )
+    
+    async def _analyze_uncached(self, image_bytes, cache_keys, usage=None):
+        """Analyze an image with the model and cache the result (see analyze_image_bytes)"""
+        request_usage = TokenUsage()
         try:
-            base64_image = encode_image_from_bytes(image_bytes)
-            
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": get_vision_system_prompt()},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Please identify all the food ingredients and items in this refrigerator image. List as many as you can see and be specific about each item."},
-                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                        ]
-                    }
-                ],
-                max_tokens=2000,
-                response_format={"type": "json_object"}
-            )
+            parts = await asyncio.to_thread(self.plan_analysis, image_bytes)
+            if len(parts) > 1:
+                with self._stats_lock:
+                    self._tiled_analyses += 1
             
-            return json.loads(response.choices[0].message.content)
+            outcomes = await asyncio.gather(*[
+                self._request_analysis(
+                    encode_image_from_bytes(part["image"]),
+                    part["mime_type"],
+                    detail=part["detail"],
+                    image_tokens=part["tokens"],
+                    usage=request_usage,
+                    is_tile=len(parts) > 1
+                )
+                for part in parts
+            ], return_exceptions=True)
+            results = self._collect_results(outcomes)
+        except (RateLimitExceeded, CircuitOpenError, UnsupportedImageError):
+            raise
         except Exception as e:
             raise Exception(f"Error analyzing image: {str(e)}")
+        finally:
+            self._record_usage(request_usage, usage)
+        
+        if len(results) == 1:
+            result = results[0]
+        else:
+            result = IngredientsResult.merge(IngredientsResult.from_dict(r) for r in results).to_dict()
+        
+        # An analysis missing a tile is returned but not cached, so the next upload gets the whole photo
+        if self.result_cache is not None and len(results) == len(parts):
+            for key in cache_keys:
+                await self.result_cache.set(key, result)
+        
+        return result
+    
+    async def analyze_images_bytes(self, images, max_concurrency=4, usage=None):
+        """
+        Analyze several images of the same kitchen and combine their ingredients
+        
+        The images are analyzed concurrently, at most max_concurrency at a
+        time, each as by analyze_image_bytes (so photos seen before come from
+        the cache). Their ingredients are merged into one result, with items
+        found in several images listed once. Like a failed tile, an image whose
+        analysis fails is logged and left out of the result, so one bad photo
+        does not throw away the tokens spent on the others.
+        
+        Args:
+            images: List of image data as bytes
+            max_concurrency: Maximum number of images analyzed at the same time
+            usage: Optional TokenUsage that the tokens spent on the images are added to
+        
+        Returns:
+            Tuple of (combined analysis result, list with the analysis result or the
+            exception of each image)
+        
+        Raises:
+            Exception: The first image's error, if the analysis of every image failed
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def analyze(image_bytes):
+            async with semaphore:
+                return await self.analyze_image_bytes(image_bytes, usage=usage)
+        
+        outcomes = await asyncio.gather(*[analyze(image_bytes) for image_bytes in images], return_exceptions=True)
+        
+        results = []
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                logging.warning(f"Skipping image {index + 1} of {len(outcomes)}: {str(outcome)}")
+                with self._stats_lock:
+                    self._skipped_images += 1
+            else:
+                results.append(outcome)
+        if not results:
+            raise outcomes[0]
+        
+        combined = IngredientsResult.merge(IngredientsResult.from_dict(result) for result in results).to_dict()
+        return combined, outcomes
     
-    def analyze_image(self, blob_path):
+    async def analyze_image(self, blob_path, usage=None):
         """
         Analyze the image from Azure Blob Storage using Azure OpenAI Vision API
         
@@ -66,6 +199,7 @@ class VisionService:
         
         Args:
             blob_path: Path to the blob within the container
+            usage: Optional TokenUsage that the tokens spent on this image are added to
             
         Returns:
             Dictionary containing the analysis results
@@ -75,30 +209,263 @@ class VisionService:
         """
         try:
             # Download the image from Azure Blob Storage
-            image_data = self.azure_blob_service.download_file(blob_path)
-            base64_image = encode_image_from_blob(image_data)
-            
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": get_vision_system_prompt()},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Please identify all the food ingredients and items in this refrigerator image. List as many as you can see and be specific about each item."},
-                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                        ]
-                    }
-                ],
-                max_tokens=2000,
-                response_format={"type": "json_object"}
-            )
-            
-            return json.loads(response.choices[0].message.content)
+            image_data = await self.azure_blob_service.download_file(blob_path)
         except Exception as e:
             raise Exception(f"Error analyzing image: {str(e)}")
+        
+        return await self.analyze_image_bytes(image_data.getvalue(), usage=usage)
+    
+    def get_cache_keys(self, image_bytes):
+        """
+        Get the content-addressed cache keys for an image
+        
+        Args:
+            image_bytes: Image data as bytes
+        
+        Returns:
+            List of cache keys, exact content hash first
+        """
+        keys = [f"sha256-{compute_image_hash(image_bytes)}"]
+        if self.use_perceptual_hash:
+            perceptual_hash = compute_perceptual_hash(image_bytes)
+            if perceptual_hash:
+                keys.append(f"dhash-{perceptual_hash}")
+        return keys
+    
+    def plan_analysis(self, image_bytes):
+        """
+        Decide how an image is sent to the model: as one image or as shelf tiles, and at which detail
+        
+        Args:
+            image_bytes: Image data as uploaded
+            
+        Returns:
+            List of parts, each a dictionary with "image" (bytes), "mime_type", "detail" and
+            "tokens" (estimated prompt tokens of the image)
+        """
+        size = get_image_size(image_bytes)
+        policy = self.detail_policy
+        
+        tiled = bool(policy.get("tiling_enabled") and size and max(size) >= policy["tiling_min_edge"])
+        if tiled and policy.get("tiling_max_tokens"):
+            # Tiling multiplies the image tokens; photos whose tiles would exceed the budget are sent whole
+            tiled = self.estimate_tiling_tokens(size) <= policy["tiling_max_tokens"]
+        
+        if tiled:
+            tiles = split_image_into_tiles(image_bytes, rows=policy["tile_rows"], overlap=policy["tile_overlap"])
+        else:
+            tiles = [image_bytes]
+        
+        parts = []
+        for tile in tiles:
+            # Tiles are lossless intermediates, so they are always re-encoded
+            prepared_bytes, mime_type = self.prepare_image(tile, force=len(tiles) > 1)
+            detail = self.choose_detail(prepared_bytes)
+            prepared_size = get_image_size(prepared_bytes) or (2048, 2048)
+            parts.append({
+                "image": prepared_bytes,
+                "mime_type": mime_type,
+                "detail": detail,
+                "tokens": estimate_image_tokens(*prepared_size, detail=detail)
+            })
+        return parts
+    
+    def estimate_tiling_tokens(self, size):
+        """
+        Estimate the image tokens of a photo sent as shelf tiles (each at high detail)
+        
+        Args:
+            size: (width, height) of the photo
+        
+        Returns:
+            Estimated prompt tokens of all its tiles together
+        """
+        policy = self.detail_policy
+        return sum(
+            estimate_image_tokens(right - left, bottom - top)
+            for left, top, right, bottom in get_tile_boxes(*size, rows=policy["tile_rows"], overlap=policy["tile_overlap"])
+        )
+    
+    def choose_detail(self, image_bytes):
+        """
+        Pick the vision detail level for an image that is about to be sent
+        
+        With the "adaptive" policy, images small enough that high detail would
+        add nothing are sent at low detail (a flat 85 tokens); everything else
+        is sent at high detail. Any other policy value is used as is.
+        
+        Args:
+            image_bytes: Prepared image data as bytes
+            
+        Returns:
+            "low", "high" or "auto"
+        """
+        detail = self.detail_policy.get("detail", "auto")
+        if detail != "adaptive":
+            return detail
+        
+        size = get_image_size(image_bytes)
+        if size and max(size) <= self.detail_policy["low_detail_max_edge"]:
+            return "low"
+        return "high"
+    
+    def get_stats(self):
+        """
+        Get model call and token counters for this service
+        
+        Returns:
+            Dictionary with calls per detail level, tiled analyses, skipped tiles and images, invalid results, token usage
+            and the number of analyses coalesced with an identical one in flight
+        """
+        with self._stats_lock:
+            return {
+                "calls_by_detail": dict(self._calls_by_detail),
+                "tiled_analyses": self._tiled_analyses,
+                "skipped_tiles": self._skipped_tiles,
+                "skipped_images": self._skipped_images,
+                "invalid_results": self._invalid_results,
+                "usage": self._total_usage.to_dict(),
+                "single_flight": self.single_flight.get_stats()
+            }
+    
+    def prepare_image(self, image_bytes, force=False):
+        """
+        Downscale and re-encode an image before it is sent to the model
+        
+        Args:
+            image_bytes: Image data as uploaded
+            force: Preprocess even if preprocessing is disabled in the configuration
+            
+        Returns:
+            Tuple of (image bytes, MIME type)
+        
+        Raises:
+            UnsupportedImageError: If the model does not accept the image's format and it cannot be converted
+        """
+        mime_type = detect_image_mime_type(image_bytes, default=None)
+        if not (force or self.image_preprocessing.get("enabled")) and mime_type in MODEL_IMAGE_MIME_TYPES:
+            return image_bytes, mime_type
+        
+        # Formats the model does not accept (e.g. HEIC) are converted even with preprocessing disabled
+        return preprocess_image(
+            image_bytes,
+            max_edge=self.image_preprocessing.get("max_edge", 2048),
+            quality=self.image_preprocessing.get("quality", 85),
+            output_format=self.image_preprocessing.get("output_format", "JPEG")
+        )
+    
+    async def _request_analysis(self, base64_image, mime_type="image/jpeg", detail="auto", image_tokens=0, usage=None,
+                                is_tile=False):
+        """
+        Send a base64-encoded image to the vision model and parse the JSON reply
+        
+        The reply is repaired (see IngredientsResult.normalize) and validated
+        against the ingredients schema; if it is still invalid, the image (only
+        this tile, for tiled analyses) is analyzed once more.
+        
+        Args:
+            base64_image: Base64 encoded image data
+            mime_type: MIME type of the encoded image
+            detail: Vision detail level ("low", "high" or "auto")
+            image_tokens: Estimated prompt tokens of the image (for rate limiting)
+            usage: Optional TokenUsage to add the response's token usage to
+            is_tile: Whether the image is one section of a larger photo
+        
+        Returns:
+            Dictionary containing the analysis results
+        
+        Raises:
+            ValueError: If the reply is still invalid after the second attempt
+        """
+        subject = "section of a refrigerator image" if is_tile else "refrigerator image"
+        
+        for attempt in range(2):
+            result, errors = await self._request_ingredients(subject, base64_image, mime_type, detail, image_tokens, usage)
+            if not errors:
+                return result
+            
+            with self._stats_lock:
+                self._invalid_results += 1
+            logging.warning(f"Invalid analysis from the vision model (attempt {attempt + 1}): {'; '.join(errors[:5])}")
+        
+        raise ValueError(f"Invalid analysis from the vision model: {'; '.join(errors[:5])}")
+    
+    async def _request_ingredients(self, subject, base64_image, mime_type, detail, image_tokens, usage):
+        """Make one vision model call; returns the repaired result and its validation errors"""
+        response = await self.azure_openai_client.create_chat_completion(
+            messages=[
+                {"role": "system", "content": get_vision_system_prompt()},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": f"Please identify all the food ingredients and items in this {subject}. List as many as you can see and be specific about each item."},
+                        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64_image}", "detail": detail}}
+                    ]
+                }
+            ],
+            max_tokens=2000,
+            image_tokens=image_tokens,
+            model=self.model_name,
+            response_format=self.response_format
+        )
+        
+        with self._stats_lock:
+            self._calls_by_detail[detail] = self._calls_by_detail.get(detail, 0) + 1
+        if usage is not None:
+            usage.add(getattr(response, "usage", None))
+        
+        message = response.choices[0].message
+        if getattr(message, "refusal", None):
+            return None, [f"$: the model refused: {message.refusal}"]
+        try:
+            result = IngredientsResult.normalize(json.loads(message.content))
+        except (TypeError, ValueError) as e:
+            return None, [f"$: invalid JSON ({str(e)})"]
+        return result, validate_json(result, self.ingredients_schema)
+    
+    def _collect_results(self, outcomes):
+        """
+        Keep the usable results of an analysis's model calls (one per tile)
+        
+        A tile whose call failed or whose reply has no ingredients is logged
+        and skipped, so one bad crop does not throw away the tokens spent on
+        the other tiles. The analysis only fails if no tile produced a result.
+        
+        Args:
+            outcomes: Result dictionaries or exceptions, one per part of the analysis
+        
+        Returns:
+            List of the usable result dictionaries
+        
+        Raises:
+            The first failure, if no part produced a usable result
+        """
+        results = []
+        failure = None
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, dict) and isinstance(outcome.get("ingredients"), dict):
+                results.append(outcome)
+                continue
+            
+            error = outcome if isinstance(outcome, BaseException) else ValueError("Invalid analysis from the vision model: no ingredients")
+            failure = failure or error
+            if len(outcomes) > 1:
+                logging.warning(f"Skipping tile {index + 1} of {len(outcomes)}: {str(error)}")
+                with self._stats_lock:
+                    self._skipped_tiles += 1
+        
+        if not results:
+            raise failure
+        return results
+    
+    def _record_usage(self, request_usage, usage=None):
+        """Add a request's token usage to the service totals and the caller's accumulator"""
+        with self._stats_lock:
+            self._total_usage.merge(request_usage)
+        if usage is not None:
+            usage.merge(request_usage)
     
-    def save_analysis(self, analysis_data, blob_path):
+    async def save_analysis(self, analysis_data, blob_path):
         """
         Save the analysis result to Azure Blob Storage
         
@@ -109,7 +476,7 @@ class VisionService:
         Returns:
             URL to the saved JSON file
         """
-        return self.azure_blob_service.upload_json(analysis_data, blob_path)
+        return await self.azure_blob_service.upload_json(analysis_data, blob_path)
     
     def get_ingredients_summary(self, analysis_result):
         """
@@ -3,6 +3,70 @@ Utils package initialization
 This makes utility functions importable directly from the utils package
 """
 
-from .image_utils import encode_image_from_blob, encode_image_from_bytes, find_image_in_container
+from .background import get_background_stats, run_in_background, wait_for_pending_write
+from .http_utils import (
+    accepts_encoding,
+    build_cache_control,
+    etag_matches,
+    get_cache_headers,
+    get_if_none_match,
+    get_stored_representation
+)
+from .image_utils import (
+    MODEL_IMAGE_MIME_TYPES,
+    UnsupportedImageError,
+    compute_image_hash,
+    compute_perceptual_hash,
+    detect_image_mime_type,
+    encode_image_from_blob,
+    encode_image_from_bytes,
+    estimate_image_tokens,
+    find_image_in_container,
+    get_image_size,
+    get_tile_boxes,
+    preprocess_image,
+    split_image_into_tiles
+)
+from .ingredient_utils import canonicalize_ingredient, canonicalize_ingredients, jaccard_similarity
+from .job_utils import get_job_status_response, get_wait_seconds, is_job_requested
+from .json_utils import decode_json, dumps_bytes, encode_json, loads_bytes
+from .schema_utils import build_json_schema, get_structured_response_format, to_strict_schema, validate_json
 
-__all__ = ['encode_image_from_blob', 'encode_image_from_bytes', 'find_image_in_container']
\ No newline at end of file
+__all__ = [
+    'MODEL_IMAGE_MIME_TYPES',
+    'UnsupportedImageError',
+    'accepts_encoding',
+    'build_cache_control',
+    'build_json_schema',
+    'canonicalize_ingredient',
+    'canonicalize_ingredients',
+    'compute_image_hash',
+    'compute_perceptual_hash',
+    'decode_json',
+    'detect_image_mime_type',
+    'dumps_bytes',
+    'encode_image_from_blob',
+    'encode_image_from_bytes',
+    'encode_json',
+    'estimate_image_tokens',
+    'etag_matches',
+    'find_image_in_container',
+    'get_background_stats',
+    'get_cache_headers',
+    'get_if_none_match',
+    'get_image_size',
+    'get_job_status_response',
+    'get_stored_representation',
+    'get_structured_response_format',
+    'get_tile_boxes',
+    'get_wait_seconds',
+    'is_job_requested',
+    'jaccard_similarity',
+    'loads_bytes',
+    'preprocess_image',
+    'run_in_background',
+    'split_image_into_tiles',
+    'to_strict_schema',
+    'validate_json',
+    'wait_for_pending_write'
+]
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Background Task Utilities - Fire-and-forget work that must not delay the HTTP response
+"""
+
+import asyncio
+import logging
+
+# Strong references to running tasks; the event loop only keeps weak ones
+_background_tasks = set()
+
+# Pending writes by key (usually a blob path), so readers on this instance can wait for them
+_pending_writes = {}
+
+_stats = {
+    "started": 0,
+    "succeeded": 0,
+    "failed": 0
+}
+
+def run_in_background(coro, description, key=None):
+    """
+    Schedule a coroutine to run after the current request has been answered
+    
+    Failures are logged (and counted) instead of being raised, since nobody
+    awaits the result.
+    
+    Args:
+        coro: Coroutine (or already scheduled task) to run
+        description: Human-readable description used in error reports
+        key: Optional key (e.g. the blob path being written) that readers can wait on
+    
+    Returns:
+        The scheduled asyncio.Task
+    """
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    _stats["started"] += 1
+    
+    if key is not None:
+        _pending_writes[key] = task
+    
+    def _on_done(finished_task):
+        _background_tasks.discard(finished_task)
+        if key is not None and _pending_writes.get(key) is finished_task:
+            del _pending_writes[key]
+        
+        if finished_task.cancelled():
+            _stats["failed"] += 1
+            logging.warning(f"Background task cancelled: {description}")
+        elif finished_task.exception() is not None:
+            _stats["failed"] += 1
+            logging.error(f"Background task failed: {description}: {str(finished_task.exception())}")
+        else:
+            _stats["succeeded"] += 1
+    
+    task.add_done_callback(_on_done)
+    return task
+
+async def wait_for_pending_write(key, timeout=30):
+    """
+    Wait for a background write with the given key to finish, if one is in flight
+    
+    Args:
+        key: Key passed to run_in_background (e.g. the blob path)
+        timeout: Maximum number of seconds to wait
+    """
+    task = _pending_writes.get(key)
+    if task is None:
+        return
+    
+    # Errors are reported by the task's done callback; readers only need it settled
+    await asyncio.wait([task], timeout=timeout)
+
+def get_background_stats():
+    """
+    Get counters for background tasks started on this instance
+    
+    Returns:
+        Dictionary with started/succeeded/failed counts and the number still running
+    """
+    stats = dict(_stats)
+    stats["pending"] = len(_background_tasks)
+    return stats
@@ -0,0 +1,135 @@
+"""
+HTTP Utilities - Conditional requests (ETag / If-None-Match), cache headers and content codings
+"""
+
+from .json_utils import decompress
+
+def get_if_none_match(req):
+    """
+    Parse the If-None-Match header of a request
+    
+    Weak validators (W/"...") are reduced to their opaque tag, since
+    If-None-Match uses the weak comparison.
+    
+    Args:
+        req: HTTP request object
+    
+    Returns:
+        List of entity tags (quoted, as sent), "*" included as is; empty if the header is absent
+    """
+    header = req.headers.get('If-None-Match', '') or ''
+    etags = []
+    for value in header.split(','):
+        value = value.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        if value:
+            etags.append(value)
+    return etags
+
+def etag_matches(etags, etag):
+    """
+    Check whether an entity tag satisfies a list of If-None-Match tags
+    
+    Args:
+        etags: Tags from get_if_none_match
+        etag: Current entity tag of the resource (quoted)
+    
+    Returns:
+        True if the client's copy is current (the response can be 304 Not Modified)
+    """
+    if not etag or not etags:
+        return False
+    return "*" in etags or etag in etags
+
+def build_cache_control(max_age, immutable=False, public=False):
+    """
+    Build a Cache-Control header value for a cacheable JSON result
+    
+    The endpoints require a function key, so responses are private (only the
+    caller's own cache may keep them) unless a CDN in front of the Function
+    App is explicitly allowed to serve them; with a max_age of 0 every use is
+    revalidated with the ETag.
+    
+    Args:
+        max_age: Seconds the response may be reused without revalidation
+        immutable: Whether the resource never changes once it exists
+        public: Whether shared caches (CDNs, proxies) may store the response
+    
+    Returns:
+        Cache-Control header value
+    """
+    scope = "public" if public else "private"
+    if max_age <= 0:
+        return f"{scope}, no-cache"
+    
+    cache_control = f"{scope}, max-age={max_age}"
+    return f"{cache_control}, immutable" if immutable else f"{cache_control}, must-revalidate"
+
+def get_cache_headers(etag, cache_control):
+    """
+    Get the caching headers for a response
+    
+    Args:
+        etag: Entity tag of the response (quoted)
+        cache_control: Cache-Control header value
+    
+    Returns:
+        Dictionary of response headers
+    """
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+def accepts_encoding(req, encoding):
+    """
+    Check whether a request's Accept-Encoding allows a content coding
+    
+    Args:
+        req: HTTP request object
+        encoding: Content coding (e.g. "gzip")
+    
+    Returns:
+        True if the client accepts the coding
+    """
+    header = req.headers.get('Accept-Encoding', '') or ''
+    accepted = {}
+    for value in header.split(','):
+        name, _, params = value.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted.get(encoding, accepted.get('*', 0.0)) > 0
+
+def get_stored_representation(req, stored):
+    """
+    Choose how a stored blob is sent: as stored when the client accepts its
+    content coding (no decompression at all), decoded otherwise
+    
+    The decoded form is a different representation of the blob, so it is
+    sent with a weak ETag.
+    
+    Args:
+        req: HTTP request object
+        stored: Result of AzureBlobService.download_bytes_if_modified
+    
+    Returns:
+        Tuple of (body bytes or None if not modified, ETag, extra response headers)
+    """
+    content = stored["content"]
+    etag = stored["etag"]
+    content_encoding = stored.get("content_encoding")
+    if not content_encoding or content_encoding == "identity":
+        return content, etag, {}
+    
+    if accepts_encoding(req, content_encoding):
+        return content, etag, {"Content-Encoding": content_encoding, "Vary": "Accept-Encoding"}
+    
+    body = decompress(content, content_encoding) if content is not None else None
+    return body, f"W/{etag}", {"Vary": "Accept-Encoding"}
+
+# Errors (e.g. results that do not exist yet) must not be cached by browsers or CDNs
+NO_STORE_HEADERS = {"Cache-Control": "no-store"}
\ No newline at end of file
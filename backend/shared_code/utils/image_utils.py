@@ -3,8 +3,46 @@ Image Utilities - Functions for handling images with Azure Blob Storage
 """
 
 import base64
+import hashlib
+import math
 from io import BytesIO
 
+# Leading bytes of the image formats accepted by the vision model
+_IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+# Brands of the ISO base media "ftyp" box of HEIC/HEIF and AVIF photos
+_FTYP_BRANDS = {
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"heim": "image/heic",
+    b"heis": "image/heic",
+    b"hevc": "image/heic",
+    b"hevx": "image/heic",
+    b"mif1": "image/heif",
+    b"msf1": "image/heif",
+    b"avif": "image/avif",
+    b"avis": "image/avif"
+}
+
+# Image formats the vision model accepts as they are
+MODEL_IMAGE_MIME_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+_OUTPUT_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "PNG": "image/png"
+}
+
+class UnsupportedImageError(ValueError):
+    """Raised when an upload is in a format the vision model does not accept and cannot be converted"""
+    
+    status_code = 400
+
 def encode_image_from_blob(blob_data):
     """
     Encode a blob image to base64 string
@@ -30,7 +68,269 @@ def encode_image_from_bytes(image_bytes):
     """
     return base64.b64encode(image_bytes).decode('utf-8')
 
-def find_image_in_container(azure_blob_service, prefix):
+def detect_image_mime_type(image_bytes, default="image/jpeg"):
+    """
+    Detect the MIME type of an image from its leading bytes
+    
+    Args:
+        image_bytes: Bytes containing the image data
+        default: MIME type returned when the format is not recognized
+        
+    Returns:
+        MIME type string (e.g. "image/png")
+    """
+    for signature, mime_type in _IMAGE_SIGNATURES:
+        if image_bytes.startswith(signature):
+            return mime_type
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    if image_bytes[4:8] == b"ftyp" and image_bytes[8:12] in _FTYP_BRANDS:
+        return _FTYP_BRANDS[image_bytes[8:12]]
+    return default
+
+def preprocess_image(image_bytes, max_edge=2048, quality=85, output_format="JPEG"):
+    """
+    Prepare an uploaded photo for the vision model
+    
+    Decodes the image, applies the EXIF orientation, downscales it so the
+    longest edge is at most max_edge and re-encodes it. Phone photos shrink
+    from several megabytes to a few hundred kilobytes, which cuts the request
+    payload, upload latency and vision tokens. HEIC uploads are decoded when
+    the optional pillow-heif package is installed.
+    
+    If Pillow is unavailable or the image cannot be decoded, the original bytes
+    are returned unchanged with their detected MIME type, provided the model
+    accepts that format. The original is also kept when re-encoding would not
+    make it smaller.
+    
+    Args:
+        image_bytes: Bytes containing the uploaded image
+        max_edge: Maximum length in pixels of the longest edge
+        quality: Encoder quality (1-100) for JPEG/WebP output
+        output_format: "JPEG", "WEBP" or "PNG"
+        
+    Returns:
+        Tuple of (image bytes, MIME type)
+    
+    Raises:
+        UnsupportedImageError: If the image could not be converted and the model does not accept
+            its format (e.g. HEIC without pillow-heif, or a file that is not an image)
+    """
+    original_mime_type = detect_image_mime_type(image_bytes, default=None)
+    
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return _keep_original(image_bytes, original_mime_type)
+    
+    try:
+        from pillow_heif import register_heif_opener
+        register_heif_opener()
+    except ImportError:
+        pass
+    
+    output_format = output_format.upper()
+    if output_format not in _OUTPUT_MIME_TYPES:
+        output_format = "JPEG"
+    
+    try:
+        with Image.open(BytesIO(image_bytes)) as image:
+            source_format = image.format
+            rotated = image.getexif().get(0x0112, 1) != 1
+            
+            # Let the JPEG decoder downscale by a power of two while decoding (much cheaper)
+            if source_format == "JPEG":
+                image.draft("RGB", (max_edge, max_edge))
+            image = ImageOps.exif_transpose(image)
+            needs_resize = max(image.size) > max_edge
+            
+            if needs_resize:
+                image.thumbnail((max_edge, max_edge), Image.Resampling.BICUBIC)
+            
+            if output_format == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            elif image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            
+            output = BytesIO()
+            save_options = {"quality": quality} if output_format in ("JPEG", "WEBP") else {}
+            image.save(output, format=output_format, **save_options)
+            processed_bytes = output.getvalue()
+    except Exception:
+        return _keep_original(image_bytes, original_mime_type)
+    
+    # Keep an already small, upright, directly supported upload if re-encoding does not help
+    if (not needs_resize and not rotated and len(processed_bytes) >= len(image_bytes)
+            and source_format in ("JPEG", "PNG", "WEBP", "GIF")):
+        return image_bytes, original_mime_type
+    
+    return processed_bytes, _OUTPUT_MIME_TYPES[output_format]
+
+def _keep_original(image_bytes, mime_type):
+    """Return an upload that could not be converted, if the model accepts its format as it is"""
+    if mime_type in ("image/heic", "image/heif"):
+        raise UnsupportedImageError("HEIC/HEIF images cannot be decoded on this server; upload a JPEG or PNG instead")
+    if mime_type not in MODEL_IMAGE_MIME_TYPES:
+        raise UnsupportedImageError(f"Unsupported image format: {mime_type or 'unrecognized file'}")
+    return image_bytes, mime_type
+
+def get_image_size(image_bytes):
+    """
+    Read the dimensions of an image (after EXIF orientation) without decoding the pixels
+    
+    Args:
+        image_bytes: Bytes containing the image data
+        
+    Returns:
+        Tuple of (width, height), or None if Pillow is unavailable or the image cannot be read
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    
+    try:
+        with Image.open(BytesIO(image_bytes)) as image:
+            width, height = image.size
+            # Orientations 5-8 swap width and height
+            if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+    except Exception:
+        return None
+
+def estimate_image_tokens(width, height, detail="high"):
+    """
+    Estimate the prompt tokens the vision model charges for an image
+    
+    Low detail costs a flat 85 tokens. High detail scales the image to fit
+    within 2048x2048, then so its shortest side is at most 768, and charges
+    170 tokens per 512px tile plus 85.
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        detail: "low", "high" or "auto" (estimated as high)
+        
+    Returns:
+        Estimated number of prompt tokens
+    """
+    if detail == "low":
+        return 85
+    
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 170 * tiles + 85
+
+def split_image_into_tiles(image_bytes, rows=3, overlap=0.1):
+    """
+    Split an image into horizontal bands (e.g. one per fridge shelf)
+    
+    Neighbouring bands overlap slightly so items on a band boundary appear
+    whole in at least one of them. Bands are returned as lossless PNG so they
+    can be preprocessed like any other upload.
+    
+    Args:
+        image_bytes: Bytes containing the image data
+        rows: Number of bands to produce
+        overlap: Fraction of a band's height shared with each neighbour
+        
+    Returns:
+        List of band images as bytes (a single-element list if the image cannot be split)
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return [image_bytes]
+    
+    try:
+        with Image.open(BytesIO(image_bytes)) as image:
+            image = ImageOps.exif_transpose(image)
+            tiles = []
+            for box in get_tile_boxes(*image.size, rows=rows, overlap=overlap):
+                output = BytesIO()
+                image.crop(box).save(output, format="PNG", compress_level=1)
+                tiles.append(output.getvalue())
+            return tiles
+    except Exception:
+        return [image_bytes]
+
+def get_tile_boxes(width, height, rows=3, overlap=0.1):
+    """
+    Get the crop boxes of the bands split_image_into_tiles produces
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        rows: Number of bands
+        overlap: Fraction of a band's height shared with each neighbour
+    
+    Returns:
+        List of (left, top, right, bottom) boxes, top band first
+    """
+    band_height = height / rows
+    padding = int(band_height * overlap)
+    
+    boxes = []
+    for row in range(rows):
+        top = max(0, int(row * band_height) - padding)
+        bottom = min(height, int((row + 1) * band_height) + padding)
+        boxes.append((0, top, width, bottom))
+    return boxes
+
+def compute_image_hash(image_bytes):
+    """
+    Compute a content hash of the raw image bytes
+    
+    Args:
+        image_bytes: Bytes containing the image data
+    
+    Returns:
+        Hex-encoded SHA-256 digest of the image
+    """
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def compute_perceptual_hash(image_bytes, hash_size=8):
+    """
+    Compute a difference hash (dHash) of the downscaled image
+    
+    Unlike the content hash, the perceptual hash survives re-encoding and
+    resizing, so a photo re-uploaded at a different quality maps to the same key.
+    Requires Pillow; returns None when it is not installed or the image cannot
+    be decoded.
+    
+    Args:
+        image_bytes: Bytes containing the image data
+        hash_size: Width/height of the hash grid (hash has hash_size**2 bits)
+    
+    Returns:
+        Hex-encoded perceptual hash or None
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    
+    try:
+        with Image.open(BytesIO(image_bytes)) as image:
+            pixels = list(image.convert("L").resize((hash_size + 1, hash_size)).getdata())
+    except Exception:
+        return None
+    
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+async def find_image_in_container(azure_blob_service, prefix):
     """
     Find the image file in Azure Blob Storage that follows the naming pattern
     
@@ -41,6 +341,6 @@ def find_image_in_container(azure_blob_service, prefix):
     Returns:
         Blob path to the image file or None if not found
     """
-    blobs = azure_blob_service.list_blobs(prefix=prefix)
+    blobs = await azure_blob_service.list_blobs(prefix=prefix)
     image_blobs = [blob for blob in blobs if 'image_' in blob]
     return image_blobs[0] if image_blobs else None
\ No newline at end of file
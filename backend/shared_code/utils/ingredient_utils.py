@@ -0,0 +1,78 @@
+"""
+Ingredient Utilities - Functions for normalizing and comparing ingredient lists
+"""
+
+import re
+
+# Words that describe the state, quantity or packaging of an ingredient rather
+# than the ingredient itself ("fresh sliced mushrooms" -> "mushroom")
+DESCRIPTOR_WORDS = frozenset([
+    "a", "an", "the", "of", "some", "few", "several", "assorted", "various",
+    "fresh", "freshly", "organic", "raw", "cooked", "leftover", "leftovers", "ripe", "opened", "unopened",
+    "sliced", "chopped", "diced", "minced", "grated", "shredded", "crushed", "peeled", "cubed", "halved",
+    "whole", "half", "partial", "large", "medium", "small", "mini", "baby",
+    "bag", "bags", "bottle", "bottles", "jar", "jars", "can", "cans", "carton", "cartons",
+    "pack", "packs", "package", "packages", "packet", "packets", "box", "boxes", "tub", "tubs",
+    "container", "containers", "piece", "pieces", "bunch", "bunches", "block", "head", "loaf",
+    "g", "kg", "mg", "ml", "l", "oz", "lb", "lbs", "cup", "cups", "tbsp", "tsp"
+])
+
+_NON_WORD_PATTERN = re.compile(r"[^a-z\s]+")
+
+def _singularize(word):
+    """Reduce a plural word to a naive singular form (tomatoes -> tomato, berries -> berry)"""
+    if len(word) <= 3 or word.endswith("ss") or word.endswith("us"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+def canonicalize_ingredient(ingredient):
+    """
+    Normalize a single ingredient name
+    
+    Lowercases the name, strips punctuation, numbers and descriptor words
+    (quantities, packaging, preparation) and singularizes the remaining words.
+    
+    Args:
+        ingredient: Ingredient name as returned by the vision model
+    
+    Returns:
+        Canonical ingredient name (empty string if nothing meaningful is left)
+    """
+    words = _NON_WORD_PATTERN.sub(" ", str(ingredient).lower()).split()
+    return " ".join(_singularize(word) for word in words if word not in DESCRIPTOR_WORDS)
+
+def canonicalize_ingredients(ingredients):
+    """
+    Normalize a list of ingredients into a sorted, de-duplicated list
+    
+    Args:
+        ingredients: List of ingredient names
+    
+    Returns:
+        Sorted list of unique canonical ingredient names
+    """
+    canonical = {canonicalize_ingredient(ingredient) for ingredient in ingredients}
+    canonical.discard("")
+    return sorted(canonical)
+
+def jaccard_similarity(first, second):
+    """
+    Compute the Jaccard similarity of two ingredient collections
+    
+    Args:
+        first: Iterable of canonical ingredient names
+        second: Iterable of canonical ingredient names
+    
+    Returns:
+        Similarity between 0.0 (disjoint) and 1.0 (identical)
+    """
+    first, second = set(first), set(second)
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
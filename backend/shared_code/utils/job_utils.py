@@ -0,0 +1,73 @@
+"""
+Job Utilities - Job mode negotiation and job status responses
+"""
+
+# Seconds clients are asked to wait before polling a pending job again
+POLL_INTERVAL_SECONDS = 2
+
+def is_job_requested(req, req_body=None, mode="optional"):
+    """
+    Determine whether a request should be processed as a queued job
+    
+    With JOB_MODE "optional", clients opt in with "Prefer: respond-async"
+    (RFC 7240), "async": true in the JSON body or ?async=true. "always"
+    queues every request and "off" none.
+    
+    Args:
+        req: HTTP request object
+        req_body: Parsed JSON body of the request, if any
+        mode: "optional", "always" or "off"
+    
+    Returns:
+        True if the request should be queued
+    """
+    if mode == "always":
+        return True
+    if mode != "optional":
+        return False
+    
+    prefer = req.headers.get('Prefer', '') or ''
+    if 'respond-async' in prefer.lower():
+        return True
+    requested = (req_body or {}).get('async', req.params.get('async'))
+    return str(requested).lower() in ("true", "1", "yes")
+
+def get_wait_seconds(req, max_wait):
+    """
+    Get how long a client asked to wait for a pending job (?wait=<seconds>)
+    
+    Args:
+        req: HTTP request object
+        max_wait: Longest wait allowed
+    
+    Returns:
+        Seconds to wait (0 if the client did not ask to wait)
+    """
+    try:
+        wait = float(req.params.get('wait') or 0)
+    except ValueError:
+        return 0
+    return max(0, min(wait, max_wait))
+
+def get_job_status_response(status):
+    """
+    Build the response describing a job that has not produced its result
+    
+    Args:
+        status: Job status document from JobService
+    
+    Returns:
+        Tuple of (body dictionary, HTTP status code, headers): 202 with Retry-After
+        while the job is queued or running, the job's error status once it failed
+    """
+    headers = {"Cache-Control": "no-store"}
+    if status["status"] == "failed":
+        body = {
+            "error": status.get("error"),
+            "status": "failed",
+            "request_id": status["request_id"]
+        }
+        return body, status.get("status_code", 500), headers
+    
+    headers["Retry-After"] = str(POLL_INTERVAL_SECONDS)
+    return {"status": status["status"], "request_id": status["request_id"]}, 202, headers
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+JSON Utilities - Serialization of persisted JSON (compact encoding, compression)
+"""
+
+import gzip
+import json
+import logging
+
+# orjson and zstandard are optional: orjson is a faster drop-in for the standard
+# library encoder, zstandard is only needed for the "zstd" compression setting
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUPPORTED_COMPRESSIONS = ("none", "gzip", "zstd")
+
+# Leading bytes of compressed data; a JSON document never starts with either
+_MAGIC_NUMBERS = {
+    "gzip": b"\x1f\x8b",
+    "zstd": b"\x28\xb5\x2f\xfd"
+}
+
+def dumps_bytes(data, indent=False):
+    """
+    Serialize data to UTF-8 JSON bytes, using orjson if it is installed
+    
+    Args:
+        data: JSON-serializable object
+        indent: Pretty-print with 2-space indentation instead of the compact form
+    
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    
+    if indent:
+        return json.dumps(data, indent=2).encode('utf-8')
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode('utf-8')
+
+def loads_bytes(data):
+    """
+    Parse JSON bytes (or str), using orjson if it is installed
+    
+    Args:
+        data: JSON document
+    
+    Returns:
+        Parsed object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def get_compression(compression):
+    """
+    Resolve a configured compression to the content coding that will be used
+    
+    Args:
+        compression: "none", "gzip" or "zstd" (None counts as "none")
+    
+    Returns:
+        Content coding name ("gzip" or "zstd"), or None for no compression
+    
+    Raises:
+        ValueError: If the compression is unknown or zstd is requested without the zstandard package
+    """
+    compression = (compression or "none").lower()
+    if compression not in SUPPORTED_COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {compression} (expected one of {', '.join(SUPPORTED_COMPRESSIONS)})")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+    return None if compression == "none" else compression
+
+def compress(data, content_encoding):
+    """
+    Compress bytes with a content coding
+    
+    Args:
+        data: Bytes to compress
+        content_encoding: "gzip", "zstd" or None for no compression
+    
+    Returns:
+        Compressed bytes
+    """
+    if not content_encoding:
+        return data
+    if content_encoding == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if content_encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+def decompress(data, content_encoding):
+    """
+    Undo a content coding
+    
+    Args:
+        data: Bytes as stored
+        content_encoding: Content-Encoding the bytes were stored with ("gzip", "zstd", "identity" or None)
+    
+    Returns:
+        Decompressed bytes
+    """
+    if not content_encoding or content_encoding == "identity":
+        return data
+    if content_encoding == "gzip":
+        return gzip.decompress(data)
+    if content_encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+def encode_json(data, indent=False, compression=None):
+    """
+    Serialize data for storage
+    
+    Args:
+        data: JSON-serializable object
+        indent: Pretty-print instead of the compact form
+        compression: Content coding to apply ("gzip", "zstd" or None)
+    
+    Returns:
+        Tuple of (bytes to store, Content-Encoding or None)
+    """
+    return compress(dumps_bytes(data, indent=indent), compression), compression
+
+def detect_content_encoding(data):
+    """
+    Detect the content coding of stored JSON from its leading bytes
+    
+    Args:
+        data: Bytes as stored
+    
+    Returns:
+        "gzip" or "zstd" if the bytes are compressed, None for plain JSON
+    """
+    for content_encoding, magic in _MAGIC_NUMBERS.items():
+        if data[:len(magic)] == magic:
+            return content_encoding
+    return None
+
+def decode_json(data, content_encoding=None):
+    """
+    Parse stored JSON, decompressing it first if needed
+    
+    The bytes themselves decide whether they are decompressed, so plain
+    blobs written before compression was enabled (or after it was turned
+    off) keep being read whatever Content-Encoding they carry.
+    
+    Args:
+        data: Bytes as stored
+        content_encoding: Content-Encoding the bytes were stored with
+    
+    Returns:
+        Parsed object
+    """
+    detected = detect_content_encoding(data)
+    if detected != content_encoding and content_encoding not in (None, "", "identity"):
+        logging.warning(f"Stored JSON is marked {content_encoding} but is {detected or 'uncompressed'}, reading it as such")
+    return loads_bytes(decompress(data, detected))
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Schema Utilities - JSON Schemas generated from the data models, validation and structured output formats
+"""
+
+import dataclasses
+import typing
+
+# Keywords used for local validation that strict structured outputs do not accept
+_LOCAL_ONLY_KEYWORDS = ("minimum", "maximum")
+
+_SCALAR_TYPES = {
+    str: "string",
+    float: "number",
+    int: "integer",
+    bool: "boolean"
+}
+
+def build_json_schema(model_class):
+    """
+    Build a JSON Schema from a dataclass model
+    
+    Every field is required and no additional properties are allowed, as strict
+    structured outputs demand. Field metadata adds constraints: "enum" (allowed
+    values), "minimum"/"maximum" (number bounds) and "keys" (the fixed keys of
+    a Dict field, which strict mode cannot leave open).
+    
+    Args:
+        model_class: Dataclass whose fields are str, float, int, bool, List, Dict or other dataclasses
+    
+    Returns:
+        JSON Schema dictionary
+    
+    Raises:
+        ValueError: If a field type cannot be expressed as a strict schema
+    """
+    hints = typing.get_type_hints(model_class)
+    properties = {}
+    for model_field in dataclasses.fields(model_class):
+        properties[model_field.name] = _build_type_schema(hints[model_field.name], model_field.metadata)
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+def _build_type_schema(field_type, metadata=None):
+    """Build the schema of a single (possibly nested) field type"""
+    metadata = metadata or {}
+    if dataclasses.is_dataclass(field_type):
+        return build_json_schema(field_type)
+    
+    if field_type in _SCALAR_TYPES:
+        schema = {"type": _SCALAR_TYPES[field_type]}
+        for keyword in ("enum", "minimum", "maximum"):
+            if keyword in metadata:
+                schema[keyword] = list(metadata[keyword]) if keyword == "enum" else metadata[keyword]
+        return schema
+    
+    origin = typing.get_origin(field_type)
+    arguments = typing.get_args(field_type)
+    if origin is list:
+        return {"type": "array", "items": _build_type_schema(arguments[0])}
+    if origin is dict and "keys" in metadata:
+        value_schema = _build_type_schema(arguments[1])
+        return {
+            "type": "object",
+            "properties": {key: value_schema for key in metadata["keys"]},
+            "required": list(metadata["keys"]),
+            "additionalProperties": False
+        }
+    raise ValueError(f"Cannot build a strict JSON Schema for type {field_type}")
+
+def validate_json(data, schema, path="$"):
+    """
+    Validate data against a JSON Schema built by build_json_schema
+    
+    Supports the subset of JSON Schema those schemas use (type, enum,
+    minimum/maximum, properties, required, additionalProperties and items),
+    which keeps validation a single cheap pass over the data.
+    
+    Args:
+        data: Parsed JSON data
+        schema: JSON Schema dictionary
+        path: Path of the data in the document, used in error messages
+    
+    Returns:
+        List of error messages (empty if the data is valid)
+    """
+    expected = schema.get("type")
+    if expected == "object":
+        if not isinstance(data, dict):
+            return [f"{path}: expected an object"]
+        errors = []
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in data:
+                errors.append(f"{path}.{name}: missing")
+        for name, value in data.items():
+            if name in properties:
+                errors.extend(validate_json(value, properties[name], f"{path}.{name}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{name}: unexpected property")
+        return errors
+    
+    if expected == "array":
+        if not isinstance(data, list):
+            return [f"{path}: expected an array"]
+        errors = []
+        for index, item in enumerate(data):
+            errors.extend(validate_json(item, schema.get("items", {}), f"{path}[{index}]"))
+        return errors
+    
+    if expected == "string" and not isinstance(data, str):
+        return [f"{path}: expected a string"]
+    if expected in ("number", "integer"):
+        if isinstance(data, bool) or not isinstance(data, (int, float)) or (expected == "integer" and not isinstance(data, int)):
+            return [f"{path}: expected {'an integer' if expected == 'integer' else 'a number'}"]
+        if "minimum" in schema and data < schema["minimum"]:
+            return [f"{path}: must be at least {schema['minimum']}"]
+        if "maximum" in schema and data > schema["maximum"]:
+            return [f"{path}: must be at most {schema['maximum']}"]
+    if expected == "boolean" and not isinstance(data, bool):
+        return [f"{path}: expected a boolean"]
+    if "enum" in schema and data not in schema["enum"]:
+        return [f"{path}: must be one of {', '.join(map(str, schema['enum']))}"]
+    return []
+
+def to_strict_schema(schema):
+    """
+    Remove the keywords strict structured outputs do not accept from a schema
+    
+    Args:
+        schema: JSON Schema dictionary
+    
+    Returns:
+        Copy of the schema without the local-only keywords
+    """
+    if isinstance(schema, dict):
+        return {key: to_strict_schema(value) for key, value in schema.items() if key not in _LOCAL_ONLY_KEYWORDS}
+    if isinstance(schema, list):
+        return [to_strict_schema(item) for item in schema]
+    return schema
+
+def get_structured_response_format(name, schema):
+    """
+    Build a chat completion response_format that enforces a JSON Schema (strict structured outputs)
+    
+    Args:
+        name: Name of the schema
+        schema: JSON Schema dictionary
+    
+    Returns:
+        response_format dictionary
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": to_strict_schema(schema)
+        }
+    }
\ No newline at end of file
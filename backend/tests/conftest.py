@@ -0,0 +1,8 @@
+"""
+Test configuration - Makes the function app importable (shared_code, function folders) from the tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
\ No newline at end of file
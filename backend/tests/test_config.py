@@ -0,0 +1,26 @@
+"""
+Tests for the configuration
+"""
+
+import logging
+
+from shared_code import config
+from shared_code.config import Config, supports_structured_outputs
+
+def test_structured_outputs_need_a_recent_api_version():
+    assert supports_structured_outputs("2024-08-01-preview")
+    assert supports_structured_outputs("2024-10-21")
+    assert not supports_structured_outputs("2024-02-01")
+    assert not supports_structured_outputs(None)
+
+def test_structured_outputs_fallback_is_logged_once(monkeypatch, caplog):
+    monkeypatch.setattr(config, "_structured_outputs_warned", False)
+    monkeypatch.setenv("API_VERSION", "2024-02-01")
+    monkeypatch.delenv("AZURE_OPENAI_DEPLOYMENTS", raising=False)
+    monkeypatch.delenv("STRUCTURED_OUTPUTS_ENABLED", raising=False)
+    
+    with caplog.at_level(logging.WARNING):
+        results = [Config().get_structured_outputs_config() for _ in range(3)]
+    
+    assert results == [{"enabled": False}] * 3
+    assert len([record for record in caplog.records if "Structured outputs" in record.message]) == 1
\ No newline at end of file
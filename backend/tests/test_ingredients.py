@@ -0,0 +1,31 @@
+"""
+Tests for the ingredients model
+"""
+
+from shared_code.models import IngredientsResult
+
+def test_merge_lists_each_item_once_across_categories():
+    fridge = IngredientsResult(ingredients={"Dairy": ["Milk", "Greek Yogurt"], "Produce": ["Carrots"]})
+    pantry = IngredientsResult(ingredients={"Other": ["greek  yogurt"], "Produce": [" carrots", "Onions"]})
+    
+    merged = IngredientsResult.merge([fridge, pantry])
+    
+    assert merged.ingredients == {
+        "Dairy": ["Milk", "Greek Yogurt"],
+        "Produce": ["Carrots", "Onions"],
+        "Other": []
+    }
+
+def test_merge_keeps_category_order_of_first_appearance():
+    first = IngredientsResult(ingredients={"Produce": ["Spinach"]})
+    second = IngredientsResult(ingredients={"Dairy": ["Butter"], "Produce": ["Spinach"]})
+    
+    merged = IngredientsResult.merge([first, second])
+    
+    assert list(merged.ingredients) == ["Produce", "Dairy"]
+    assert merged.get_all_ingredients() == ["Spinach", "Butter"]
+
+def test_merge_drops_blank_items():
+    merged = IngredientsResult.merge([IngredientsResult(ingredients={"Other": ["", "  ", "Salt"]})])
+    
+    assert merged.ingredients == {"Other": ["Salt"]}
\ No newline at end of file
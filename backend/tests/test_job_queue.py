@@ -0,0 +1,69 @@
+"""
+Tests for the in-memory job queue
+"""
+
+import asyncio
+
+from shared_code.services.job_queue import InMemoryJobQueue
+from shared_code.services.rate_limiter import RateLimitExceeded
+
+JOB = {"type": "generate_recipes", "request_id": "fridge_1_abc"}
+
+def run_job(handler, max_attempts=3):
+    """Run one job through a queue; return (queue, failures reported to on_failure)"""
+    failures = []
+    
+    async def on_failure(job, error):
+        failures.append((job, error))
+    
+    queue = InMemoryJobQueue(handler, max_attempts=max_attempts, on_failure=on_failure)
+    asyncio.run(queue._run(JOB))
+    return queue, failures
+
+def test_completed_job_is_counted():
+    async def handler(job, final_attempt):
+        return True
+    
+    queue, failures = run_job(handler)
+    
+    assert queue.get_stats()["completed"] == 1
+    assert failures == []
+
+def test_unexpected_error_records_the_failure():
+    async def handler(job, final_attempt):
+        raise OSError("blob write failed")
+    
+    queue, failures = run_job(handler)
+    
+    assert queue.get_stats()["failed"] == 1
+    assert [(job, str(error)) for job, error in failures] == [(JOB, "blob write failed")]
+
+def test_failure_callback_errors_are_contained():
+    async def handler(job, final_attempt):
+        raise OSError("blob write failed")
+    
+    async def on_failure(job, error):
+        raise OSError("status write failed too")
+    
+    queue = InMemoryJobQueue(handler, on_failure=on_failure)
+    asyncio.run(queue._run(JOB))
+    
+    assert queue.get_stats()["failed"] == 1
+
+def test_rate_limited_job_is_retried_then_failed(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+    
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    attempts = []
+    
+    async def handler(job, final_attempt):
+        attempts.append(final_attempt)
+        raise RateLimitExceeded("busy", retry_after=0)
+    
+    queue, failures = run_job(handler, max_attempts=2)
+    
+    assert attempts == [False, True]
+    assert queue.get_stats()["retried"] == 1
+    assert queue.get_stats()["failed"] == 1
+    assert len(failures) == 1
\ No newline at end of file
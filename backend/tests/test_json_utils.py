@@ -0,0 +1,46 @@
+"""
+Tests for the serialization of persisted JSON
+"""
+
+import gzip
+
+import pytest
+
+from shared_code.utils.json_utils import decode_json, detect_content_encoding, encode_json, get_compression, zstandard
+
+DATA = {"ingredients": {"Dairy": ["Milk", "Crème fraîche"], "Produce": []}}
+
+@pytest.mark.parametrize("compression", [None, "gzip", pytest.param("zstd", marks=pytest.mark.skipif(
+    zstandard is None, reason="zstandard is not installed"))])
+def test_encoded_json_round_trips(compression):
+    data, content_encoding = encode_json(DATA, compression=compression)
+    
+    assert content_encoding == compression
+    assert detect_content_encoding(data) == compression
+    assert decode_json(data, content_encoding) == DATA
+
+def test_compact_encoding_has_no_whitespace():
+    data, _ = encode_json(DATA)
+    
+    assert b": " not in data and b", " not in data
+
+def test_gzip_is_detected_without_a_content_encoding():
+    assert decode_json(gzip.compress(b'{"a": 1}')) == {"a": 1}
+
+def test_plain_json_marked_as_compressed_is_read_as_is(caplog):
+    assert decode_json(b'{"a": 1}', "gzip") == {"a": 1}
+    assert "uncompressed" in caplog.text
+
+def test_magic_bytes_decide_the_content_encoding():
+    assert detect_content_encoding(b"\x1f\x8b\x08\x00") == "gzip"
+    assert detect_content_encoding(b"\x28\xb5\x2f\xfd\x00") == "zstd"
+    assert detect_content_encoding(b'{"a": 1}') is None
+    assert detect_content_encoding(b"") is None
+
+def test_identity_content_encoding_reads_plain_json():
+    assert decode_json(b'{"a": 1}', "identity") == {"a": 1}
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        get_compression("brotli")
+    assert get_compression("NONE") is None
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Tests for the Azure OpenAI rate limiter
+"""
+
+import asyncio
+
+import pytest
+
+from shared_code.services import rate_limiter
+from shared_code.services.rate_limiter import RateLimiter, RateLimitExceeded, get_retry_after
+
+class FakeClock:
+    """Stands in for the time module, advanced by the tests"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+def test_remaining_headers_lower_the_budget(clock):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=60000)
+    
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "5", "x-ratelimit-remaining-tokens": "1000"})
+    
+    stats = limiter.get_stats()
+    assert stats["requests_available"] == 5
+    assert stats["tokens_available"] == 1000
+    assert limiter.get_headroom() == pytest.approx(1000 / 60000)
+    assert not limiter.try_acquire(2000)
+    assert limiter.try_acquire(1000)
+
+def test_remaining_headers_never_raise_the_budget(clock):
+    limiter = RateLimiter(tokens_per_minute=60000)
+    assert limiter.try_acquire(50000)
+    
+    limiter.update_from_headers({"x-ratelimit-remaining-tokens": "59000"})
+    
+    assert limiter.get_stats()["tokens_available"] == 10000
+
+def test_missing_or_malformed_headers_are_ignored(clock):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=60000)
+    
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "n/a"})
+    
+    stats = limiter.get_stats()
+    assert stats["requests_available"] == 60
+    assert stats["tokens_available"] == 60000
+
+def test_lowered_budget_refills_over_time(clock):
+    limiter = RateLimiter(tokens_per_minute=60000)
+    limiter.update_from_headers({"x-ratelimit-remaining-tokens": "0"})
+    
+    clock.now += 30
+    
+    assert limiter.get_stats()["tokens_available"] == 30000
+
+def test_upstream_throttling_pauses_admission(clock):
+    limiter = RateLimiter()
+    limiter.record_throttled(20)
+    
+    assert not limiter.try_acquire(100)
+    assert limiter.get_headroom() == 0.0
+    
+    clock.now += 20
+    assert limiter.try_acquire(100)
+
+def test_call_is_shed_when_the_wait_exceeds_the_maximum(clock):
+    limiter = RateLimiter(tokens_per_minute=60000, max_wait_seconds=10)
+    limiter.update_from_headers({"x-ratelimit-remaining-tokens": "0"})
+    
+    with pytest.raises(RateLimitExceeded) as raised:
+        asyncio.run(limiter.acquire(30000))
+    
+    assert raised.value.retry_after == 30
+    assert limiter.get_stats()["shed"] == 1
+
+def test_retry_after_prefers_milliseconds():
+    assert get_retry_after({"retry-after-ms": "1500", "retry-after": "2"}) == 1.5
+    assert get_retry_after({"retry-after": "2"}) == 2
+    assert get_retry_after({}, default=4) == 4
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Tests for the request index
+"""
+
+import pytest
+
+from shared_code.services import request_index
+from shared_code.services.request_index import RequestIndex
+
+ANALYSIS = "fridge_1_abc/ingredients.json"
+
+class FakeClock:
+    """Stands in for the time module, advanced by the tests"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(request_index, "time", clock)
+    return clock
+
+def test_known_artifact_expires_after_the_positive_ttl(clock):
+    index = RequestIndex(negative_ttl_seconds=5, positive_ttl_seconds=300)
+    index.record(ANALYSIS, size=120, etag='"0x1"')
+    
+    clock.now += 300
+    assert index.lookup(ANALYSIS)["etag"] == '"0x1"'
+    assert "ingredients.json" in index.get_request_artifacts("fridge_1_abc")
+    
+    clock.now += 1
+    assert index.lookup(ANALYSIS) is None
+    assert index.get_request_artifacts("fridge_1_abc") == {}
+
+def test_missing_artifact_expires_after_the_negative_ttl(clock):
+    index = RequestIndex(negative_ttl_seconds=5, positive_ttl_seconds=300)
+    index.record_missing(ANALYSIS)
+    
+    clock.now += 5
+    assert index.is_missing(ANALYSIS)
+    
+    clock.now += 1
+    assert not index.is_missing(ANALYSIS)
+    assert index.get_stats()["negative_hits"] == 1
+
+def test_zero_negative_ttl_does_not_remember_missing_artifacts(clock):
+    index = RequestIndex(negative_ttl_seconds=0)
+    index.record_missing(ANALYSIS)
+    
+    assert not index.is_missing(ANALYSIS)
+
+def test_invalidate_forgets_the_artifact(clock):
+    index = RequestIndex()
+    index.record(ANALYSIS, etag='"0x1"')
+    
+    index.invalidate(ANALYSIS)
+    
+    assert index.lookup(ANALYSIS) is None
+
+def test_recorded_artifact_replaces_a_missing_entry(clock):
+    index = RequestIndex()
+    index.record_missing(ANALYSIS)
+    
+    index.record(ANALYSIS, etag='"0x2"')
+    
+    assert not index.is_missing(ANALYSIS)
+    assert index.lookup(ANALYSIS)["etag"] == '"0x2"'
+
+def test_least_recently_used_requests_are_evicted(clock):
+    index = RequestIndex(max_requests=2)
+    index.record("first/ingredients.json")
+    index.record("second/ingredients.json")
+    index.lookup("first/ingredients.json")
+    
+    index.record("third/ingredients.json")
+    
+    assert index.lookup("second/ingredients.json") is None
+    assert index.lookup("first/ingredients.json") is not None
+    assert index.get_stats()["evictions"] == 1
+
+def test_paths_outside_a_request_folder_are_ignored(clock):
+    index = RequestIndex()
+    index.record("cache/vision/sha256-abc.json")
+    
+    assert index.lookup("cache/vision/sha256-abc.json") is None
+    assert index.get_stats()["requests"] == 0
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Tests for the circuit breaker and its use by a deployment
+"""
+
+import asyncio
+
+import pytest
+
+from shared_code.services.deployment_pool import Deployment
+from shared_code.services.resilience import CircuitBreaker, CircuitOpenError
+
+def open_breaker(recovery_seconds=0):
+    """Create a breaker and trip it with two consecutive failures"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=recovery_seconds)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    return breaker
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    
+    breaker.record_failure()
+    
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.status_code == 503
+    assert raised.value.retry_after >= 1
+    assert breaker.get_stats()["opened"] == 1
+    assert breaker.get_stats()["rejected"] == 1
+
+def test_half_open_admits_a_single_trial():
+    breaker = open_breaker()
+    
+    breaker.before_call()
+    
+    assert breaker.state == "half_open"
+    assert breaker.is_recovering()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_successful_trial_closes_the_breaker():
+    breaker = open_breaker()
+    breaker.before_call()
+    
+    breaker.record_success()
+    
+    assert breaker.state == "closed"
+    assert not breaker.is_recovering()
+    breaker.before_call()
+    breaker.before_call()
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = open_breaker()
+    breaker.before_call()
+    breaker.recovery_seconds = 30
+    
+    breaker.record_failure()
+    
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_released_trial_admits_the_next_one():
+    breaker = open_breaker()
+    breaker.before_call()
+    
+    breaker.release()
+    
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        breaker.record_failure()
+    
+    breaker.before_call()
+    assert breaker.state == "closed"
+
+def test_deployment_failure_counts_against_the_breaker():
+    deployment = Deployment("primary", client=None, model_name="gpt-4o", breaker=CircuitBreaker(failure_threshold=1))
+    
+    async def request(deployment):
+        raise asyncio.TimeoutError()
+    
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(deployment.run(request))
+    
+    assert deployment.breaker.state == "open"
+    assert deployment.get_stats()["errors"] == 1
+
+def test_cancelled_trial_admits_the_next_call():
+    breaker = open_breaker()
+    deployment = Deployment("primary", client=None, model_name="gpt-4o", breaker=breaker)
+    
+    async def request(deployment):
+        await asyncio.sleep(60)
+    
+    async def cancel_trial():
+        breaker.before_call()
+        task = asyncio.ensure_future(deployment.run(request))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(cancel_trial())
+    
+    assert deployment.outstanding == 0
+    assert breaker.state == "half_open"
+    breaker.before_call()
\ No newline at end of file
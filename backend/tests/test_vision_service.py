@@ -0,0 +1,51 @@
+"""
+Tests for the batch (multi-image) analysis of the vision service
+"""
+
+import asyncio
+
+import pytest
+
+from shared_code.models import TokenUsage
+from shared_code.services.rate_limiter import RateLimitExceeded
+from shared_code.services.vision_service import VisionService
+
+def create_service(outcomes):
+    """Create a vision service whose image analyses return (or raise) the given outcomes, keyed by image bytes"""
+    service = VisionService(azure_openai_client=None)
+    
+    async def analyze_image_bytes(image_bytes, usage=None):
+        if usage is not None:
+            usage.merge(TokenUsage(prompt_tokens=100, completion_tokens=10, total_tokens=110, calls=1))
+        outcome = outcomes[image_bytes]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    service.analyze_image_bytes = analyze_image_bytes
+    return service
+
+def test_failed_image_is_skipped():
+    error = ValueError("Invalid analysis from the vision model")
+    service = create_service({
+        b"fridge": {"ingredients": {"dairy": ["Milk"], "vegetables": ["Carrots"]}},
+        b"blurry": error,
+        b"pantry": {"ingredients": {"grains": ["Rice"], "dairy": ["milk"]}}
+    })
+    usage = TokenUsage()
+    
+    result, image_results = asyncio.run(service.analyze_images_bytes([b"fridge", b"blurry", b"pantry"], usage=usage))
+    
+    assert result == {"ingredients": {"dairy": ["Milk"], "vegetables": ["Carrots"], "grains": ["Rice"]}}
+    assert image_results[1] is error
+    assert usage.calls == 3
+    assert service.get_stats()["skipped_images"] == 1
+
+def test_request_fails_when_every_image_fails():
+    service = create_service({
+        b"fridge": RateLimitExceeded("Azure OpenAI budget exhausted", retry_after=5),
+        b"pantry": ValueError("Invalid analysis from the vision model")
+    })
+    
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(service.analyze_images_bytes([b"fridge", b"pantry"]))
\ No newline at end of file